@@ -1,22 +1,56 @@
 import os
 import glob
+import json
+import base64
+import hashlib
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Optional,Union,Tuple
+from typing import List, Dict, Iterator, Optional,Union,Tuple
 from wikisearch.zim.zim_searcher import ZIMSearcher
-from libzim.reader import Archive
+from wikisearch.zim.records import ArticleContent, SearchHit
+from wikisearch.zim.archive_manager import read_zim_uuid
+from wikisearch.watcher import ZimDirectoryWatcher
+from wikisearch.process_backend import ProcessBackend, in_worker_process
+from wikisearch.tools.convert_html import content_to_markdown, entry_to_markdown
+from wikisearch.tools.content_cache import content_cache
+from wikisearch.deadline import Deadline, expired
+from wikisearch.singleflight import SingleFlight
 import time
 
 from wikisearch.config import config
 DEFAULT_ZIM_DIR = config.WIKI_DOWNLOAD_DIR
 ZIM_FILE_PATTERN = "*.zim"
 
+
+def find_zim_files(directory: str) -> List[str]:
+    """返回目录下所有 .zim 文件的路径（排序以保证一致性）。"""
+    return sorted(glob.glob(str(Path(directory) / ZIM_FILE_PATTERN)))
+
+
+class _SearcherGeneration:
+    """
+    一个不可变的档案集合（ZIMSearcher）及正在使用它的请求数。
+    被新的集合取代后，最后一个请求结束时释放其中不再使用的档案。
+    """
+
+    __slots__ = ("searcher", "readers", "successor", "released")
+
+    def __init__(self, searcher: ZIMSearcher):
+        self.searcher = searcher
+        self.readers = 0
+        self.successor: Optional[ZIMSearcher] = None
+        self.released = False
+
+
 class WikiSearchAPI:
     """
     Wiki搜索API接口 (基于 libzim，直接搜索 ZIM 文件)。
     支持从目录加载多个 ZIM 文件。
     """
 
-    def __init__(self, zim_source: Optional[Union[str, List[str]]] = None):
+    def __init__(self, zim_source: Optional[Union[str, List[str]]] = None, backend: Optional[str] = None,
+                 process_workers: Optional[int] = None):
         """
         初始化 WikiSearchAPI。
 
@@ -27,11 +61,16 @@ class WikiSearchAPI:
                     - 且是一个存在的目录：则加载该目录下所有 .zim 文件。
                 - 如果是字符串列表：则加载列表中的所有 ZIM 文件路径。
                 - 如果为 None：则使用配置中的默认目录，并加载其中所有 .zim 文件。
+            backend (str, optional): 执行后端，"thread"（在当前进程中执行）或 "process"
+                （全文搜索、标题建议和 Markdown 转换在进程池中执行）。默认使用配置中的 WIKI_BACKEND。
+            process_workers (int, optional): "process" 后端的工作进程数，默认使用配置中的 WIKI_PROCESS_WORKERS。
         Raises:
             FileNotFoundError: 如果指定的文件或目录不存在。
             ValueError: 如果提供的路径列表为空或无效。
         """
         self.zim_paths: List[str] = []
+        # 从目录加载时记录该目录，reload() 和目录监视据此重新扫描
+        self.zim_dir: Optional[str] = None
 
         if zim_source is None:
             # 使用默认目录
@@ -50,11 +89,11 @@ class WikiSearchAPI:
                     raise ValueError(f"Provided file is not a .zim file: {zim_source}")
             elif path_obj.is_dir():
                 # 目录，查找所有 .zim 文件
-                zim_pattern_full = str(path_obj / ZIM_FILE_PATTERN)
-                found_zims = glob.glob(zim_pattern_full)
+                self.zim_dir = str(path_obj)
+                found_zims = find_zim_files(self.zim_dir)
                 if not found_zims:
                     print(f"Warning: No .zim files found in directory: {zim_source}")
-                self.zim_paths = sorted(found_zims) # 排序以保证一致性
+                self.zim_paths = found_zims
             else:
                 raise ValueError(f"Provided path is neither a file nor a directory: {zim_source}")
 
@@ -87,10 +126,73 @@ class WikiSearchAPI:
         # ZIMSearcher 可以处理多个文件
         try:
             # 将找到的所有 ZIM 文件路径传递给 ZIMSearcher
-            self._searcher = ZIMSearcher(self.zim_paths)
+            self._generation = _SearcherGeneration(ZIMSearcher(self.zim_paths))
             print(f"WikiSearchAPI initialized with ZIM file(s): {self.zim_paths}")
         except Exception as e:
             raise RuntimeError(f"Failed to initialize ZIMSearcher: {e}") from e
+        # 热重载：_swap_lock 保护当前档案集合与读者计数，_reload_lock 串行化 reload()
+        self._swap_lock = threading.Lock()
+        self._reload_lock = threading.RLock()
+        self._watcher: Optional[ZimDirectoryWatcher] = None
+        # 合并同时到达的相同搜索请求
+        self._search_flights = SingleFlight(config.WIKI_SINGLE_FLIGHT)
+        # 按查询的书写系统自动选择档案（显式的 zim/lang 选择器不受此开关影响）
+        self.language_routing = config.WIKI_LANGUAGE_ROUTING
+
+        # 预热：启用 WIKI_WARMUP 时，warmup() 完成后才视为就绪
+        self.warmup_report: Optional[Dict] = None
+        self._ready = threading.Event()
+        if not config.WIKI_WARMUP:
+            self._ready.set()
+
+        self.backend = backend or config.WIKI_BACKEND
+        if self.backend not in ("thread", "process"):
+            raise ValueError(f"Unsupported backend: {self.backend}")
+        self._process_backend: Optional[ProcessBackend] = None
+        # 工作进程中重新导入服务模块时不再创建嵌套的进程池
+        if self.backend == "process" and not in_worker_process():
+            self._process_backend = ProcessBackend(
+                self._searcher.list_open_zims(), process_workers or config.WIKI_PROCESS_WORKERS or None
+            )
+
+    @property
+    def _searcher(self) -> ZIMSearcher:
+        """当前的档案集合。请求中应使用 _use_searcher()，保证请求期间集合不会被释放。"""
+        return self._generation.searcher
+
+    @contextmanager
+    def _use_searcher(self) -> Iterator[ZIMSearcher]:
+        """在一次请求期间使用当前的档案集合；集合在请求进行中被替换时，由最后一个请求释放旧集合。"""
+        with self._swap_lock:
+            generation = self._generation
+            generation.readers += 1
+        try:
+            yield generation.searcher
+        finally:
+            with self._swap_lock:
+                generation.readers -= 1
+                drained = self._take_drained(generation)
+            if drained:
+                self._release(generation)
+
+    @staticmethod
+    def _take_drained(generation: _SearcherGeneration) -> bool:
+        # 调用方持有 _swap_lock；已被替换且没有读者的集合只释放一次
+        if generation.successor is None or generation.readers or generation.released:
+            return False
+        generation.released = True
+        return True
+
+    @staticmethod
+    def _release(generation: _SearcherGeneration) -> None:
+        # 被移除或被新版本替换的档案不会再被读取，同时释放它们在内存内容缓存中的条目
+        retired_uuids = set(generation.searcher.archive_uuids) - set(generation.successor.archive_uuids)
+        try:
+            generation.searcher.release(generation.successor)
+        except Exception as e:
+            print(f"Failed to release retired ZIM archives: {e}")
+        for archive_uuid in retired_uuids:
+            content_cache.invalidate_archive(archive_uuid)
 
     def search(self, query: str, result_index: int = 0) -> Tuple[bool, str, Optional[str], Optional[str]]:
         """
@@ -105,8 +207,170 @@ class WikiSearchAPI:
                    - 如果成功：(True, title, html_content_str, None)
                    - 如果失败：(False, "", None, error_message)
         """
-        # 直接调用内部 ZIMSearcher 的方法
-        return self._searcher.search_and_get_html(search_term=query, result_index=result_index)
+        # 同时到达的相同请求共享一次搜索和读取
+        return self._search_flights.do(("search", query, result_index), lambda: self._search(query, result_index))
+
+    def _search(self, query: str, result_index: int) -> Tuple[bool, str, Optional[str], Optional[str]]:
+        success, archive_uuid, path, _, error = self.locate(query, result_index)
+        if not success:
+            return False, "", None, error
+        return self.get_html(archive_uuid, path)
+
+    def route(self, query: str, zim: Optional[str] = None, lang: Optional[str] = None) -> Optional[List[str]]:
+        """
+        路由阶段：选择查询应搜索的档案。
+
+        提供 zim 或 lang 时只搜索匹配的档案；否则在启用 WIKI_LANGUAGE_ROUTING 时按查询的书写系统
+        （码位区间判断，见 zim.language）只搜索语言匹配的档案，档案语言取自元数据 Language。
+
+        Args:
+            query (str): 搜索关键词或标题前缀。
+            zim (str, optional): 档案选择器，逗号分隔的 UUID、文件名或不含扩展名的文件名。
+            lang (str, optional): 逗号分隔的语言代码，如 "zh" 或 "eng,fra"。
+
+        Returns:
+            list[str] or None: 要搜索的档案 UUID，None 表示搜索全部档案。
+
+        Raises:
+            ValueError: zim/lang 没有匹配任何已加载的档案。
+        """
+        if not (zim or lang) and not self.language_routing:
+            return None
+        with self._use_searcher() as searcher:
+            archives = searcher.route(query, zim, lang)
+        if archives is not None and not archives:
+            raise ValueError(f"ZIM archive matching zim={zim!r}, lang={lang!r} not found.")
+        return archives
+
+    def locate(self, query: str, result_index: int = 0, deadline: Optional[Deadline] = None,
+               zim: Optional[str] = None, lang: Optional[str] = None) -> Tuple[bool, Optional[str], Optional[str], Optional[str], Optional[str]]:
+        """
+        搜索并定位结果条目，不读取其内容。
+        索引为 0 时先尝试把 query 当作标题精确查找，未命中再进行全文搜索。
+        只搜索路由阶段（见 route）选择的档案；自动选择的档案中没有结果时再搜索全部档案。
+
+        Args:
+            query (str): 搜索关键词。
+            result_index (int): 要定位的搜索结果的索引（默认第一个）。
+            deadline (Deadline, optional): 截止时间，超时未返回的档案不参与排名。
+            zim (str, optional): 只搜索这些档案，见 route。
+            lang (str, optional): 只搜索这些语言的档案，见 route。
+
+        Returns:
+            tuple: (成功标志 (bool), 档案 UUID (str 或 None), 条目路径 (str 或 None),
+                    命中方式 (str 或 None), 错误信息 (str 或 None))
+                   命中方式为 "title"、"path"、"redirect" 或 "fulltext"。
+        """
+        try:
+            archives = self.route(query, zim, lang)
+        except ValueError as e:
+            return False, None, None, None, str(e)
+        result = self._locate(query, result_index, deadline, archives)
+        if not result[0] and archives is not None and not (zim or lang) and not expired(deadline):
+            result = self._locate(query, result_index, deadline, None)
+        return result
+
+    def _locate(self, query: str, result_index: int, deadline: Optional[Deadline],
+                archives: Optional[List[str]]) -> Tuple[bool, Optional[str], Optional[str], Optional[str], Optional[str]]:
+        if self._process_backend:
+            return self._process_backend.locate(query, result_index, deadline, archives)
+        with self._use_searcher() as searcher:
+            return searcher.locate(search_term=query, result_index=result_index, deadline=deadline, archives=archives)
+
+    def find_entry(self, key: str, by: str = "path",
+                   archive: Optional[str] = None) -> Tuple[bool, Optional[str], Optional[str], Optional[str], Optional[str]]:
+        """
+        按条目路径或标题直接查找条目（不经过全文搜索），并跟随重定向。
+
+        Args:
+            key (str): 条目路径或标题。
+            by (str): "path" 或 "title"。
+            archive (str, optional): 只在该档案中查找（UUID、文件名或不含扩展名的文件名）。
+
+        Returns:
+            tuple: (成功标志 (bool), 档案 UUID (str 或 None), 最终条目路径 (str 或 None),
+                    命中方式 (str 或 None), 错误信息 (str 或 None))
+        """
+        with self._use_searcher() as searcher:
+            return searcher.find_entry(key, by, archive)
+
+    def get_html(self, archive_uuid: str, path: str) -> Tuple[bool, str, Optional[str], Optional[str]]:
+        """
+        按档案 UUID 和条目路径读取 HTML 内容。
+
+        Args:
+            archive_uuid (str): 档案的 UUID。
+            path (str): 条目路径。
+
+        Returns:
+            tuple: (成功标志 (bool), 标题 (str), HTML 内容 (str 或 None), 错误信息 (str 或 None))
+        """
+        with self._use_searcher() as searcher:
+            return searcher.get_html(archive_uuid, path)
+
+    def get_content(self, archive_uuid: str, path: str) -> Tuple[bool, str, Optional[memoryview], Optional[str], Optional[str]]:
+        """
+        按档案 UUID 和条目路径读取原始内容，不复制、不解码。
+
+        Args:
+            archive_uuid (str): 档案的 UUID。
+            path (str): 条目路径。
+
+        Returns:
+            tuple: (成功标志 (bool), 标题 (str), 内容 (memoryview 或 None), MIME 类型 (str 或 None), 错误信息 (str 或 None))
+        """
+        with self._use_searcher() as searcher:
+            return searcher.get_content(archive_uuid, path)
+
+    def get_article(self, archive_uuid: str, path: str) -> Tuple[bool, Optional[ArticleContent], Optional[str]]:
+        """
+        按档案 UUID 和条目路径读取文章，正文为不复制、不解码的原始内容。
+
+        Args:
+            archive_uuid (str): 档案的 UUID。
+            path (str): 条目路径。
+
+        Returns:
+            tuple: (成功标志 (bool), 文章内容 (ArticleContent 或 None), 错误信息 (str 或 None))
+        """
+        with self._use_searcher() as searcher:
+            return searcher.get_article(archive_uuid, path)
+
+    def get_markdown(self, archive_uuid: str, path: str,
+                     deadline: Optional[Deadline] = None) -> Tuple[bool, str, Optional[str], bool, Optional[str]]:
+        """
+        按档案 UUID 和条目路径读取 HTML 并转换为 Markdown。"process" 后端下转换在工作进程中进行。
+
+        Args:
+            archive_uuid (str): 档案的 UUID。
+            path (str): 条目路径。
+            deadline (Deadline, optional): 截止时间，超时后只返回已转换的章节。
+
+        Returns:
+            tuple: (成功标志 (bool), 标题 (str), Markdown 内容 (str 或 None), 是否为部分结果 (bool), 错误信息 (str 或 None))
+        """
+        if self._process_backend:
+            return self._process_backend.get_markdown(archive_uuid, path, deadline)
+        with self._use_searcher() as searcher:
+            return entry_to_markdown(searcher, archive_uuid, path, deadline)
+
+    def convert_markdown(self, title: str, content: Union[bytes, memoryview], mimetype: Optional[str] = None,
+                         deadline: Optional[Deadline] = None) -> Tuple[bool, Optional[str], bool, Optional[str]]:
+        """
+        将已读取的条目 HTML 转换为 Markdown（get_markdown 的转换阶段）。"process" 后端下转换在工作进程中进行。
+
+        Args:
+            title (str): 文章标题。
+            content (bytes | memoryview): 条目的原始 HTML。
+            mimetype (str, optional): 条目的 MIME 类型。
+            deadline (Deadline, optional): 截止时间，超时后只返回已转换的章节。
+
+        Returns:
+            tuple: (成功标志 (bool), Markdown 内容 (str 或 None), 是否为部分结果 (bool), 错误信息 (str 或 None))
+        """
+        if self._process_backend:
+            return self._process_backend.convert_markdown(title, content, mimetype, deadline)
+        return content_to_markdown(content, title, mimetype, deadline)
 
     # --- 便捷方法，封装搜索以返回更结构化的数据 ---
     def search_article(self, query: str, result_index: int = 0) -> Dict[str, Union[bool, str, None]]:
@@ -129,49 +393,187 @@ class WikiSearchAPI:
         }
     # --- 便捷方法结束 ---
 
+    def search_hits(self, query: str, offset: int = 0, limit: int = 10, cursor: Optional[str] = None, snippets: bool = False,
+                    deadline: Optional[Deadline] = None, zim: Optional[str] = None, lang: Optional[str] = None) -> Dict:
+        """
+        搜索并返回一页轻量级命中记录（档案、路径、标题、大小、MIME 类型），默认不读取文章内容。
+
+        Args:
+            query (str): 搜索关键词。
+            offset (int): 起始的全局排名，提供 cursor 时忽略。
+            limit (int): 本页最多返回的命中数量。
+            cursor (str, optional): 上一页返回的 next_cursor，用于确定性地翻页。
+            snippets (bool): 是否为每个命中附加高亮查询词的上下文片段 (SearchHit.snippet)。
+            deadline (Deadline, optional): 截止时间，超时后返回已得到的命中。
+            zim (str, optional): 只搜索这些档案，见 route；提供 cursor 时沿用第一页选择的档案。
+            lang (str, optional): 只搜索这些语言的档案，见 route。
+
+        Returns:
+            dict: 包含 'query', 'offset', 'limit', 'hits' (list[SearchHit]), 'next_cursor', 'partial' 键的字典。
+                  没有更多结果时 next_cursor 为 None；partial 为 True 表示因超时只返回了部分命中，
+                  next_cursor 从第一个未返回的命中开始。
+
+        Raises:
+            ValueError: 如果 cursor 无效、与 query 不匹配，已加载的 ZIM 文件发生了变化，或 zim/lang 没有匹配的档案。
+        """
+        if cursor:
+            offset, archives = self._decode_cursor(cursor, query)
+        else:
+            archives = self.route(query, zim, lang)
+
+        hits, has_more, partial = self._search_hits(query, offset, limit, snippets, deadline, archives)
+        if not hits and not partial and not cursor and offset == 0 and archives is not None and not (zim or lang):
+            # 自动选择的档案中没有结果时搜索全部档案
+            archives = None
+            hits, has_more, partial = self._search_hits(query, offset, limit, snippets, deadline, archives)
+        return {
+            "query": query,
+            "offset": offset,
+            "limit": limit,
+            "hits": hits,
+            "next_cursor": self._encode_cursor(query, offset + len(hits), archives) if has_more else None,
+            "partial": partial,
+        }
+
+    def _search_hits(self, query: str, offset: int, limit: int, snippets: bool, deadline: Optional[Deadline],
+                     archives: Optional[List[str]]) -> Tuple[List[SearchHit], bool, bool]:
+        if self._process_backend:
+            return self._process_backend.search_hits(query, offset, limit, snippets, deadline, archives)
+        with self._use_searcher() as searcher:
+            return searcher.search_hits(query, offset, limit, snippets=snippets, deadline=deadline, archives=archives)
+
+    def suggest(self, prefix: str, limit: int = 10, zim: Optional[str] = None, lang: Optional[str] = None) -> List[Dict]:
+        """
+        根据标题前缀返回标题建议（合并路由阶段选择的 ZIM 文件，见 route）。
+
+        Args:
+            prefix (str): 标题前缀。
+            limit (int): 最多返回的建议数量。
+            zim (str, optional): 只在这些档案中查找，见 route。
+            lang (str, optional): 只在这些语言的档案中查找，见 route。
+
+        Returns:
+            list[dict]: 每个建议包含 'title', 'path', 'archive' 键。
+
+        Raises:
+            ValueError: zim/lang 没有匹配任何已加载的档案。
+        """
+        archives = self.route(prefix, zim, lang)
+        suggestions = self._suggest(prefix, limit, archives)
+        if not suggestions and archives is not None and not (zim or lang):
+            suggestions = self._suggest(prefix, limit, None)
+        return suggestions
+
+    def _suggest(self, prefix: str, limit: int, archives: Optional[List[str]]) -> List[Dict]:
+        if self._process_backend:
+            return self._process_backend.suggest(prefix, limit, archives)
+        with self._use_searcher() as searcher:
+            return searcher.suggest(prefix, limit, archives)
+
+    def _archive_set_signature(self) -> str:
+        """已加载 ZIM 文件集合的指纹，集合变化后旧的 cursor 会失效。"""
+        digest = hashlib.sha1()
+        searcher = self._searcher
+        for path, archive_uuid in zip(searcher.list_open_zims(), searcher.archive_uuids):
+            digest.update(f"{path}|{archive_uuid};".encode("utf-8"))
+        return digest.hexdigest()[:16]
+
+    def _encode_cursor(self, query: str, offset: int, archives: Optional[List[str]] = None) -> str:
+        payload = {"q": query, "o": offset, "s": self._archive_set_signature()}
+        if archives is not None:
+            # 翻页时沿用第一页的路由结果
+            payload["r"] = archives
+        raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    def _decode_cursor(self, cursor: str, query: str) -> Tuple[int, Optional[List[str]]]:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            cursor_query, offset, signature = payload["q"], int(payload["o"]), payload["s"]
+            archives = payload.get("r")
+        except Exception as e:
+            raise ValueError(f"Invalid cursor: {e}") from e
+        if cursor_query != query:
+            raise ValueError("Cursor does not belong to this query.")
+        if signature != self._archive_set_signature():
+            raise ValueError("Cursor is stale: the loaded ZIM files have changed.")
+        return offset, archives
+
     # --- 元数据获取 ---
     def get_metadata(self) -> List[Dict]:
         """
-        获取所有已加载 ZIM 文件的元数据。
+        获取所有已加载 ZIM 文件的元数据（档案打开时收集并缓存，档案集合变化时随之更新）。
 
         Returns:
-            list[dict]: 每个 ZIM 文件的元数据字典组成的列表。
+            list[dict]: 每个 ZIM 文件的元数据字典组成的列表，包含条目数、UUID、文件大小、主入口、
+                        Title/Language/Date/Counter 元数据以及是否有全文索引。
         """
-        # 复用 ZIMSearcher 中的逻辑或直接调用其方法
-        # 这里直接调用 ZIMSearcher 的方法
+        with self._use_searcher() as searcher:
+            return searcher.archive_metadata()
+
+    def cache_stats(self) -> Dict[str, Dict]:
+        """
+        获取缓存的命中/未命中计数及容量。
+
+        Returns:
+            dict: 以缓存名称为键的统计信息。
+        """
+        searcher = self._searcher
+        return {
+            "query_cache": searcher.query_cache.stats(),
+            # 只统计当前打开的档案，不会因此打开档案
+            "searcher_pools": {
+                os.path.basename(path): pool.stats()
+                for path, pool in searcher.archives.open_pools()
+            },
+            "archives": searcher.archives.stats(),
+            "title_filters": searcher.title_filter_stats(),
+            "search_flights": self._search_flights.stats(),
+        }
+
+    def warmup(self, queries: Optional[List[str]] = None) -> Dict:
+        """
+        预热所有已加载的档案：预读索引区域、执行预热查询、读取标题索引；
+        使用 "process" 后端时同时启动并预热全部工作进程。完成后标记为就绪。
+
+        Args:
+            queries (list[str], optional): 预热查询，默认使用配置中的 WIKI_WARMUP_QUERIES。
+
+        Returns:
+            dict: 预热统计信息，包含 'archives', 'queries', 'readahead_bytes', 'seconds'。
+        """
+        if queries is None:
+            queries = [q.strip() for q in config.WIKI_WARMUP_QUERIES.split(",") if q.strip()]
+        started = time.monotonic()
         try:
-            # 假设 ZIMSearcher 有一个方法可以返回类似信息
-            # 如果没有，可以像之前那样重新打开文件读取
-            # 为了简单，我们调用一个可能存在的方法
-            # 如果 ZIMSearcher 没有 list_open_zims_info，我们需要调整
-            open_paths = self._searcher.list_open_zims()
-            
-            # 由于 ZIMSearcher 没有直接暴露 Archive 对象来获取详细元数据，
-            # 我们需要一种方式。这里提供一个基础实现：
-            # （理想情况下，ZIMSearcher 应该提供更丰富的信息获取方法）
-            metadata_list = []
-            
-            for path in open_paths:
-                try:
-                    archive = Archive(path)
-                    metadata = {
-                        'path': path,
-                        'filename': os.path.basename(path),
-                        'article_count': getattr(archive, 'article_count', 'N/A'),
-                        'uuid': str(getattr(archive, 'uuid', 'unknown')),
-                    }
-                    # 尝试获取主入口
-                    try:
-                        if archive.main_entry:
-                            metadata['main_path'] = archive.main_entry.get_item().path
-                    except Exception:
-                         pass
-                    metadata_list.append(metadata)
-                except Exception as e:
-                     metadata_list.append({'path': path, 'error': f"Failed to read metadata: {e}"})
-            return metadata_list
-        except Exception as e:
-            return [{'error': f"Failed to get ZIM list from searcher: {e}"}]
+            with self._use_searcher() as searcher:
+                report = searcher.warmup(queries, config.WIKI_WARMUP_READAHEAD_BYTES)
+            if self._process_backend:
+                self._process_backend.warmup(queries)
+            report["seconds"] = round(time.monotonic() - started, 3)
+            self.warmup_report = report
+            print(f"Warmup finished in {report['seconds']}s: {report}")
+            return report
+        finally:
+            # 预热失败时仍然标记为就绪，以冷缓存提供服务
+            self._ready.set()
+
+    def start_warmup(self) -> Optional[threading.Thread]:
+        """
+        在后台线程中执行 warmup()。已经就绪（预热完成或未启用预热）时不做任何事。
+
+        Returns:
+            threading.Thread or None: 执行预热的线程。
+        """
+        if self._ready.is_set():
+            return None
+        thread = threading.Thread(target=self.warmup, name="zim-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def is_ready(self) -> bool:
+        """是否已就绪（预热完成或未启用预热）。"""
+        return self._ready.is_set()
 
     def list_zim_files(self) -> List[str]:
         """
@@ -185,7 +587,7 @@ class WikiSearchAPI:
     # --- 管理 ZIM 文件 ---
     def add_zim(self, zim_path: str) -> bool:
         """
-        添加一个新的 ZIM 文件到搜索范围。
+        添加一个新的 ZIM 文件到搜索范围（通过 reload() 切换到包含该文件的新档案集合）。
 
         Args:
             zim_path (str): ZIM 文件路径。
@@ -196,14 +598,17 @@ class WikiSearchAPI:
         if not os.path.exists(zim_path):
              print(f"Error: ZIM file not found: {zim_path}")
              return False
-        # 更新内部路径列表和 searcher
-        if zim_path not in self.zim_paths:
-            self.zim_paths.append(zim_path)
-        return self._searcher.add_zim(zim_path)
+        with self._reload_lock:
+            zim_paths = self._searcher.list_open_zims()
+            if zim_path in zim_paths:
+                print(f"ZIM file '{zim_path}' is already added.")
+                return True
+            report = self.reload(zim_paths + [zim_path], warm=False)
+        return zim_path in report["zim_files"]
 
     def remove_zim(self, zim_path: str) -> bool:
         """
-        从搜索范围中移除一个 ZIM 文件。
+        从搜索范围中移除一个 ZIM 文件（通过 reload() 切换到不含该文件的新档案集合）。
 
         Args:
             zim_path (str): ZIM 文件路径。
@@ -211,14 +616,98 @@ class WikiSearchAPI:
         Returns:
             bool: 是否成功移除。
         """
-        # 更新内部路径列表和 searcher
-        if zim_path in self.zim_paths:
-            self.zim_paths.remove(zim_path)
-        return self._searcher.remove_zim(zim_path)
+        with self._reload_lock:
+            zim_paths = self._searcher.list_open_zims()
+            if zim_path not in zim_paths:
+                print(f"ZIM file '{zim_path}' is not in the list.")
+                return False
+            report = self.reload([p for p in zim_paths if p != zim_path], warm=False)
+        return zim_path not in report["zim_files"]
+
+    def reload(self, zim_paths: Optional[List[str]] = None, warm: bool = True) -> Dict:
+        """
+        热重载：打开新的档案集合并原子地替换当前集合，不中断正在进行的请求。
+
+        新集合在调用线程中构建：与当前集合共享的档案直接复用（连同前缀索引和查询缓存），只打开新增的档案，
+        需要时先预热，然后一次性替换。已开始的请求在旧集合上完成，最后一个请求结束后关闭旧集合中不再使用的档案。
+        "process" 后端的工作进程按新集合重启。
+
+        Args:
+            zim_paths (list[str], optional): 新集合的 ZIM 文件路径。未提供时重新扫描加载时的目录，
+                                             不是从目录加载时保留仍然存在的文件。
+            warm (bool): 替换前是否预热新集合（仅在有新增或被替换的文件时进行）。
+
+        Returns:
+            dict: 包含 'changed', 'added', 'removed', 'replaced', 'zim_files', 'seconds' 的统计信息。
+        """
+        with self._reload_lock:
+            started = time.monotonic()
+            if zim_paths is None:
+                zim_paths = find_zim_files(self.zim_dir) if self.zim_dir else [p for p in self.zim_paths if os.path.exists(p)]
+            current = self._searcher
+            current_paths = current.list_open_zims()
+            added = [p for p in zim_paths if p not in current_paths]
+            removed = [p for p in current_paths if p not in zim_paths]
+            # 同名文件被新版本覆盖时 UUID 会变化
+            replaced = []
+            for path, archive_uuid in zip(current_paths, current.archive_uuids):
+                if path in zim_paths:
+                    try:
+                        if read_zim_uuid(path) != archive_uuid:
+                            replaced.append(path)
+                    except (OSError, ValueError):
+                        replaced.append(path)
+
+            report = {"changed": bool(added or removed or replaced), "added": added, "removed": removed, "replaced": replaced}
+            if not report["changed"]:
+                report.update(zim_files=current_paths, seconds=round(time.monotonic() - started, 3))
+                return report
+
+            successor = current.derive(zim_paths)
+            if warm and (added or replaced):
+                queries = [q.strip() for q in config.WIKI_WARMUP_QUERIES.split(",") if q.strip()]
+                successor.warmup(queries, config.WIKI_WARMUP_READAHEAD_BYTES)
+
+            with self._swap_lock:
+                retired, self._generation = self._generation, _SearcherGeneration(successor)
+                retired.successor = successor
+                drained = self._take_drained(retired)
+            self.zim_paths = successor.list_open_zims()
+            if drained:
+                self._release(retired)
+            if self._process_backend:
+                self._process_backend.restart(self.zim_paths)
+
+            report.update(zim_files=self.zim_paths, seconds=round(time.monotonic() - started, 3))
+            print(f"Reloaded ZIM files in {report['seconds']}s: {report}")
+            return report
+
+    def start_watcher(self, interval: Optional[float] = None) -> Optional[ZimDirectoryWatcher]:
+        """
+        启动后台线程，定期扫描加载时的目录，文件变化并稳定后调用 reload()。
+        不是从目录加载、interval 不大于 0 或已经启动时不做任何事。
+
+        Args:
+            interval (float, optional): 扫描间隔秒数，默认使用配置中的 WIKI_RELOAD_INTERVAL。
+
+        Returns:
+            ZimDirectoryWatcher or None: 目录监视器。
+        """
+        interval = config.WIKI_RELOAD_INTERVAL if interval is None else interval
+        if not self.zim_dir or interval <= 0 or self._watcher is not None:
+            return None
+        self._watcher = ZimDirectoryWatcher(self.zim_dir, self.reload, interval)
+        self._watcher.start()
+        return self._watcher
     # --- 管理方法结束 ---
 
     def close(self) -> None:
-        """关闭所有 ZIM 档案。"""
+        """停止目录监视，关闭进程池和所有 ZIM 档案。"""
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+        if self._process_backend:
+            self._process_backend.shutdown()
         self._searcher.close_all()
 
     # --- 关于 HTML 内容的处理 ---
@@ -0,0 +1,171 @@
+import os
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from wikisearch.api import WikiSearchAPI
+from wikisearch.config import config
+from wikisearch.deadline import Deadline
+from wikisearch.singleflight import AsyncSingleFlight
+from wikisearch.tools.tools import (cached_markdown, convert_markdown, find_article, locate_article,
+                                    markdown_chunks, read_article, request_deadline)
+from wikisearch.zim.records import ArticleContent
+
+# 迭代结束的标记，next() 在线程池中执行时用它代替 StopIteration
+_DONE = object()
+
+
+class _BoundedPool:
+    """固定线程数的执行池，记录进行中（执行或排队）的任务数。"""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"wiki-{name}")
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        with self._lock:
+            self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"workers": self.workers, "pending": self.pending, "completed": self.completed}
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+class AsyncWikiSearchAPI:
+    """
+    WikiSearchAPI 的异步封装：所有阻塞操作都在有界线程池中执行，事件循环只负责调度，
+    慢查询或大文章的转换不会阻塞其他连接和就绪检查。
+
+    三个线程池相互隔离，一类工作排满时不影响其他类：
+    - search：全文搜索、标题查找、标题建议（libzim/Xapian）
+    - io：读取条目内容、热重载
+    - cpu：HTML 到 Markdown 的转换
+
+    由多个阶段组成的操作（search_html、search_markdown 等）按阶段依次交给对应的线程池，
+    只有 Markdown 转换占用 cpu 线程池。单阶段的工作通过 run_search / run_io / run_cpu 执行。
+    同步的 WikiSearchAPI 通过 api 属性访问，只读取内存状态的方法（如 cache_stats、is_ready）
+    可以直接在事件循环中调用。
+    """
+
+    def __init__(self, api: WikiSearchAPI, search_workers: Optional[int] = None,
+                 io_workers: Optional[int] = None, cpu_workers: Optional[int] = None):
+        """
+        初始化 AsyncWikiSearchAPI。
+
+        Args:
+            api (WikiSearchAPI): 被封装的同步 API。
+            search_workers (int, optional): search 线程池大小，默认 WIKI_ASYNC_SEARCH_WORKERS。
+            io_workers (int, optional): io 线程池大小，默认 WIKI_ASYNC_IO_WORKERS。
+            cpu_workers (int, optional): cpu 线程池大小，默认 WIKI_ASYNC_CPU_WORKERS（0 表示 CPU 核数）。
+        """
+        self.api = api
+        self._search = _BoundedPool("search", search_workers or config.WIKI_ASYNC_SEARCH_WORKERS)
+        self._io = _BoundedPool("io", io_workers or config.WIKI_ASYNC_IO_WORKERS)
+        self._cpu = _BoundedPool("cpu", cpu_workers or config.WIKI_ASYNC_CPU_WORKERS or os.cpu_count() or 1)
+        self._pools = {"search": self._search, "io": self._io, "cpu": self._cpu}
+        # 合并同时到达的相同 Markdown 转换
+        self.markdown_flights = AsyncSingleFlight(config.WIKI_SINGLE_FLIGHT)
+
+    async def run_search(self, fn: Callable, *args, **kwargs) -> Any:
+        """在 search 线程池中执行 fn(*args, **kwargs)。"""
+        return await self._search.run(fn, *args, **kwargs)
+
+    async def run_io(self, fn: Callable, *args, **kwargs) -> Any:
+        """在 io 线程池中执行 fn(*args, **kwargs)。"""
+        return await self._io.run(fn, *args, **kwargs)
+
+    async def run_cpu(self, fn: Callable, *args, **kwargs) -> Any:
+        """在 cpu 线程池中执行 fn(*args, **kwargs)。"""
+        return await self._cpu.run(fn, *args, **kwargs)
+
+    async def iterate(self, iterator: Iterator, pool: str = "cpu") -> AsyncIterator:
+        """
+        逐项在指定线程池中推进同步迭代器（如按章节转换的 Markdown 流），供 StreamingResponse 使用。
+        调用方停止迭代（如客户端断开）后不再推进。
+        """
+        executor = self._pools[pool]
+        while True:
+            item = await executor.run(next, iterator, _DONE)
+            if item is _DONE:
+                return
+            yield item
+
+    async def search_html(self, query: str, index: int = 0, timeout_ms: Optional[int] = None,
+                          zim: Optional[str] = None, lang: Optional[str] = None) -> ArticleContent:
+        """搜索并读取文章的原始 HTML（见 search_html_content）：定位在 search 线程池，读取在 io 线程池。"""
+        deadline = request_deadline(timeout_ms)
+        archive_uuid, path, match = await self._search.run(locate_article, self.api, query, index, deadline, zim, lang)
+        return await self._io.run(read_article, self.api, archive_uuid, path, match)
+
+    async def article_html(self, key: str, by: str = "path", archive: Optional[str] = None) -> ArticleContent:
+        """按路径或标题读取条目的原始 HTML（见 article_html_content）：查找在 search 线程池，读取在 io 线程池。"""
+        archive_uuid, path, match = await self._search.run(find_article, self.api, key, by, archive)
+        return await self._io.run(read_article, self.api, archive_uuid, path, match)
+
+    async def search_markdown(self, query: str, index: int = 0, timeout_ms: Optional[int] = None,
+                              zim: Optional[str] = None, lang: Optional[str] = None) -> ArticleContent:
+        """搜索并转换为 Markdown（见 search_markdown_content）：定位在 search 线程池，之后见 _markdown。"""
+        deadline = request_deadline(timeout_ms)
+        archive_uuid, path, match = await self._search.run(locate_article, self.api, query, index, deadline, zim, lang)
+        return await self._markdown(archive_uuid, path, match, deadline, timeout_ms)
+
+    async def article_markdown(self, key: str, by: str = "path", archive: Optional[str] = None,
+                               timeout_ms: Optional[int] = None) -> ArticleContent:
+        """按路径或标题读取条目并转换为 Markdown（见 article_markdown_content）：查找在 search 线程池，之后见 _markdown。"""
+        deadline = request_deadline(timeout_ms)
+        archive_uuid, path, match = await self._search.run(find_article, self.api, key, by, archive)
+        return await self._markdown(archive_uuid, path, match, deadline, timeout_ms)
+
+    async def stream_markdown(self, query: str, index: int = 0, timeout_ms: Optional[int] = None,
+                              zim: Optional[str] = None, lang: Optional[str] = None) -> Dict[str, Any]:
+        """
+        搜索并返回分块的 Markdown（见 stream_markdown_content）：定位在 search 线程池，读取在 io 线程池，
+        chunks 由调用方通过 iterate 在 cpu 线程池中逐段转换。
+        """
+        deadline = request_deadline(timeout_ms)
+        archive_uuid, path, match = await self._search.run(locate_article, self.api, query, index, deadline, zim, lang)
+        return await self._io.run(markdown_chunks, self.api, archive_uuid, path, match, deadline)
+
+    async def _markdown(self, archive_uuid: str, path: str, match: Optional[str], deadline: Optional[Deadline],
+                        timeout_ms: Optional[int]) -> ArticleContent:
+        """
+        已定位条目的 Markdown：查缓存和读取在 io 线程池，只有转换在 cpu 线程池。
+        同一条目的并发请求只转换一次，等待者在事件循环中等待，不占用线程。
+        """
+        async def produce() -> ArticleContent:
+            cached = await self._io.run(cached_markdown, archive_uuid, path, match)
+            if cached is not None:
+                return cached
+            article = await self._io.run(read_article, self.api, archive_uuid, path, match)
+            return await self._cpu.run(convert_markdown, self.api, article, deadline)
+
+        return await self.markdown_flights.do((archive_uuid, path, match, timeout_ms), produce)
+
+    async def reload(self, zim_paths: Optional[List[str]] = None, warm: bool = True) -> Dict:
+        """异步执行 WikiSearchAPI.reload（打开并预热新档案可能需要较长时间）。"""
+        return await self._io.run(self.api.reload, zim_paths, warm)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """返回各线程池的线程数、进行中的任务数和已完成的任务数。"""
+        return {name: pool.stats() for name, pool in self._pools.items()}
+
+    def close(self) -> None:
+        """关闭线程池（取消排队的任务，等待执行中的任务）并关闭被封装的 WikiSearchAPI。"""
+        for pool in self._pools.values():
+            pool.shutdown()
+        self.api.close()
@@ -20,6 +20,67 @@ class Config:
     WIKI_SERVER_PORT: int = int(os.getenv("WIKI_SERVER_PORT", 8088))
     MCP_SERVER_HOST: str = os.getenv("MCP_SERVER_HOST", "127.0.0.1")
     MCP_SERVER_PORT: int = int(os.getenv("MCP_SERVER_PORT", 8089))
+    # 多 ZIM 并行搜索的线程数，0 表示使用 ThreadPoolExecutor 的默认值
+    WIKI_SEARCH_WORKERS: int = int(os.getenv("WIKI_SEARCH_WORKERS", 0))
+    # 全文搜索前是否先把查询当作标题/路径精确查找
+    WIKI_TITLE_FAST_PATH: bool = os.getenv("WIKI_TITLE_FAST_PATH", "true").lower() == "true"
+    # 每个档案最多创建的搜索句柄 (共享同一个 Archive 的 Searcher) 数量，即同一档案上可并发执行的查询数
+    WIKI_SEARCHERS_PER_ARCHIVE: int = int(os.getenv("WIKI_SEARCHERS_PER_ARCHIVE", "4"))
+    # 执行后端："thread" 在服务进程中执行，"process" 把全文搜索、标题建议和 Markdown 转换交给进程池
+    WIKI_BACKEND: str = os.getenv("WIKI_BACKEND", "thread").lower()
+    # "process" 后端的工作进程数，0 表示使用 CPU 核数
+    WIKI_PROCESS_WORKERS: int = int(os.getenv("WIKI_PROCESS_WORKERS", "0"))
+    # 请求未指定 timeout_ms 时的默认截止时间（毫秒），0 表示不限时
+    WIKI_DEFAULT_TIMEOUT_MS: int = int(os.getenv("WIKI_DEFAULT_TIMEOUT_MS", "0"))
+    # 启动预热：是否启用、预热查询 (逗号分隔)、每个 ZIM 文件头部和尾部各自预读的字节数
+    WIKI_WARMUP: bool = os.getenv("WIKI_WARMUP", "false").lower() == "true"
+    WIKI_WARMUP_QUERIES: str = os.getenv("WIKI_WARMUP_QUERIES", "Wikipedia")
+    WIKI_WARMUP_READAHEAD_BYTES: int = int(os.getenv("WIKI_WARMUP_READAHEAD_BYTES", str(64 * 1024 * 1024)))
+    # 同时保持打开的 ZIM 档案数量上限，超过时关闭最久未使用的档案；0 表示不限制（加载时全部打开）
+    WIKI_MAX_OPEN_ARCHIVES: int = int(os.getenv("WIKI_MAX_OPEN_ARCHIVES", "0"))
+    # 轮询 ZIM 目录的间隔秒数，目录中的文件变化并稳定后自动热重载；0 表示不监视
+    WIKI_RELOAD_INTERVAL: float = float(os.getenv("WIKI_RELOAD_INTERVAL", "0"))
+    # 管理接口 (/admin/reload) 的访问令牌，通过 X-Admin-Token 请求头传递；为空时不校验
+    WIKI_ADMIN_TOKEN: str = os.getenv("WIKI_ADMIN_TOKEN", "")
+    # 批量搜索 (/search/batch) 并行执行的线程数
+    WIKI_BATCH_WORKERS: int = int(os.getenv("WIKI_BATCH_WORKERS", "8"))
+    # 单个批量搜索请求最多包含的项数
+    WIKI_BATCH_MAX_ITEMS: int = int(os.getenv("WIKI_BATCH_MAX_ITEMS", "100"))
+    # 是否合并同时到达的相同请求（搜索与 Markdown 转换只执行一次，结果共享给所有请求）
+    WIKI_SINGLE_FLIGHT: bool = os.getenv("WIKI_SINGLE_FLIGHT", "true").lower() == "true"
+    # 是否按查询的书写系统（汉字、假名、西里尔字母等）只搜索语言匹配的档案（依据档案元数据 Language）
+    WIKI_LANGUAGE_ROUTING: bool = os.getenv("WIKI_LANGUAGE_ROUTING", "true").lower() == "true"
+    # 精确标题查找前是否先用每个档案的标题 Bloom 过滤器 (sidecar 文件) 跳过一定不包含该标题的档案
+    WIKI_TITLE_FILTER: bool = os.getenv("WIKI_TITLE_FILTER", "false").lower() == "true"
+    # 标题过滤器中每个标题占用的位数，越大误判率越低 (10 位约 1%)
+    WIKI_TITLE_FILTER_BITS: int = int(os.getenv("WIKI_TITLE_FILTER_BITS", "10"))
+    # AsyncWikiSearchAPI（服务使用）的线程池大小：全文搜索/标题查找、读取条目内容、Markdown 转换 (0 表示 CPU 核数)
+    WIKI_ASYNC_SEARCH_WORKERS: int = int(os.getenv("WIKI_ASYNC_SEARCH_WORKERS", "8"))
+    WIKI_ASYNC_IO_WORKERS: int = int(os.getenv("WIKI_ASYNC_IO_WORKERS", "16"))
+    WIKI_ASYNC_CPU_WORKERS: int = int(os.getenv("WIKI_ASYNC_CPU_WORKERS", "0"))
+    # 是否合并多个档案中的同一篇文章，以及重复时选择档案的规则 (按顺序比较：newest 日期较新、pic 含图版本)
+    WIKI_DEDUP: bool = os.getenv("WIKI_DEDUP", "true").lower() == "true"
+    WIKI_ARCHIVE_PREFERENCE: str = os.getenv("WIKI_ARCHIVE_PREFERENCE", "newest,pic")
+    # 标题建议是否使用预构建的前缀索引 (sidecar 文件)；否则使用 libzim 的 SuggestionSearcher
+    WIKI_PREFIX_INDEX: bool = os.getenv("WIKI_PREFIX_INDEX", "false").lower() == "true"
+    # 索引 sidecar 文件目录，为空时保存在 ZIM 文件旁
+    WIKI_INDEX_DIR: str = os.getenv("WIKI_INDEX_DIR", "")
+    # 生成命中片段时最多扫描的文章 HTML 字节数
+    WIKI_SNIPPET_SCAN_BYTES: int = int(os.getenv("WIKI_SNIPPET_SCAN_BYTES", 64 * 1024))
+    # 流式响应的分块大小 (字节)
+    WIKI_STREAM_CHUNK_SIZE: int = int(os.getenv("WIKI_STREAM_CHUNK_SIZE", 64 * 1024))
+    # 查询结果缓存：最大条目数 (0 表示禁用)、内存上限 (字节)、TTL (秒)
+    WIKI_QUERY_CACHE_SIZE: int = int(os.getenv("WIKI_QUERY_CACHE_SIZE", 1024))
+    WIKI_QUERY_CACHE_MAX_BYTES: int = int(os.getenv("WIKI_QUERY_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    WIKI_QUERY_CACHE_TTL: float = float(os.getenv("WIKI_QUERY_CACHE_TTL", 600))
+    # 渲染结果 (HTML/Markdown) 缓存：总字节预算 (0 表示禁用)、冷区压缩算法 (zlib/zstd/none)、热区比例
+    WIKI_CONTENT_CACHE_MAX_BYTES: int = int(os.getenv("WIKI_CONTENT_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+    WIKI_CONTENT_CACHE_COMPRESSION: str = os.getenv("WIKI_CONTENT_CACHE_COMPRESSION", "zlib").lower()
+    WIKI_CONTENT_CACHE_HOT_FRACTION: float = float(os.getenv("WIKI_CONTENT_CACHE_HOT_FRACTION", 0.25))
+    # 持久化渲染结果缓存 (sqlite3 WAL，进程重启和多个工作进程间共享)：数据库路径 (空表示禁用)、压缩后的总字节上限、保存的输出格式 (逗号分隔，markdown/html)
+    WIKI_DISK_CACHE_PATH: str = os.getenv("WIKI_DISK_CACHE_PATH", "")
+    WIKI_DISK_CACHE_MAX_BYTES: int = int(os.getenv("WIKI_DISK_CACHE_MAX_BYTES", 1024 * 1024 * 1024))
+    WIKI_DISK_CACHE_FORMATS: str = os.getenv("WIKI_DISK_CACHE_FORMATS", "markdown")
 
     # ZIM_CACHE_DIR= os.getenv("ZIM_CACHE_DIR", "")
     # @classmethod
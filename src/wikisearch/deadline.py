@@ -0,0 +1,40 @@
+import time
+from typing import Optional
+
+
+class Deadline:
+    """
+    请求的截止时间（基于 time.monotonic）。
+
+    搜索、读取和转换在各阶段之间检查 expired()，超时后主动停止剩余工作，返回已完成的部分结果。
+    libzim 的单次查询本身无法中断，因此截止时间是协作式的：正在执行的单个步骤会完成，之后的步骤被放弃。
+    """
+
+    __slots__ = ("expires_at",)
+
+    def __init__(self, timeout_seconds: float):
+        self.expires_at = time.monotonic() + max(0.0, timeout_seconds)
+
+    @classmethod
+    def from_timeout_ms(cls, timeout_ms: Optional[int]) -> Optional["Deadline"]:
+        """根据毫秒数创建截止时间；timeout_ms 为空或不大于 0 时表示不限时，返回 None。"""
+        if not timeout_ms or timeout_ms <= 0:
+            return None
+        return cls(timeout_ms / 1000.0)
+
+    def remaining(self) -> float:
+        """剩余秒数，已超时时为 0。"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+
+def expired(deadline: Optional[Deadline]) -> bool:
+    """deadline 为 None（不限时）时总是返回 False。"""
+    return deadline is not None and deadline.expired()
+
+
+def remaining(deadline: Optional[Deadline]) -> Optional[float]:
+    """剩余秒数；deadline 为 None 时返回 None，可直接作为 future.result 的 timeout。"""
+    return None if deadline is None else deadline.remaining()
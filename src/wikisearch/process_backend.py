@@ -0,0 +1,218 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple, Union
+
+from wikisearch.config import config
+from wikisearch.zim.zim_searcher import ZIMSearcher
+from wikisearch.zim.records import SearchHit
+from wikisearch.tools.convert_html import content_to_markdown, entry_to_markdown
+from wikisearch.deadline import Deadline
+
+# 工作进程内的搜索器，在进程启动时打开一次，之后所有任务共用
+_worker_searcher: Optional[ZIMSearcher] = None
+# 进程池的全部工作进程都启动并预热后才放行的屏障（见 ProcessBackend.warmup）
+_worker_started = None
+
+
+def _init_worker(zim_paths: List[str], search_workers: Optional[int], warmup_queries: List[str], started) -> None:
+    global _worker_searcher, _worker_started
+    # 每个任务只在一个工作进程中执行，多个档案由进程内的线程池并行搜索（与 "thread" 后端相同）
+    _worker_searcher = ZIMSearcher(zim_paths, max_workers=search_workers)
+    _worker_started = started
+    if warmup_queries:
+        # 每个进程启动时恰好预热一次；页缓存由服务进程统一预读，工作进程只需预热自己的 libzim/Xapian 缓存
+        try:
+            _worker_searcher.warmup(warmup_queries)
+        except Exception as e:
+            print(f"Worker warmup failed: {e}")
+
+
+def _worker_deadline(timeout_seconds: Optional[float]) -> Optional[Deadline]:
+    # 截止时间以剩余秒数传给工作进程，在进程内重新计时
+    return None if timeout_seconds is None else Deadline(timeout_seconds)
+
+
+def _worker_locate(query: str, result_index: int, archives: Optional[List[str]], timeout_seconds: Optional[float]):
+    return _worker_searcher.locate(search_term=query, result_index=result_index,
+                                   deadline=_worker_deadline(timeout_seconds), archives=archives)
+
+
+def _worker_search_hits(query: str, offset: int, limit: int, snippets: bool, archives: Optional[List[str]],
+                        timeout_seconds: Optional[float]):
+    return _worker_searcher.search_hits(query, offset, limit, snippets=snippets,
+                                        deadline=_worker_deadline(timeout_seconds), archives=archives)
+
+
+def _worker_suggest(prefix: str, limit: int, archives: Optional[List[str]], timeout_seconds: Optional[float]):
+    return _worker_searcher.suggest(prefix, limit, archives)
+
+
+def _worker_wait_started(timeout_seconds: Optional[float]):
+    # 进程在初始化（含预热）完成后才执行任务；每个进程同时只执行一个任务，
+    # 因此全部 workers 个任务通过屏障时，进程池的每个进程都已启动并预热
+    _worker_started.wait(timeout_seconds)
+    return os.getpid()
+
+
+def _worker_markdown(archive_uuid: str, path: str, timeout_seconds: Optional[float]):
+    return entry_to_markdown(_worker_searcher, archive_uuid, path, _worker_deadline(timeout_seconds))
+
+
+def _worker_convert_markdown(title: str, content: bytes, mimetype: Optional[str], timeout_seconds: Optional[float]):
+    return content_to_markdown(content, title, mimetype, _worker_deadline(timeout_seconds))
+
+
+def in_worker_process() -> bool:
+    """当前是否运行在某个进程池的工作进程中（工作进程内不再创建嵌套的进程池）。"""
+    return multiprocessing.parent_process() is not None
+
+
+class ProcessBackend:
+    """
+    进程池执行后端：在长期运行的工作进程中执行全文搜索、标题建议和 Markdown 转换，绕开 GIL。
+
+    每个工作进程启动时打开一次全部 ZIM 文件（mmap 的页面通过操作系统页缓存在进程间共享），
+    任务只传递查询参数，返回路径、命中记录或 Markdown 字符串等紧凑结果。
+    一次搜索在单个工作进程中完成，进程内用 search_workers 个线程并行搜索各档案并归并排名；
+    进程间并行的是不同的请求。
+    进程池在第一次调用时才创建；ZIM 文件集合变化时通过 restart 用新的集合重建。
+    所有方法都是线程安全的。
+    """
+
+    # 等待工作进程返回时，在截止时间之外额外允许的秒数（用于传输结果）
+    RESULT_GRACE_SECONDS = 0.05
+    # warmup 等待全部工作进程启动并预热的最长秒数
+    WARMUP_TIMEOUT_SECONDS = 600
+
+    def __init__(self, zim_paths: List[str], max_workers: Optional[int] = None, search_workers: Optional[int] = None):
+        """
+        初始化 ProcessBackend。
+
+        Args:
+            zim_paths (list[str]): 工作进程需要打开的 ZIM 文件路径。
+            max_workers (int, optional): 工作进程数量，默认使用 CPU 核数。
+            search_workers (int, optional): 每个工作进程内多档案并行搜索的线程数，默认使用配置中的 WIKI_SEARCH_WORKERS。
+        """
+        self.zim_paths = list(zim_paths)
+        self.max_workers = max_workers
+        self.workers = max_workers or os.cpu_count() or 1
+        self.search_workers = search_workers or config.WIKI_SEARCH_WORKERS or None
+        # 工作进程启动时执行的预热查询，由 warmup 设置
+        self.warmup_queries: List[str] = []
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn 避免在已有线程的服务进程中 fork
+                context = multiprocessing.get_context("spawn")
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=context,
+                    initializer=_init_worker,
+                    initargs=(self.zim_paths, self.search_workers, self.warmup_queries, context.Barrier(self.workers)),
+                )
+            return self._executor
+
+    def _call(self, fn, *args, deadline: Optional[Deadline] = None):
+        """
+        在工作进程中执行 fn，截止时间以剩余秒数作为最后一个参数传入。
+
+        Raises:
+            TimeoutError: 截止时间内没有得到结果（例如所有工作进程都在忙）。
+        """
+        timeout = None if deadline is None else deadline.remaining()
+        executor = self._get_executor()
+        try:
+            future = executor.submit(fn, *args, timeout)
+        except BrokenProcessPool:
+            # 工作进程异常退出时重建进程池
+            print("Process pool is broken, restarting workers...")
+            self._reset(executor)
+            future = self._get_executor().submit(fn, *args, timeout)
+        try:
+            return future.result(timeout=None if timeout is None else timeout + self.RESULT_GRACE_SECONDS)
+        except FutureTimeoutError:
+            # 尚未开始的任务直接取消；已开始的任务在工作进程内按同一截止时间自行停止
+            future.cancel()
+            raise TimeoutError("Deadline exceeded while waiting for a worker process.")
+        except BrokenProcessPool:
+            self._reset(executor)
+            raise
+
+    def _reset(self, executor: Optional[ProcessPoolExecutor] = None) -> None:
+        with self._lock:
+            if executor is None or self._executor is executor:
+                old, self._executor = self._executor, None
+            else:
+                old = None
+        if old is not None:
+            old.shutdown(wait=False)
+
+    def locate(self, query: str, result_index: int = 0, deadline: Optional[Deadline] = None,
+               archives: Optional[List[str]] = None) -> Tuple[bool, Optional[str], Optional[str], Optional[str], Optional[str]]:
+        """在工作进程中执行 ZIMSearcher.locate。"""
+        return self._call(_worker_locate, query, result_index, archives, deadline=deadline)
+
+    def search_hits(self, query: str, offset: int, limit: int, snippets: bool = False,
+                    deadline: Optional[Deadline] = None, archives: Optional[List[str]] = None) -> Tuple[List[SearchHit], bool, bool]:
+        """在工作进程中执行 ZIMSearcher.search_hits（SearchHit 经 pickle 传回）；截止时间内没有空闲进程时返回空的部分结果。"""
+        try:
+            return self._call(_worker_search_hits, query, offset, limit, snippets, archives, deadline=deadline)
+        except TimeoutError:
+            return [], True, True
+
+    def suggest(self, prefix: str, limit: int = 10, archives: Optional[List[str]] = None) -> List[Dict]:
+        """在工作进程中执行 ZIMSearcher.suggest。"""
+        return self._call(_worker_suggest, prefix, limit, archives)
+
+    def get_markdown(self, archive_uuid: str, path: str,
+                     deadline: Optional[Deadline] = None) -> Tuple[bool, str, Optional[str], bool, Optional[str]]:
+        """在工作进程中读取条目并转换为 Markdown。"""
+        return self._call(_worker_markdown, archive_uuid, path, deadline=deadline)
+
+    def convert_markdown(self, title: str, content: Union[bytes, memoryview], mimetype: Optional[str] = None,
+                         deadline: Optional[Deadline] = None) -> Tuple[bool, Optional[str], bool, Optional[str]]:
+        """在工作进程中将已读取的 HTML 转换为 Markdown（memoryview 不能序列化，先复制为 bytes）。"""
+        return self._call(_worker_convert_markdown, title, bytes(content), mimetype, deadline=deadline)
+
+    def warmup(self, queries: List[str]) -> int:
+        """
+        启动全部工作进程，每个进程在初始化时执行一次预热查询（之后因 restart 等原因新启动的进程同样如此）。
+        已启动的进程没有按这些查询预热，先重建进程池；然后提交与进程数相同、在屏障处互相等待的任务，
+        迫使进程池启动全部工作进程，并在它们都预热完成后返回。
+
+        Returns:
+            int: 已启动并预热的工作进程数。
+        """
+        with self._lock:
+            self.warmup_queries = list(queries)
+        self._reset()
+        executor = self._get_executor()
+        futures = [executor.submit(_worker_wait_started, self.WARMUP_TIMEOUT_SECONDS) for _ in range(self.workers)]
+        pids = set()
+        for future in futures:
+            try:
+                pids.add(future.result())
+            except Exception as e:
+                print(f"Worker warmup failed: {e}")
+        return len(pids)
+
+    def restart(self, zim_paths: List[str]) -> None:
+        """
+        更换 ZIM 文件集合。已提交的任务在旧进程中执行完毕，之后的任务由按新集合启动的进程执行。
+        """
+        with self._lock:
+            self.zim_paths = list(zim_paths)
+        self._reset()
+
+    def shutdown(self) -> None:
+        """关闭进程池。"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -1,16 +1,22 @@
 # server/fastapiserver.py
 import os
+import json
+from urllib.parse import quote
 from pathlib import Path
-from typing import Optional
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, Field
 
 # FastAPI 相关导入
-from fastapi import FastAPI, Depends, HTTPException, Query
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, Depends, HTTPException, Header, Query
+from fastapi.responses import HTMLResponse, StreamingResponse, JSONResponse
 
 from wikisearch.api import WikiSearchAPI, search_wiki_html
+from wikisearch.async_api import AsyncWikiSearchAPI
 from wikisearch.config import config
 from wikisearch.tools.convert_html import convert_html_to_markdown
-from wikisearch.tools.tools import search_html_content, search_markdown_content, SearchError
+from wikisearch.tools.content_cache import content_cache
+from wikisearch.tools.tools import search_hits_content, suggest_titles_content, iter_batch_results, search_batch_content, markdown_flights, SearchError
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -31,8 +37,8 @@ app = FastAPI(
 # --- 全局状态管理 (使用 lifespan 推荐) ---
 from contextlib import asynccontextmanager
 
-# 全局 WikiSearchAPI 实例
-wiki_api: Optional[WikiSearchAPI] = None
+# 全局 AsyncWikiSearchAPI 实例：阻塞的搜索、读取和转换在其线程池中执行，不占用事件循环
+wiki_api: Optional[AsyncWikiSearchAPI] = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -42,9 +48,14 @@ async def lifespan(app: FastAPI):
     try:
         # 使用环境变量或默认值
         zim_source = ZIM_SOURCE_ENV
-        wiki_api = WikiSearchAPI(zim_source=zim_source) # zim_source 可以是 None, 字符串, 或列表
-        print("WikiSearchAPI initialized successfully.")
-        print(f"Loaded ZIM files: {wiki_api.list_zim_files()}")
+        api = WikiSearchAPI(zim_source=zim_source, backend=config.WIKI_BACKEND) # zim_source 可以是 None, 字符串, 或列表
+        print(f"WikiSearchAPI initialized successfully (backend: {api.backend}).")
+        print(f"Loaded ZIM files: {api.list_zim_files()}")
+        # 预热在后台进行，完成前 /ready 返回 503
+        api.start_warmup()
+        # 启用 WIKI_RELOAD_INTERVAL 时监视 ZIM 目录，新文件稳定后自动热重载
+        api.start_watcher()
+        wiki_api = AsyncWikiSearchAPI(api)
     except Exception as e:
         print(f"Failed to initialize WikiSearchAPI: {e}")
         wiki_api = None # 标记为不可用
@@ -78,7 +89,15 @@ async def read_root():
         "redoc": "/redoc", # ReDoc
         "endpoints": {
             "search_html": "/search/html",
-            "search_markdown": "/search/markdown"
+            "search_markdown": "/search/markdown",
+            "search_markdown_stream": "/search/markdown/stream",
+            "search_hits": "/search/hits",
+            "search_batch": "/search/batch",
+            "article": "/article/{path}",
+            "article_by_title": "/article/by-title/{title}",
+            "suggest": "/suggest",
+            "ready": "/ready",
+            "admin_reload": "/admin/reload"
         }
     }
 
@@ -86,52 +105,281 @@ async def read_root():
 async def search_html(
     query: str = Query(..., description="要搜索的关键词"),
     index: int = Query(0, ge=0, description="结果索引 (从0开始)"),
-    searcher: WikiSearchAPI = Depends(get_wiki_api)
+    timeout_ms: Optional[int] = Query(None, ge=1, description="截止时间 (毫秒)，超时返回部分结果"),
+    zim: Optional[str] = Query(None, description="只搜索这些档案 (逗号分隔的 UUID、文件名或不含扩展名的文件名)"),
+    lang: Optional[str] = Query(None, description="只搜索这些语言的档案 (逗号分隔的语言代码，如 zh 或 eng)"),
+    wiki: AsyncWikiSearchAPI = Depends(get_wiki_api)
 ):
     """
-    根据关键词搜索文章并返回原始 HTML 内容。
+    根据关键词搜索文章并以分块流的形式返回原始 HTML 内容。
     
     - **query**: 搜索关键词 (必需)。
     - **index**: 结果索引 (默认 0，即第一个结果)。
+    - **timeout_ms**: 搜索阶段的截止时间，超时未返回的档案不参与排名。
+    - **zim** / **lang**: 只搜索匹配的档案；都未提供时按查询的书写系统自动选择档案。
     """
     try:
-        result = search_html_content(searcher, query, index)
-        return HTMLResponse(content=result["content"], status_code=200)
+        article = await wiki.search_html(query, index, timeout_ms, zim, lang)
     except SearchError as e:
         raise HTTPException(status_code=e.status_code, detail=e.message)
 
+    # 直接把 ZIM 中的字节分块发送，不解码再编码
+    return StreamingResponse(
+        article.chunks(config.WIKI_STREAM_CHUNK_SIZE),
+        status_code=200,
+        media_type=article.mimetype,
+        headers={"X-Wiki-Match": article.match, "Content-Length": str(article.size)}
+    )
+
 
 @app.get("/search/markdown")
 async def search_markdown(
     query: str = Query(..., description="要搜索的关键词"),
     index: int = Query(0, ge=0, description="结果索引 (从0开始)"),
-    searcher: WikiSearchAPI = Depends(get_wiki_api)
+    timeout_ms: Optional[int] = Query(None, ge=1, description="截止时间 (毫秒)，超时返回部分结果"),
+    zim: Optional[str] = Query(None, description="只搜索这些档案 (逗号分隔的 UUID、文件名或不含扩展名的文件名)"),
+    lang: Optional[str] = Query(None, description="只搜索这些语言的档案 (逗号分隔的语言代码，如 zh 或 eng)"),
+    wiki: AsyncWikiSearchAPI = Depends(get_wiki_api)
 ):
     """
     根据关键词搜索文章，将结果转换为 Markdown 并返回。
     
     - **query**: 搜索关键词 (必需)。
     - **index**: 结果索引 (默认 0，即第一个结果)。
+    - **timeout_ms**: 截止时间，超时后返回已转换的部分 (partial 为 true)。
+    - **zim** / **lang**: 只搜索匹配的档案；都未提供时按查询的书写系统自动选择档案。
+    """
+    try:
+        article = await wiki.search_markdown(query, index, timeout_ms, zim, lang)
+    except SearchError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+    return {"success": True, "query": query, "index": index, **article.to_dict("markdown")}
+
+@app.get("/search/markdown/stream")
+async def search_markdown_stream(
+    query: str = Query(..., description="要搜索的关键词"),
+    index: int = Query(0, ge=0, description="结果索引 (从0开始)"),
+    timeout_ms: Optional[int] = Query(None, ge=1, description="截止时间 (毫秒)，超时返回部分结果"),
+    zim: Optional[str] = Query(None, description="只搜索这些档案 (逗号分隔的 UUID、文件名或不含扩展名的文件名)"),
+    lang: Optional[str] = Query(None, description="只搜索这些语言的档案 (逗号分隔的语言代码，如 zh 或 eng)"),
+    wiki: AsyncWikiSearchAPI = Depends(get_wiki_api)
+):
+    """
+    根据关键词搜索文章，按章节逐段转换为 Markdown 并以流的形式返回。
+    客户端断开后，剩余章节不再转换。
+    
+    - **query**: 搜索关键词 (必需)。
+    - **index**: 结果索引 (默认 0，即第一个结果)。
+    - **timeout_ms**: 截止时间，超时后停止转换，流以 `<!-- partial: deadline exceeded -->` 结尾。
+    - **zim** / **lang**: 只搜索匹配的档案；都未提供时按查询的书写系统自动选择档案。
+    """
+    try:
+        result = await wiki.stream_markdown(query, index, timeout_ms, zim, lang)
+    except SearchError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+
+    # 章节按需在 cpu 线程池中转换
+    return StreamingResponse(
+        wiki.iterate(result["chunks"]),
+        status_code=200,
+        media_type=result["media_type"],
+        headers={"X-Wiki-Match": result["match"]}
+    )
+
+@app.get("/search/hits")
+async def search_hits(
+    query: str = Query(..., description="要搜索的关键词"),
+    offset: int = Query(0, ge=0, description="起始结果索引 (从0开始)"),
+    limit: int = Query(10, ge=1, le=100, description="每页命中数量"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+    snippets: bool = Query(False, description="是否附加高亮查询词的上下文片段"),
+    timeout_ms: Optional[int] = Query(None, ge=1, description="截止时间 (毫秒)，超时返回部分结果"),
+    zim: Optional[str] = Query(None, description="只搜索这些档案 (逗号分隔的 UUID、文件名或不含扩展名的文件名)"),
+    lang: Optional[str] = Query(None, description="只搜索这些语言的档案 (逗号分隔的语言代码，如 zh 或 eng)"),
+    wiki: AsyncWikiSearchAPI = Depends(get_wiki_api)
+):
+    """
+    根据关键词搜索，返回一页命中列表 (档案、路径、标题、大小、MIME 类型)，不读取文章内容。
+
+    - **query**: 搜索关键词 (必需)。
+    - **offset**: 起始结果索引 (默认 0)。
+    - **limit**: 每页命中数量 (默认 10)。
+    - **cursor**: 翻页游标，提供时忽略 offset。
+    - **snippets**: 是否为每个命中附加片段 (需要读取文章开头，默认 false)。
+    - **timeout_ms**: 截止时间，超时后返回已得到的命中 (partial 为 true)。
+    - **zim** / **lang**: 只搜索匹配的档案；都未提供时按查询的书写系统自动选择档案。
     """
     try:
-        result = search_markdown_content(searcher, query, index)
-        return result
+        page = await wiki.run_search(search_hits_content, wiki.api, query, offset, limit, cursor, snippets, timeout_ms, zim, lang)
     except SearchError as e:
         raise HTTPException(status_code=e.status_code, detail=e.message)
+    return {**page, "hits": [hit.to_dict() for hit in page["hits"]]}
+
+class BatchItem(BaseModel):
+    query: str = Field(..., description="要搜索的关键词")
+    index: int = Field(0, ge=0, description="结果索引 (hits 格式下为起始结果索引)")
+    format: Literal["markdown", "html", "hits"] = Field("markdown", description="结果格式")
+    limit: int = Field(10, ge=1, le=100, description="hits 格式下的命中数量")
+    zim: Optional[str] = Field(None, description="只搜索这些档案 (逗号分隔的 UUID 或文件名)")
+    lang: Optional[str] = Field(None, description="只搜索这些语言的档案 (逗号分隔的语言代码)")
+
+
+class BatchRequest(BaseModel):
+    items: List[BatchItem] = Field(..., description="搜索项")
+    timeout_ms: Optional[int] = Field(None, ge=1, description="整批共用的截止时间 (毫秒)")
+    stream: bool = Field(False, description="是否以 NDJSON 按完成顺序流式返回")
+
+
+@app.post("/search/batch")
+async def search_batch(
+    request: BatchRequest,
+    wiki: AsyncWikiSearchAPI = Depends(get_wiki_api)
+):
+    """
+    在一次请求中执行多个搜索。完全相同的项只执行一次，其余项并行执行。
+
+    - **items**: 搜索项列表，每项包含 query、index、format (markdown/html/hits)，hits 格式可指定 limit，
+      可选的 zim / lang 限定该项搜索的档案。
+    - **timeout_ms**: 整批共用的截止时间。
+    - **stream**: 为 false 时等待全部完成，按 items 顺序返回 `results`；
+      为 true 时以 NDJSON (每行一个结果，`item` 为其在 items 中的下标) 按完成顺序返回。
+    """
+    items = [item.model_dump() for item in request.items]
+    try:
+        if not request.stream:
+            return await wiki.run_search(search_batch_content, wiki.api, items, request.timeout_ms)
+        results = await wiki.run_search(iter_batch_results, wiki.api, items, request.timeout_ms)
+    except SearchError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+
+    lines = (json.dumps(result, ensure_ascii=False).encode("utf-8") + b"\n" for result in results)
+    return StreamingResponse(wiki.iterate(lines, pool="search"), status_code=200, media_type="application/x-ndjson")
+
+async def _article_response(key: str, by: str, output_format: str, archive: Optional[str], timeout_ms: Optional[int],
+                            wiki: AsyncWikiSearchAPI):
+    try:
+        if output_format == "markdown":
+            article = await wiki.article_markdown(key, by, archive, timeout_ms)
+            return {"success": True, **article.to_dict("markdown")}
+        article = await wiki.article_html(key, by, archive)
+    except SearchError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+
+    return StreamingResponse(
+        article.chunks(config.WIKI_STREAM_CHUNK_SIZE),
+        status_code=200,
+        media_type=article.mimetype,
+        headers={
+            "X-Wiki-Match": article.match,
+            "X-Wiki-Archive": article.archive_uuid,
+            # 跟随重定向后的路径，可能包含非 ASCII 字符
+            "X-Wiki-Path": quote(article.path),
+            "Content-Length": str(article.size),
+        }
+    )
+
+@app.get("/article/by-title/{title:path}")
+async def get_article_by_title(
+    title: str,
+    format: Literal["html", "markdown"] = Query("html", description="返回格式"),
+    archive: Optional[str] = Query(None, description="只在该档案中查找 (UUID、文件名或不含扩展名的文件名)"),
+    timeout_ms: Optional[int] = Query(None, ge=1, description="Markdown 转换的截止时间 (毫秒)"),
+    wiki: AsyncWikiSearchAPI = Depends(get_wiki_api)
+):
+    """
+    按标题直接读取文章 (不经过全文搜索)，跟随重定向。
+
+    - **title**: 条目标题 (必需)。
+    - **format**: `html` 返回原始内容流，`markdown` 返回包含 Markdown 的 JSON。
+    - **archive**: 可选的档案选择器，未指定时按档案优先级返回第一个命中。
+    """
+    return await _article_response(title, "title", format, archive, timeout_ms, wiki)
+
+@app.get("/article/{path:path}")
+async def get_article(
+    path: str,
+    format: Literal["html", "markdown"] = Query("html", description="返回格式"),
+    archive: Optional[str] = Query(None, description="只在该档案中查找 (UUID、文件名或不含扩展名的文件名)"),
+    timeout_ms: Optional[int] = Query(None, ge=1, description="Markdown 转换的截止时间 (毫秒)"),
+    wiki: AsyncWikiSearchAPI = Depends(get_wiki_api)
+):
+    """
+    按条目路径直接读取文章 (不经过全文搜索)，跟随重定向。可用于打开先前结果中的链接。
+
+    - **path**: 条目路径 (必需)，例如 `Python_(programming_language)`。
+    - **format**: `html` 返回原始内容流，`markdown` 返回包含 Markdown 的 JSON。
+    - **archive**: 可选的档案选择器，未指定时按档案优先级返回第一个命中。
+    """
+    return await _article_response(path, "path", format, archive, timeout_ms, wiki)
+
+@app.get("/suggest")
+async def suggest(
+    q: str = Query(..., description="标题前缀"),
+    limit: int = Query(10, ge=1, le=100, description="最多返回的建议数量"),
+    zim: Optional[str] = Query(None, description="只搜索这些档案 (逗号分隔的 UUID、文件名或不含扩展名的文件名)"),
+    lang: Optional[str] = Query(None, description="只搜索这些语言的档案 (逗号分隔的语言代码，如 zh 或 eng)"),
+    wiki: AsyncWikiSearchAPI = Depends(get_wiki_api)
+):
+    """
+    根据标题前缀返回标题建议 (合并所有已加载的 ZIM 文件)。
+
+    - **q**: 标题前缀 (必需)。
+    - **limit**: 最多返回的建议数量 (默认 10)。
+    - **zim** / **lang**: 只搜索匹配的档案；都未提供时按查询的书写系统自动选择档案。
+    """
+    try:
+        return await wiki.run_search(suggest_titles_content, wiki.api, q, limit, zim, lang)
+    except SearchError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+
 @app.get("/metadata")
-async def get_metadata(searcher: WikiSearchAPI = Depends(get_wiki_api)):
+async def get_metadata(wiki: AsyncWikiSearchAPI = Depends(get_wiki_api)):
     """
     获取已加载 ZIM 文件的元数据。
     """
-    metadata = searcher.get_metadata()
-    return metadata
+    # 元数据在档案打开时已缓存，不读取 ZIM 文件
+    return wiki.api.get_metadata()
+
+@app.get("/cache/stats")
+async def get_cache_stats(wiki: AsyncWikiSearchAPI = Depends(get_wiki_api)):
+    """
+    获取缓存的命中/未命中计数及容量。
+    """
+    return {**wiki.api.cache_stats(), "content_cache": content_cache.stats(), "markdown_flights": markdown_flights.stats(),
+            "async_markdown_flights": wiki.markdown_flights.stats(),
+            "executors": wiki.stats()}
+
+@app.get("/ready")
+async def ready():
+    """
+    就绪检查：WikiSearchAPI 初始化且预热完成后返回 200，否则返回 503，供负载均衡器判断是否转发流量。
+    """
+    if wiki_api is None or not wiki_api.api.is_ready():
+        return JSONResponse(status_code=503, content={"ready": False})
+    return {"ready": True, "warmup": wiki_api.api.warmup_report}
+
+@app.post("/admin/reload")
+async def admin_reload(
+    x_admin_token: Optional[str] = Header(None, description="管理令牌 (配置了 WIKI_ADMIN_TOKEN 时必需)"),
+    wiki: AsyncWikiSearchAPI = Depends(get_wiki_api)
+):
+    """
+    热重载：重新扫描 ZIM 目录，在后台打开并预热新增的文件后原子地切换档案集合。
+    进行中的请求在旧集合上完成，旧档案在这些请求结束后关闭。
+    """
+    if config.WIKI_ADMIN_TOKEN and x_admin_token != config.WIKI_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="无效的管理令牌。")
+    try:
+        return await wiki.reload()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"重载失败: {e}")
 
 @app.get("/zim-files")
-async def list_zim_files(searcher: WikiSearchAPI = Depends(get_wiki_api)):
+async def list_zim_files(wiki: AsyncWikiSearchAPI = Depends(get_wiki_api)):
     """
     列出当前加载的 ZIM 文件路径。
     """
-    files = searcher.list_zim_files()
+    files = wiki.api.list_zim_files()
     return {"zim_files": files}
 
 # --- 运行入口 ---
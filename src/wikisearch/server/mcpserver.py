@@ -22,13 +22,15 @@ from mcp.server.sse import SseServerTransport
 from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
 from starlette.applications import Starlette
 from starlette.requests import Request
+from starlette.responses import JSONResponse
 from starlette.routing import Mount, Route
 from starlette.types import Receive, Scope, Send
 
 from wikisearch.api import WikiSearchAPI, search_wiki_html
+from wikisearch.async_api import AsyncWikiSearchAPI
 from wikisearch.config import config
 from wikisearch.tools.convert_html import convert_html_to_markdown
-from wikisearch.tools.tools import search_html_content, search_markdown_content, SearchError
+from wikisearch.tools.tools import search_hits_content, suggest_titles_content, search_batch_content, SearchError
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -38,7 +40,8 @@ MCP_SERVER_PORT = int(os.getenv("MCP_SERVER_PORT", 8089))
 
 mcp = FastMCP(name="WIKI Search MCP Server")
 
-wiki_api: Optional[WikiSearchAPI] = None
+# 阻塞的搜索、读取和转换在 AsyncWikiSearchAPI 的线程池中执行，不占用事件循环
+wiki_api: Optional[AsyncWikiSearchAPI] = None
 def get_wiki_api():
     if wiki_api is None:
         raise BaseException("WikiSearchAPI 未初始化或初始化失败。")
@@ -49,9 +52,14 @@ try:
         global wiki_api
         try:
             zim_source = WIKI_DOWNLOAD_DIR if WIKI_DOWNLOAD_DIR else None
-            wiki_api = WikiSearchAPI(zim_source=zim_source)
-            print("WikiSearchAPI initialized successfully.")
-            print(f"Loaded ZIM files: {wiki_api.list_zim_files()}")
+            api = WikiSearchAPI(zim_source=zim_source, backend=config.WIKI_BACKEND)
+            print(f"WikiSearchAPI initialized successfully (backend: {api.backend}).")
+            print(f"Loaded ZIM files: {api.list_zim_files()}")
+            # 预热在后台进行，完成前 /ready 返回 503
+            api.start_warmup()
+            # 启用 WIKI_RELOAD_INTERVAL 时监视 ZIM 目录，新文件稳定后自动热重载
+            api.start_watcher()
+            wiki_api = AsyncWikiSearchAPI(api)
             return True
         except Exception as e:
             print(f"Failed to initialize WikiSearchAPI: {e}")
@@ -70,9 +78,13 @@ except ImportError as e:
     description="""
     Search Wikipedia articles from ZIM files and return HTML content.
     This tool searches for articles matching the query and returns the raw HTML content.
+    timeout_ms optionally bounds the search; archives that do not answer in time are skipped.
+    zim (comma-separated archive UUIDs or file names) or lang (e.g. "zh", "eng") restricts the archives searched;
+    otherwise archives are chosen from the script of the query.
     """
 )
-async def search_wiki_html(query: str, index: int = 0) -> Dict[str, Any]:
+async def search_wiki_html(query: str, index: int = 0, timeout_ms: Optional[int] = None,
+                           zim: Optional[str] = None, lang: Optional[str] = None) -> Dict[str, Any]:
     """搜索维基百科并返回HTML内容"""
     if wiki_api is None:
         return {
@@ -81,15 +93,12 @@ async def search_wiki_html(query: str, index: int = 0) -> Dict[str, Any]:
         }
     
     try:
-        result = search_html_content(wiki_api, query, index)
+        article = await wiki_api.search_html(query, index, timeout_ms, zim, lang)
+        # 解码 HTML 在 cpu 线程池中进行
+        result = await wiki_api.run_cpu(article.to_dict, "content")
         return {
             "status": "success",
-            "result": {
-                "title": result["title"],
-                "content": result["content"],
-                "query": query,
-                "index": index
-            }
+            "result": {**result, "query": query, "index": index}
         }
     except SearchError as e:
         status = "not found" if e.status_code == 404 else "error"
@@ -108,9 +117,13 @@ async def search_wiki_html(query: str, index: int = 0) -> Dict[str, Any]:
     description="""
     Search Wikipedia articles from ZIM files and return Markdown content.
     This tool searches for articles, converts HTML to Markdown, and returns the formatted content.
+    With timeout_ms, conversion stops at the deadline and the truncated Markdown is returned with partial=true.
+    zim (comma-separated archive UUIDs or file names) or lang (e.g. "zh", "eng") restricts the archives searched;
+    otherwise archives are chosen from the script of the query.
     """
 )
-async def search_wiki_markdown(query: str, index: int = 0) -> Dict[str, Any]:
+async def search_wiki_markdown(query: str, index: int = 0, timeout_ms: Optional[int] = None,
+                               zim: Optional[str] = None, lang: Optional[str] = None) -> Dict[str, Any]:
     """搜索维基百科并返回Markdown内容"""
     if wiki_api is None:
         return {
@@ -119,14 +132,54 @@ async def search_wiki_markdown(query: str, index: int = 0) -> Dict[str, Any]:
         }
     
     try:
-        result = search_markdown_content(wiki_api, query, index)
+        article = await wiki_api.search_markdown(query, index, timeout_ms, zim, lang)
+        return {
+            "status": "success",
+            "result": {**article.to_dict("markdown"), "query": query, "index": index}
+        }
+    except SearchError as e:
+        status = "not found" if e.status_code == 404 else "error"
+        return {
+            "status": status,
+            "message": e.message
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"搜索过程中发生错误: {str(e)}"
+        }
+
+@mcp.tool(
+    name="search_wiki_hits",
+    description="""
+    Search Wikipedia articles from ZIM files and return a page of lightweight hits (limit 1-100, default 10).
+    Each hit has the archive, path, title, size and mimetype; no article content is fetched.
+    Set snippets=true to add a short excerpt with the query terms highlighted to each hit.
+    Pass the returned next_cursor back as cursor to get the next page.
+    With timeout_ms, the hits found before the deadline are returned with partial=true.
+    zim (comma-separated archive UUIDs or file names) or lang (e.g. "zh", "eng") restricts the archives searched;
+    otherwise archives are chosen from the script of the query.
+    """
+)
+async def search_wiki_hits(query: str, offset: int = 0, limit: int = 10, cursor: Optional[str] = None, snippets: bool = False,
+                           timeout_ms: Optional[int] = None, zim: Optional[str] = None, lang: Optional[str] = None) -> Dict[str, Any]:
+    """搜索维基百科并返回命中列表"""
+    if wiki_api is None:
+        return {
+            "status": "error",
+            "message": "WikiSearchAPI 未初始化或初始化失败"
+        }
+
+    try:
+        result = await wiki_api.run_search(search_hits_content, wiki_api.api, query, offset, limit, cursor, snippets, timeout_ms, zim, lang)
         return {
             "status": "success",
             "result": {
-                "title": result["title"],
-                "markdown": result["markdown"],
                 "query": query,
-                "index": index
+                "offset": result["offset"],
+                "hits": [hit.to_dict() for hit in result["hits"]],
+                "next_cursor": result["next_cursor"],
+                "partial": result["partial"]
             }
         }
     except SearchError as e:
@@ -141,6 +194,140 @@ async def search_wiki_markdown(query: str, index: int = 0) -> Dict[str, Any]:
             "message": f"搜索过程中发生错误: {str(e)}"
         }
 
+@mcp.tool(
+    name="search_wiki_batch",
+    description="""
+    Run many Wikipedia searches from ZIM files in one call.
+    items is a list of objects with query, optional index (default 0), optional format
+    ("markdown" (default), "html" or "hits"), for hits optional limit (default 10), and optional zim / lang
+    to restrict the archives searched for that item.
+    Identical items are searched once; the rest run in parallel. Results are returned in the order of items,
+    each with its own status. timeout_ms optionally bounds the whole batch.
+    """
+)
+async def search_wiki_batch(items: List[Dict[str, Any]], timeout_ms: Optional[int] = None) -> Dict[str, Any]:
+    """在一次调用中执行多个搜索"""
+    if wiki_api is None:
+        return {
+            "status": "error",
+            "message": "WikiSearchAPI 未初始化或初始化失败"
+        }
+
+    try:
+        result = await wiki_api.run_search(search_batch_content, wiki_api.api, items, timeout_ms)
+        return {
+            "status": "success",
+            "result": {
+                "results": result["results"]
+            }
+        }
+    except SearchError as e:
+        return {
+            "status": "error",
+            "message": e.message
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"搜索过程中发生错误: {str(e)}"
+        }
+
+async def _get_article(key: str, by: str, archive: Optional[str], format: str, timeout_ms: Optional[int]) -> Dict[str, Any]:
+    if wiki_api is None:
+        return {
+            "status": "error",
+            "message": "WikiSearchAPI 未初始化或初始化失败"
+        }
+
+    try:
+        if format == "html":
+            article = await wiki_api.article_html(key, by, archive)
+            # 解码 HTML 在 cpu 线程池中进行
+            return {
+                "status": "success",
+                "result": await wiki_api.run_cpu(article.to_dict, "content")
+            }
+        article = await wiki_api.article_markdown(key, by, archive, timeout_ms)
+        return {
+            "status": "success",
+            "result": article.to_dict("markdown")
+        }
+    except SearchError as e:
+        status = "not found" if e.status_code == 404 else "error"
+        return {
+            "status": status,
+            "message": e.message
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"读取文章时发生错误: {str(e)}"
+        }
+
+@mcp.tool(
+    name="get_wiki_article",
+    description="""
+    Fetch a Wikipedia article from ZIM files by its exact entry path (for example a link from a previous result),
+    without running a search. Redirects are followed; the returned path is the final entry.
+    format is "markdown" (default) or "html". archive optionally restricts the lookup to one ZIM file
+    (UUID, file name or file name without .zim).
+    """
+)
+async def get_wiki_article(path: str, archive: Optional[str] = None, format: str = "markdown",
+                           timeout_ms: Optional[int] = None) -> Dict[str, Any]:
+    """按条目路径读取文章"""
+    return await _get_article(path, "path", archive, format, timeout_ms)
+
+@mcp.tool(
+    name="get_wiki_article_by_title",
+    description="""
+    Fetch a Wikipedia article from ZIM files by its exact title, without running a search.
+    Redirects are followed. format is "markdown" (default) or "html".
+    archive optionally restricts the lookup to one ZIM file (UUID, file name or file name without .zim).
+    """
+)
+async def get_wiki_article_by_title(title: str, archive: Optional[str] = None, format: str = "markdown",
+                                    timeout_ms: Optional[int] = None) -> Dict[str, Any]:
+    """按标题读取文章"""
+    return await _get_article(title, "title", archive, format, timeout_ms)
+
+@mcp.tool(
+    name="suggest_titles",
+    description="""
+    Suggest Wikipedia article titles from ZIM files that start with the given prefix (limit 1-100, default 10).
+    Useful for autocompletion or for finding the exact title before fetching an article.
+    zim (comma-separated archive UUIDs or file names) or lang (e.g. "zh", "eng") restricts the archives searched;
+    otherwise archives are chosen from the script of the query.
+    """
+)
+async def suggest_titles(prefix: str, limit: int = 10, zim: Optional[str] = None, lang: Optional[str] = None) -> Dict[str, Any]:
+    """根据前缀返回标题建议"""
+    if wiki_api is None:
+        return {
+            "status": "error",
+            "message": "WikiSearchAPI 未初始化或初始化失败"
+        }
+
+    try:
+        result = await wiki_api.run_search(suggest_titles_content, wiki_api.api, prefix, limit, zim, lang)
+        return {
+            "status": "success",
+            "result": {
+                "prefix": prefix,
+                "suggestions": result["suggestions"]
+            }
+        }
+    except SearchError as e:
+        return {
+            "status": "error",
+            "message": e.message
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"搜索过程中发生错误: {str(e)}"
+        }
+
 
 # --- 创建 Starlette 应用  ---
 def create_starlette_app(mcp_server: Server, *, debug: bool = False) -> Starlette:
@@ -164,6 +351,23 @@ def create_starlette_app(mcp_server: Server, *, debug: bool = False) -> Starlett
                 mcp_server.create_initialization_options(),
             )
 
+    async def handle_ready(request: Request) -> JSONResponse:
+        # 就绪检查：初始化且预热完成后返回 200
+        if wiki_api is None or not wiki_api.api.is_ready():
+            return JSONResponse({"ready": False}, status_code=503)
+        return JSONResponse({"ready": True, "warmup": wiki_api.api.warmup_report})
+
+    async def handle_admin_reload(request: Request) -> JSONResponse:
+        # 热重载：重新扫描 ZIM 目录并原子地切换档案集合
+        if config.WIKI_ADMIN_TOKEN and request.headers.get("x-admin-token") != config.WIKI_ADMIN_TOKEN:
+            return JSONResponse({"error": "无效的管理令牌。"}, status_code=403)
+        if wiki_api is None:
+            return JSONResponse({"error": "WikiSearchAPI 未初始化或初始化失败。"}, status_code=503)
+        try:
+            return JSONResponse(await wiki_api.reload())
+        except Exception as e:
+            return JSONResponse({"error": f"重载失败: {e}"}, status_code=500)
+
     async def handle_streamable_http(
         scope: Scope, receive: Receive, send: Send
     ) -> None:
@@ -183,6 +387,8 @@ def create_starlette_app(mcp_server: Server, *, debug: bool = False) -> Starlett
         debug=debug,
         routes=[
             Route("/sse", endpoint=handle_sse),
+            Route("/ready", endpoint=handle_ready),
+            Route("/admin/reload", endpoint=handle_admin_reload, methods=["POST"]),
             Mount("/mcp", app=handle_streamable_http),
             Mount("/messages/", app=sse.handle_post_message),
         ],
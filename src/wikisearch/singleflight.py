@@ -0,0 +1,138 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    """一次进行中的计算，等待者通过 done 获得其结果或异常。"""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    请求合并：同一个键的计算在进行中时，后到的相同请求不再重复计算，而是等待并共享这次计算的结果（或异常）。
+    计算完成后立即移除该键，之后的请求重新计算（结果缓存由各自的缓存层负责）。
+
+    共享的结果是同一个对象，调用方不应修改它；需要修改时先复制。所有方法都是线程安全的。
+    """
+
+    def __init__(self, enabled: bool = True):
+        """
+        初始化 SingleFlight。
+
+        Args:
+            enabled (bool): 为 False 时每个请求都独立计算，只统计次数。
+        """
+        self.enabled = enabled
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        执行 fn 并返回其结果；同一个 key 已有计算在进行时，等待并返回那次计算的结果。
+
+        Raises:
+            Exception: fn 抛出的异常，会同时抛给所有等待同一计算的请求。
+        """
+        with self._lock:
+            call = self._calls.get(key) if self.enabled else None
+            if call is not None:
+                self.coalesced += 1
+            else:
+                self.executions += 1
+                leader = _Call()
+                if self.enabled:
+                    self._calls[key] = leader
+
+        if call is not None:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            leader.result = fn()
+            return leader.result
+        except BaseException as e:
+            leader.error = e
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is leader:
+                    del self._calls[key]
+            leader.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        """返回执行次数、被合并的请求数、失败次数和当前进行中的计算数。"""
+        with self._lock:
+            return {
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+                "in_flight": len(self._calls),
+            }
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight 的 asyncio 版本：后到的相同请求在事件循环中等待共享的计算，不占用线程池中的线程。
+    只能在同一个事件循环中使用，方法不是线程安全的。
+    """
+
+    def __init__(self, enabled: bool = True):
+        """
+        初始化 AsyncSingleFlight。
+
+        Args:
+            enabled (bool): 为 False 时每个请求都独立计算，只统计次数。
+        """
+        self.enabled = enabled
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        等待 fn() 并返回其结果；同一个 key 已有计算在进行时，等待并返回那次计算的结果。
+        某个等待者被取消（如客户端断开）时不取消共享的计算。
+
+        Raises:
+            Exception: fn() 抛出的异常，会同时抛给所有等待同一计算的请求。
+        """
+        task = self._calls.get(key) if self.enabled else None
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            if self.enabled:
+                self._calls[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    def stats(self) -> Dict[str, int]:
+        """返回执行次数、被合并的请求数、失败次数和当前进行中的计算数。"""
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "in_flight": len(self._calls),
+        }
@@ -0,0 +1,484 @@
+import os
+import time
+import zlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
+
+from wikisearch.config import config
+from wikisearch.tools.convert_html import CONVERTER_VERSION
+
+try:
+    import zstandard
+except ImportError:  # zstd 是可选依赖，缺失时回退到 zlib
+    zstandard = None
+
+# (档案 UUID, 条目路径, 输出格式)
+ContentKey = Tuple[str, str, str]
+
+# 各输出格式在持久化缓存键中的版本：HTML 是 ZIM 中的原始字节，Markdown 取决于转换器
+FORMAT_VERSIONS: Dict[str, str] = {"html": "raw", "markdown": CONVERTER_VERSION}
+
+
+def _compress(compression: str, data: bytes) -> bytes:
+    if compression == "zstd":
+        return zstandard.ZstdCompressor().compress(data)
+    if compression == "zlib":
+        return zlib.compress(data, 6)
+    return data
+
+
+def _decompress(compression: str, packed: bytes) -> bytes:
+    if compression == "zstd":
+        return zstandard.ZstdDecompressor().decompress(packed)
+    if compression == "zlib":
+        return zlib.decompress(packed)
+    return packed
+
+
+def _check_compression(compression: str) -> str:
+    if compression == "zstd" and zstandard is None:
+        print("Warning: zstandard is not installed, falling back to zlib for content cache compression.")
+        compression = "zlib"
+    if compression not in ("zlib", "zstd", "none"):
+        raise ValueError(f"Unsupported content cache compression: {compression}")
+    return compression
+
+
+# 持久化缓存的表结构；总字节数和条目数由触发器维护，多个进程写入时也保持一致
+_DISK_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS content (
+        id INTEGER PRIMARY KEY,
+        archive_uuid TEXT NOT NULL,
+        path TEXT NOT NULL,
+        version TEXT NOT NULL,
+        profile TEXT NOT NULL,
+        title TEXT NOT NULL,
+        media_type TEXT NOT NULL,
+        compression TEXT NOT NULL,
+        data BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        accessed REAL NOT NULL,
+        UNIQUE (archive_uuid, path, version, profile)
+    )""",
+    "CREATE INDEX IF NOT EXISTS content_accessed ON content (accessed)",
+    "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO meta VALUES ('bytes', 0), ('entries', 0)",
+    """CREATE TRIGGER IF NOT EXISTS content_insert AFTER INSERT ON content BEGIN
+        UPDATE meta SET value = value + NEW.size WHERE name = 'bytes';
+        UPDATE meta SET value = value + 1 WHERE name = 'entries';
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS content_delete AFTER DELETE ON content BEGIN
+        UPDATE meta SET value = value - OLD.size WHERE name = 'bytes';
+        UPDATE meta SET value = value - 1 WHERE name = 'entries';
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS content_update AFTER UPDATE OF size ON content BEGIN
+        UPDATE meta SET value = value + NEW.size - OLD.size WHERE name = 'bytes';
+    END""",
+)
+
+
+class DiskContentCache:
+    """
+    持久化的渲染结果缓存：(档案 UUID, 条目路径, 转换器版本, 输出格式) -> (标题, 压缩的内容字节, MIME 类型)。
+
+    保存在 sqlite3 数据库中（WAL 模式），进程重启后仍然有效，多个工作进程可以同时读取同一个文件，
+    写入由 sqlite 的锁串行化。键中包含档案 UUID 和转换器版本，档案替换或转换器升级后旧条目不再命中，
+    按最近访问时间被淘汰。内容的总字节数（压缩后）超过 max_bytes 时，淘汰最久未访问的条目直到低于上限的 90%；
+    访问时间按 touch_interval 粗粒度更新，避免每次读取都写数据库。
+    数据库错误（如磁盘已满、锁等待超时）只打印警告并视为未命中，不影响请求。每个线程使用自己的连接，所有方法都是线程安全的。
+    """
+
+    SCHEMA_VERSION = 1
+
+    def __init__(self, path: str, max_bytes: int = 1024 * 1024 * 1024, compression: str = "zlib",
+                 formats: Tuple[str, ...] = ("markdown",), touch_interval: float = 60.0, timeout: float = 5.0):
+        """
+        初始化 DiskContentCache，数据库不存在时创建。
+
+        Args:
+            path (str): sqlite3 数据库文件路径。
+            max_bytes (int): 内容的总字节上限（压缩后）。
+            compression (str): 压缩算法，"zlib"、"zstd" 或 "none"。
+            formats (tuple): 保存的输出格式（"markdown"、"html"），其他格式的写入被忽略。
+            touch_interval (float): 同一条目两次更新访问时间的最小间隔 (秒)。
+            timeout (float): 等待其他进程释放写锁的时间 (秒)。
+
+        Raises:
+            sqlite3.Error: 数据库无法打开或创建时抛出。
+        """
+        unknown = [output_format for output_format in formats if output_format not in FORMAT_VERSIONS]
+        if unknown:
+            raise ValueError(f"Unsupported disk cache formats: {unknown}")
+        self.path = path
+        self.max_bytes = max_bytes
+        self.compression = _check_compression(compression)
+        self.versions = {output_format: FORMAT_VERSIONS[output_format] for output_format in formats}
+        self.touch_interval = touch_interval
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.errors = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._create_schema(self._connection())
+
+    def _connection(self) -> sqlite3.Connection:
+        # 连接不能跨线程，也不能在 fork 出的子进程中继续使用
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("PRAGMA user_version").fetchone()[0] not in (0, self.SCHEMA_VERSION):
+                # 旧格式的缓存直接丢弃
+                conn.execute("DROP TABLE IF EXISTS content")
+                conn.execute("DROP TABLE IF EXISTS meta")
+            for statement in _DISK_SCHEMA:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+    def get(self, archive_uuid: str, path: str, output_format: str) -> Optional[Tuple[str, bytes, str]]:
+        """
+        读取保存的渲染结果，不访问 ZIM 文件，也不进行转换。
+
+        Returns:
+            tuple or None: (标题, 内容字节, MIME 类型)，未命中、格式未保存或读取失败时返回 None。
+        """
+        version = self.versions.get(output_format)
+        if version is None:
+            return None
+        try:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT id, title, media_type, compression, data, accessed FROM content "
+                "WHERE archive_uuid = ? AND path = ? AND version = ? AND profile = ?",
+                (archive_uuid, path, version, output_format),
+            ).fetchone()
+            if row is None:
+                with self._lock:
+                    self.misses += 1
+                return None
+            row_id, title, media_type, compression, packed, accessed = row
+            data = _decompress(compression, packed)
+            now = time.time()
+            if now - accessed > self.touch_interval:
+                # 写锁被其他进程占用时立即跳过（不等待 busy timeout），访问时间只影响淘汰顺序
+                conn.execute("PRAGMA busy_timeout = 0")
+                try:
+                    conn.execute("UPDATE content SET accessed = ? WHERE id = ?", (now, row_id))
+                except sqlite3.OperationalError:
+                    pass
+                finally:
+                    conn.execute(f"PRAGMA busy_timeout = {int(self.timeout * 1000)}")
+        except Exception as e:
+            self._error("read", e)
+            return None
+        with self._lock:
+            self.hits += 1
+        return title, data, media_type
+
+    def put(self, archive_uuid: str, path: str, output_format: str, title: str, data: bytes, media_type: str) -> None:
+        """压缩并写入一个渲染结果，必要时淘汰最久未访问的条目。格式未保存或超过总上限的条目不写入。"""
+        version = self.versions.get(output_format)
+        if version is None:
+            return
+        packed = _compress(self.compression, data)
+        if len(packed) > self.max_bytes:
+            return
+        try:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT INTO content (archive_uuid, path, version, profile, title, media_type, compression, data, size, accessed) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (archive_uuid, path, version, profile) DO UPDATE SET "
+                    "title = excluded.title, media_type = excluded.media_type, compression = excluded.compression, "
+                    "data = excluded.data, size = excluded.size, accessed = excluded.accessed",
+                    (archive_uuid, path, version, output_format, title, media_type, self.compression, packed, len(packed), time.time()),
+                )
+                evicted = self._evict(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            self._error("write", e)
+            return
+        with self._lock:
+            self.writes += 1
+            self.evictions += evicted
+
+    def _evict(self, conn: sqlite3.Connection) -> int:
+        total = conn.execute("SELECT value FROM meta WHERE name = 'bytes'").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        while total > target:
+            deleted = conn.execute(
+                "DELETE FROM content WHERE id IN (SELECT id FROM content ORDER BY accessed LIMIT 64)"
+            ).rowcount
+            if deleted <= 0:
+                break
+            evicted += deleted
+            total = conn.execute("SELECT value FROM meta WHERE name = 'bytes'").fetchone()[0]
+        return evicted
+
+    def _error(self, operation: str, error: Exception) -> None:
+        with self._lock:
+            self.errors += 1
+        print(f"Warning: disk content cache {operation} failed ('{self.path}'): {error}")
+
+    def clear(self) -> None:
+        """删除所有保存的条目（不重置计数器）。"""
+        try:
+            self._connection().execute("DELETE FROM content")
+        except sqlite3.Error as e:
+            self._error("clear", e)
+
+    def stats(self) -> Dict[str, int]:
+        """返回命中/未命中/写入/淘汰/错误计数，以及数据库中的条目数和内容字节数。"""
+        try:
+            sizes = dict(self._connection().execute("SELECT name, value FROM meta").fetchall())
+        except sqlite3.Error:
+            sizes = {}
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "errors": self.errors,
+                "entries": sizes.get("entries", 0),
+                "bytes": sizes.get("bytes", 0),
+                "max_bytes": self.max_bytes,
+            }
+
+    def close(self) -> None:
+        """关闭所有线程的数据库连接；之后的调用会重新打开连接。"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+
+class ContentCache:
+    """
+    渲染结果缓存：(档案 UUID, 条目路径, 输出格式) -> (标题, 内容字节, MIME 类型)。
+
+    内容始终以字节保存，命中时可直接交给 HTTP 响应，无需再编码。
+    按总字节数限制容量。新写入或刚被读取的条目放在热区，以原始字节保存；
+    热区超出 hot_fraction 比例时，最久未使用的条目被压缩后移入冷区，
+    冷区条目被再次读取时解压并移回热区。总量超出预算时优先淘汰冷区中最久未使用的条目。
+    提供 disk 时作为第二层：内存未命中时读取持久化缓存并放入热区，写入同时保存到持久化缓存。
+    所有方法都是线程安全的。
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, compression: str = "zlib", hot_fraction: float = 0.25,
+                 disk: Optional[DiskContentCache] = None):
+        """
+        初始化 ContentCache。
+
+        Args:
+            max_bytes (int): 内存中的总字节预算，0 表示不在内存中缓存。
+            compression (str): 冷区压缩算法，"zlib"、"zstd" 或 "none"。
+                               "none" 时不区分冷热区，所有条目原样保存。
+            hot_fraction (float): 热区占总预算的比例。
+            disk (DiskContentCache, optional): 进程重启后仍然有效的持久化缓存。
+        """
+        compression = _check_compression(compression)
+
+        self.max_bytes = max_bytes
+        self.compression = compression
+        self.disk = disk
+        self.hot_max_bytes = max_bytes if compression == "none" else int(max_bytes * hot_fraction)
+        # key -> (标题, 数据, MIME 类型)
+        self._hot: "OrderedDict[ContentKey, Tuple[str, bytes, str]]" = OrderedDict()
+        self._cold: "OrderedDict[ContentKey, Tuple[str, bytes, str]]" = OrderedDict()
+        self._hot_bytes = 0
+        self._cold_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 or self.disk is not None
+
+    def get(self, archive_uuid: str, path: str, output_format: str) -> Optional[Tuple[str, bytes, str]]:
+        """
+        查找缓存的渲染结果。
+
+        Returns:
+            tuple or None: (标题, 内容字节, MIME 类型)，未命中时返回 None。
+        """
+        if not self.enabled:
+            return None
+
+        key = (archive_uuid, path, output_format)
+        with self._lock:
+            if key in self._hot:
+                self._hot.move_to_end(key)
+                title, data, media_type = self._hot[key]
+            elif key in self._cold:
+                title, packed, media_type = self._cold.pop(key)
+                self._cold_bytes -= len(packed)
+                data = _decompress(self.compression, packed)
+                self._hot[key] = (title, data, media_type)
+                self._hot_bytes += len(data)
+                self._rebalance()
+            else:
+                self.misses += 1
+                data = None
+            if data is not None:
+                self.hits += 1
+                return title, data, media_type
+
+        if self.disk is None:
+            return None
+        # 持久化缓存命中时直接返回保存的字节，不读取 ZIM 也不转换
+        cached = self.disk.get(archive_uuid, path, output_format)
+        if cached is not None:
+            self._store(key, *cached)
+        return cached
+
+    def put(self, archive_uuid: str, path: str, output_format: str, title: str,
+            content: Union[str, bytes, memoryview], media_type: str) -> None:
+        """
+        写入一个渲染结果。超过总预算的单个条目不会被缓存。
+
+        Args:
+            content (str, bytes or memoryview): 内容；字符串按 UTF-8 编码保存。
+            media_type (str): 内容的 MIME 类型（含 charset）。
+        """
+        if not self.enabled:
+            return
+
+        data = content.encode("utf-8") if isinstance(content, str) else bytes(content)
+        self._store((archive_uuid, path, output_format), title, data, media_type)
+        if self.disk is not None:
+            self.disk.put(archive_uuid, path, output_format, title, data, media_type)
+
+    def _store(self, key: ContentKey, title: str, data: bytes, media_type: str) -> None:
+        # 只写入内存；超过总预算的单个条目不缓存
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            self._discard(key)
+            self._hot[key] = (title, data, media_type)
+            self._hot_bytes += len(data)
+            self._rebalance()
+
+    def invalidate_archive(self, archive_uuid: str) -> int:
+        """
+        移除内存中某个档案的所有缓存条目。持久化缓存的键包含档案 UUID，无需失效，旧条目按访问时间被淘汰。
+
+        Returns:
+            int: 被移除的条目数量。
+        """
+        with self._lock:
+            keys = [key for key in (*self._hot, *self._cold) if key[0] == archive_uuid]
+            for key in keys:
+                self._discard(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        """清空内存中的缓存（不重置计数器，不影响持久化缓存）。"""
+        with self._lock:
+            self._hot.clear()
+            self._cold.clear()
+            self._hot_bytes = 0
+            self._cold_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """返回内存中的命中/未命中计数及当前容量，启用持久化缓存时在 disk 下附带其统计。"""
+        with self._lock:
+            stats = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hot_entries": len(self._hot),
+                "cold_entries": len(self._cold),
+                "bytes": self._hot_bytes + self._cold_bytes,
+                "max_bytes": self.max_bytes,
+            }
+        if self.disk is not None:
+            stats["disk"] = self.disk.stats()
+        return stats
+
+    def _discard(self, key: ContentKey) -> None:
+        if key in self._hot:
+            self._hot_bytes -= len(self._hot.pop(key)[1])
+        elif key in self._cold:
+            self._cold_bytes -= len(self._cold.pop(key)[1])
+
+    def _rebalance(self) -> None:
+        # 热区超限：把最久未使用的条目压缩后移入冷区
+        while self.compression != "none" and self._hot_bytes > self.hot_max_bytes and len(self._hot) > 1:
+            key, (title, data, media_type) = self._hot.popitem(last=False)
+            self._hot_bytes -= len(data)
+            packed = _compress(self.compression, data)
+            self._cold[key] = (title, packed, media_type)
+            self._cold_bytes += len(packed)
+
+        # 总量超限：先淘汰冷区，再淘汰热区
+        while self._hot_bytes + self._cold_bytes > self.max_bytes:
+            if self._cold:
+                _, (_, packed, _) = self._cold.popitem(last=False)
+                self._cold_bytes -= len(packed)
+            else:
+                _, (_, data, _) = self._hot.popitem(last=False)
+                self._hot_bytes -= len(data)
+            self.evictions += 1
+
+
+def _open_disk_cache() -> Optional[DiskContentCache]:
+    """按配置打开持久化缓存；未配置路径或无法打开时返回 None（只使用内存缓存）。"""
+    if not config.WIKI_DISK_CACHE_PATH:
+        return None
+    try:
+        return DiskContentCache(
+            config.WIKI_DISK_CACHE_PATH,
+            max_bytes=config.WIKI_DISK_CACHE_MAX_BYTES,
+            compression=config.WIKI_CONTENT_CACHE_COMPRESSION,
+            formats=tuple(part.strip() for part in config.WIKI_DISK_CACHE_FORMATS.split(",") if part.strip()),
+        )
+    except (sqlite3.Error, OSError, ValueError) as e:
+        print(f"Warning: failed to open disk content cache '{config.WIKI_DISK_CACHE_PATH}', using memory only: {e}")
+        return None
+
+
+# 进程内共享的缓存实例，键中包含档案 UUID，因此可被多个 WikiSearchAPI 实例共用
+content_cache = ContentCache(
+    max_bytes=config.WIKI_CONTENT_CACHE_MAX_BYTES,
+    compression=config.WIKI_CONTENT_CACHE_COMPRESSION,
+    hot_fraction=config.WIKI_CONTENT_CACHE_HOT_FRACTION,
+    disk=_open_disk_cache(),
+)
@@ -1,18 +1,33 @@
 import os
 import io
-from typing import Union, Tuple, Optional
-from markitdown import MarkItDown
+import re
+from typing import Union, Tuple, Optional, Generator
+from markitdown import MarkItDown, StreamInfo
+from wikisearch.zim.zim_searcher import charset_from_mimetype
+from wikisearch.deadline import Deadline
+
+try:
+    from importlib.metadata import version as _package_version
+    _MARKITDOWN_VERSION = _package_version("markitdown")
+except Exception:
+    _MARKITDOWN_VERSION = "unknown"
+
+# 转换器版本：持久化缓存键的一部分，转换逻辑或 markitdown 版本变化后旧的 Markdown 不再命中
+# 2：条目总是按章节分段转换（此前未设置截止时间时整篇转换）
+CONVERTER_VERSION = f"2+markitdown-{_MARKITDOWN_VERSION}"
 
 def convert_html_to_markdown(
-    html_input: Union[str, os.PathLike], 
+    html_input: Union[str, os.PathLike, bytes, memoryview], 
     output_path: Optional[Union[str, os.PathLike]] = None,
-    title: str = ""
+    title: str = "",
+    charset: str = "utf-8"
 ) -> Tuple[bool, Optional[str], Optional[str]]:
     """
-    将 HTML (字符串或文件) 转换为 Markdown (字符串或文件)。
+    将 HTML (字符串、字节或文件) 转换为 Markdown (字符串或文件)。
 
     Args:
-        html_input (str or PathLike): 
+        html_input (str, PathLike, bytes or memoryview): 
+            - 如果是 bytes/memoryview，则视为编码后的 HTML 内容，直接交给 markitdown，不先解码。
             - 如果是有效的文件路径，则从该文件读取 HTML。
             - 否则，将其视为 HTML 内容字符串。
         output_path (str or PathLike, optional): 
@@ -20,6 +35,8 @@ def convert_html_to_markdown(
             - 如果不提供，则只返回 Markdown 字符串。
         title (str, optional): 
             - 输入的标题或描述，用于日志。
+        charset (str, optional): 
+            - bytes/memoryview 输入的字符编码，默认 utf-8。
 
     Returns:
         tuple: (成功标志 (bool), Markdown 内容 (str 或 None), 错误信息 (str 或 None))
@@ -27,29 +44,34 @@ def convert_html_to_markdown(
                - 如果 output_path 已提供：(True, markdown_string, None) 或 (False, None, error_msg)
                  (即使保存到文件，也仍返回字符串，方便后续使用)
     """
-    html_content_str = None
+    html_bytes = None
     markdown_text = None
     input_source_desc = "unknown source"
 
     # --- 1. 获取 HTML 内容 ---
     try:
-        if isinstance(html_input, (str, os.PathLike)):
+        if isinstance(html_input, (bytes, bytearray, memoryview)):
+            html_bytes = html_input
+            input_source_desc = f"提供的字节内容 (标题: '{title}')"
+        elif isinstance(html_input, (str, os.PathLike)):
             input_path_str = os.fspath(html_input) if isinstance(html_input, os.PathLike) else html_input
             
             # 检查 html_input 是否是一个存在的文件路径
             if os.path.isfile(input_path_str):
                 print(f"正在从文件 '{input_path_str}' 读取 HTML...")
-                with open(input_path_str, 'r', encoding='utf-8') as f:
-                    html_content_str = f.read()
+                with open(input_path_str, 'rb') as f:
+                    html_bytes = f.read()
                 input_source_desc = f"文件 '{input_path_str}'"
             else:
                 # 否则，将其视为 HTML 字符串内容
-                html_content_str = input_path_str
+                html_bytes = input_path_str.encode('utf-8')
                 input_source_desc = f"提供的字符串内容 (标题: '{title}')"
+            charset = "utf-8"
         else:
-            return False, None, f"无效的 html_input 类型: {type(html_input)}。期望 str 或 PathLike。"
+            return False, None, f"无效的 html_input 类型: {type(html_input)}。期望 str、bytes 或 PathLike。"
 
-        if not html_content_str or not html_content_str.strip():
+        # 用正则查找非空白字符，避免为判空复制整个缓冲区
+        if not html_bytes or re.search(rb'\S', html_bytes) is None:
             return False, None, f"HTML 内容为空或只包含空白字符 (来源: {input_source_desc})。"
 
     except FileNotFoundError:
@@ -61,10 +83,10 @@ def convert_html_to_markdown(
     try:
         print(f"正在使用 markitdown 转换 {input_source_desc} 为 Markdown...")
         md_converter = MarkItDown()
-        html_bytes = html_content_str.encode('utf-8')
         html_stream = io.BytesIO(html_bytes)
-        # MarkItDown.convert 可以接受 str 或文件路径
-        md_result = md_converter.convert(html_stream) 
+        # 显式声明类型和编码，markitdown 无需再猜测
+        stream_info = StreamInfo(mimetype="text/html", extension=".html", charset=charset)
+        md_result = md_converter.convert(html_stream, stream_info=stream_info) 
         # markitdown 支持 BinaryIO，会进入 convert_stream 分支
         markdown_text = md_result.markdown 
         
@@ -105,6 +127,68 @@ def convert_html_to_markdown(
     return True, markdown_text, None
 
 
+# 分段转换时的切分点：二级标题 (维基百科文章的章节)
+SECTION_BOUNDARY = re.compile(rb'<h2[\s>]', re.IGNORECASE)
+
+
+def iter_html_to_markdown(
+    html_input: Union[bytes, memoryview],
+    title: str = "",
+    charset: str = "utf-8",
+    min_chunk_bytes: int = 32 * 1024,
+    deadline: Optional[Deadline] = None
+) -> Generator[str, None, bool]:
+    """
+    按章节把 HTML 分段转换为 Markdown，每转换完一段就产出一段，适合流式响应。
+
+    HTML 在二级标题 (<h2>) 处切分，相邻的小段会合并到至少 min_chunk_bytes 再转换，
+    第一段总是立即转换，以尽快产出首个分块。每段独立交给 markitdown，
+    调用方停止迭代后剩余的章节不会再被转换。
+
+    Args:
+        html_input (bytes or memoryview): 编码后的 HTML 内容。
+        title (str, optional): 标题，用于日志。
+        charset (str, optional): HTML 的字符编码，默认 utf-8。
+        min_chunk_bytes (int, optional): 每次转换的最小 HTML 字节数。
+        deadline (Deadline, optional): 截止时间。超时后不再转换剩余的段（第一段总会转换）。
+
+    Yields:
+        str: Markdown 分块（以空行结尾）。
+
+    Returns:
+        bool: 是否因超时而提前停止（作为 StopIteration.value）。
+
+    Raises:
+        RuntimeError: 某一段转换失败时抛出。
+    """
+    view = memoryview(html_input).cast('B')
+    boundaries = [m.start() for m in SECTION_BOUNDARY.finditer(view)]
+    boundaries = [0] + [b for b in boundaries if b > 0] + [len(view)]
+
+    md_converter = MarkItDown()
+    stream_info = StreamInfo(mimetype="text/html", extension=".html", charset=charset)
+    chunk_start = 0
+    produced = 0
+    for i, boundary in enumerate(boundaries[1:], start=1):
+        is_last = i == len(boundaries) - 1
+        if not is_last and produced > 0 and boundary - chunk_start < min_chunk_bytes:
+            continue
+        segment = view[chunk_start:boundary]
+        chunk_start = boundary
+        if re.search(rb'\S', segment) is None:
+            continue
+        if produced > 0 and deadline is not None and deadline.expired():
+            return True
+        try:
+            markdown_text = md_converter.convert(io.BytesIO(segment), stream_info=stream_info).markdown
+        except Exception as e:
+            raise RuntimeError(f"转换 Markdown 时出错 (标题: '{title}'): {e}") from e
+        produced += 1
+        if markdown_text.strip():
+            yield markdown_text.strip() + "\n\n"
+    return False
+
+
 def html_str_to_md_str(html_string: str, title: str = "") -> Tuple[bool, Optional[str], Optional[str]]:
     """HTML 字符串 -> Markdown 字符串"""
     return convert_html_to_markdown(html_string, output_path=None, title=title)
@@ -119,4 +203,59 @@ def html_str_to_md_file(html_string: str, md_file_path: Union[str, os.PathLike],
 
 def html_file_to_md_file(html_file_path: Union[str, os.PathLike], md_file_path: Union[str, os.PathLike]) -> Tuple[bool, Optional[str], Optional[str]]:
     """HTML 文件 -> Markdown 文件"""
-    return convert_html_to_markdown(html_file_path, output_path=md_file_path)
\ No newline at end of file
+    return convert_html_to_markdown(html_file_path, output_path=md_file_path)
+
+def content_to_markdown(content: Union[bytes, memoryview], title: str = "", mimetype: Optional[str] = None,
+                        deadline: Optional[Deadline] = None) -> Tuple[bool, Optional[str], bool, Optional[str]]:
+    """
+    将已读取的条目 HTML 转换为 Markdown（entry_to_markdown 的转换阶段，读取和转换可以在不同的线程池中进行）。
+
+    Args:
+        content (bytes | memoryview): 条目的原始 HTML。
+        title (str): 文章标题。
+        mimetype (str, optional): 条目的 MIME 类型，用于确定字符集（默认 UTF-8）。
+        deadline (Deadline, optional): 截止时间，超时后只返回已转换的章节。
+
+    Returns:
+        tuple: (成功标志 (bool), Markdown 内容 (str 或 None), 是否为部分结果 (bool), 错误信息 (str 或 None))
+    """
+    charset = charset_from_mimetype(mimetype) or "utf-8"
+    parts = []
+    chunks = iter_html_to_markdown(content, title, charset, deadline=deadline)
+    try:
+        while True:
+            parts.append(next(chunks))
+    except StopIteration as stop:
+        # 超时时返回已转换的章节
+        partial = bool(stop.value)
+    except RuntimeError as e:
+        return False, None, False, f"HTML 转 Markdown 失败: {e}"
+    markdown_text = "".join(parts).rstrip()
+    if not markdown_text:
+        return False, None, False, "HTML 转 Markdown 失败: 转换结果为空。"
+    return True, markdown_text, partial, None
+
+
+def entry_to_markdown(zim_searcher, archive_uuid: str, path: str,
+                      deadline: Optional[Deadline] = None) -> Tuple[bool, str, Optional[str], bool, Optional[str]]:
+    """
+    读取 ZIM 条目的 HTML 并转换为 Markdown。
+
+    总是使用 iter_html_to_markdown 按章节分段转换，与流式响应相同，
+    因此无论是否设置截止时间，完整结果都相同，可以共用同一个缓存键。
+    提供 deadline 时超时后不再转换剩余章节，返回已转换的部分并标记为部分结果。
+
+    Args:
+        zim_searcher (ZIMSearcher): 已打开档案的搜索器。
+        archive_uuid (str): 档案的 UUID。
+        path (str): 条目路径。
+        deadline (Deadline, optional): 截止时间。
+
+    Returns:
+        tuple: (成功标志 (bool), 标题 (str), Markdown 内容 (str 或 None), 是否为部分结果 (bool), 错误信息 (str 或 None))
+    """
+    success, title, content, mimetype, error = zim_searcher.get_content(archive_uuid, path)
+    if not (success and content):
+        return False, title, None, False, error or f"无法读取条目 '{path}'。"
+    success, markdown_text, partial, error = content_to_markdown(content, title, mimetype, deadline)
+    return success, title, markdown_text, partial, error
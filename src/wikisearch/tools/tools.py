@@ -1,6 +1,33 @@
-from typing import Tuple, Dict, Any, Union
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Tuple, Dict, Any, List, Optional, Iterator
 from wikisearch.api import WikiSearchAPI
-from wikisearch.tools.convert_html import convert_html_to_markdown
+from wikisearch.config import config
+from wikisearch.tools.convert_html import iter_html_to_markdown
+from wikisearch.tools.content_cache import content_cache
+from wikisearch.deadline import Deadline
+from wikisearch.singleflight import SingleFlight
+from wikisearch.zim.zim_searcher import charset_from_mimetype
+from wikisearch.zim.records import ArticleContent, iter_chunks
+
+MARKDOWN_MEDIA_TYPE = "text/markdown; charset=utf-8"
+# 流式 Markdown 因超时被截断时，在末尾附加的标记
+PARTIAL_MARKER = "<!-- partial: deadline exceeded -->\n"
+# 合并同时到达的相同 Markdown 请求
+markdown_flights = SingleFlight(config.WIKI_SINGLE_FLIGHT)
+# 批量搜索支持的结果格式
+BATCH_FORMATS = ("markdown", "html", "hits")
+# 一页命中数量和标题建议数量的上限（与 FastAPI 的 limit 校验一致）
+MAX_HITS_LIMIT = 100
+
+
+def _is_int(value: Any) -> bool:
+    """是否为整数；bool 是 int 的子类，但不是有效的 index/limit。"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+# 批量搜索共用的线程池，第一次使用时创建
+_batch_executor: Optional[ThreadPoolExecutor] = None
+_batch_executor_lock = threading.Lock()
 
 class SearchError(Exception):
     """搜索工具专用异常"""
@@ -8,55 +35,411 @@ class SearchError(Exception):
         self.message = message
         self.status_code = status_code
         super().__init__(self.message)
-def search_html_content(searcher: WikiSearchAPI, query: str, index: int = 0) -> Dict[str, Any]:
+def request_deadline(timeout_ms: Optional[int]) -> Optional[Deadline]:
+    """按请求的 timeout_ms 创建截止时间，未提供时使用配置中的 WIKI_DEFAULT_TIMEOUT_MS。"""
+    return Deadline.from_timeout_ms(config.WIKI_DEFAULT_TIMEOUT_MS if timeout_ms is None else timeout_ms)
+
+
+def locate_article(searcher: WikiSearchAPI, query: str, index: int, deadline: Optional[Deadline] = None,
+                   zim: Optional[str] = None, lang: Optional[str] = None) -> Tuple[str, str, str]:
+    """定位搜索结果条目，返回 (档案 UUID, 条目路径, 命中方式)。zim/lang 限定搜索的档案（见 WikiSearchAPI.route）。"""
+    try:
+        success, archive_uuid, path, match, error = searcher.locate(query, index, deadline, zim, lang)
+    except TimeoutError as e:
+        raise SearchError(str(e), 504)
+    if not success:
+        status_code = 404 if error and "not found" in error.lower() else 500
+        raise SearchError(error or f"未找到文章 '{query}' (索引 {index})。", status_code)
+    return archive_uuid, path, match
+
+
+def read_article(searcher: WikiSearchAPI, archive_uuid: str, path: str, match: Optional[str]) -> ArticleContent:
     """
-    使用 WikiSearchAPI 搜索并返回原始 HTML 内容。
-    
+    读取条目的原始内容，优先使用内容缓存。
+    缓存未命中时正文为直接引用 libzim blob 的 memoryview，不做解码。
+    """
+    cached = content_cache.get(archive_uuid, path, "html")
+    if cached is not None:
+        title, content, mimetype = cached
+        return ArticleContent(archive_uuid, path, title, mimetype, content, match)
+
+    success, article, error = searcher.get_article(archive_uuid, path)
+    if not (success and article.size):
+        status_code = 404 if error and "not found" in error.lower() else 500
+        raise SearchError(error or f"无法读取条目 '{path}'。", status_code)
+
+    content_cache.put(archive_uuid, path, "html", article.title, article.body, article.mimetype)
+    article.match = match
+    return article
+
+
+def search_html_content(searcher: WikiSearchAPI, query: str, index: int = 0, timeout_ms: Optional[int] = None,
+                        zim: Optional[str] = None, lang: Optional[str] = None) -> ArticleContent:
+    """
+    使用 WikiSearchAPI 搜索并返回文章的原始 HTML，不解码：
+    流式响应直接发送 body 的分块，需要字符串时由 text 解码。
+    timeout_ms 限制搜索阶段，超时未返回的档案不参与排名。zim/lang 限定搜索的档案。
+
     Returns:
-        Dict: 包含 success, title, content 的字典
-        
+        ArticleContent: 文章内容，match 表示命中方式："title"、"path"、"redirect" 或 "fulltext"
+
     Raises:
         SearchError: 搜索失败时抛出
     """
-    success, title, html_content, error = searcher.search(query, index)
+    archive_uuid, path, match = locate_article(searcher, query, index, request_deadline(timeout_ms), zim, lang)
+    return read_article(searcher, archive_uuid, path, match)
 
-    if success and html_content:
-        return {
-            "success": True,
-            "title": title,
-            "content": html_content
-        }
-    else:
-        status_code = 404 if error and "not found" in error.lower() else 500
-        raise SearchError(error or f"未找到文章 '{query}' (索引 {index})。", status_code)
+
+def search_hits_content(searcher: WikiSearchAPI, query: str, offset: int = 0, limit: int = 10, cursor: Optional[str] = None,
+                        snippets: bool = False, timeout_ms: Optional[int] = None,
+                        zim: Optional[str] = None, lang: Optional[str] = None) -> Dict[str, Any]:
+    """
+    使用 WikiSearchAPI 搜索并返回一页命中列表，默认不读取文章内容。
+    snippets 为 True 时每个命中附加高亮查询词的上下文片段。
+    超过 timeout_ms 时返回已得到的命中，partial 为 True。zim/lang 限定搜索的档案。
+
+    Returns:
+        Dict: 包含 success, query, offset, limit, hits (list[SearchHit]), next_cursor, partial 的字典
+
+    Raises:
+        SearchError: offset/limit/cursor 无效时抛出 400，zim/lang 没有匹配的档案或没有命中时抛出 404
+    """
+    if not _is_int(offset) or offset < 0 or not _is_int(limit) or not 1 <= limit <= MAX_HITS_LIMIT:
+        raise SearchError(f"Invalid 'offset' or 'limit', expected offset >= 0 and 1 <= limit <= {MAX_HITS_LIMIT}.", 400)
+    try:
+        page = searcher.search_hits(query, offset, limit, cursor, snippets=snippets, deadline=request_deadline(timeout_ms),
+                                    zim=zim, lang=lang)
+    except ValueError as e:
+        raise SearchError(str(e), 404 if "not found" in str(e).lower() else 400)
+    except Exception as e:
+        raise SearchError(f"Error during search: {e}", 500)
+
+    if not page["hits"] and page["offset"] == 0 and not page["partial"]:
+        raise SearchError(f"No matches found for term '{query}'.", 404)
+
+    return {"success": True, **page}
 
 
-def search_markdown_content(searcher: WikiSearchAPI, query: str, index: int = 0) -> Dict[str, Any]:
+def suggest_titles_content(searcher: WikiSearchAPI, prefix: str, limit: int = 10,
+                           zim: Optional[str] = None, lang: Optional[str] = None) -> Dict[str, Any]:
     """
-    使用 WikiSearchAPI 搜索并将结果转换为 Markdown 格式。
-    
+    使用 WikiSearchAPI 返回标题前缀的建议列表。zim/lang 限定查找的档案。
+
     Returns:
-        Dict: 包含 success, query, index, title, markdown 的字典
-        
+        Dict: 包含 success, query, suggestions 的字典
+
+    Raises:
+        SearchError: limit 无效时抛出 400，zim/lang 没有匹配的档案时抛出 404，查找失败时抛出 500
+    """
+    if not _is_int(limit) or not 1 <= limit <= MAX_HITS_LIMIT:
+        raise SearchError(f"Invalid 'limit', expected 1 <= limit <= {MAX_HITS_LIMIT}.", 400)
+    try:
+        suggestions = searcher.suggest(prefix, limit, zim, lang)
+    except ValueError as e:
+        raise SearchError(str(e), 404)
+    except Exception as e:
+        raise SearchError(f"Error during suggestion: {e}", 500)
+
+    return {"success": True, "query": prefix, "suggestions": suggestions}
+
+
+def search_markdown_content(searcher: WikiSearchAPI, query: str, index: int = 0, timeout_ms: Optional[int] = None,
+                            zim: Optional[str] = None, lang: Optional[str] = None) -> ArticleContent:
+    """
+    使用 WikiSearchAPI 搜索并将结果转换为 Markdown 格式。zim/lang 限定搜索的档案。
+    超过 timeout_ms 时停止转换剩余章节，返回截断的 Markdown，partial 为 True（部分结果不写入缓存）。
+    参数相同的并发请求只执行一次搜索和转换，共享同一个（只读的）结果或错误。
+
+    Returns:
+        ArticleContent: MIME 类型为 MARKDOWN_MEDIA_TYPE 的文章内容，
+              match 表示命中方式："title"、"path"、"redirect" 或 "fulltext"
+
     Raises:
         SearchError: 搜索或转换失败时抛出
     """
+    key = (id(searcher), query, index, timeout_ms, zim, lang)
+    return markdown_flights.do(key, lambda: _search_markdown(searcher, query, index, timeout_ms, zim, lang))
+
+
+def cached_markdown(archive_uuid: str, path: str, match: Optional[str]) -> Optional[ArticleContent]:
+    """返回内容缓存中条目的 Markdown（正文为缓存的字节，需要时才解码），未缓存时返回 None。"""
+    cached = content_cache.get(archive_uuid, path, "markdown")
+    if cached is None:
+        return None
+    title, markdown_bytes, _ = cached
+    return ArticleContent(archive_uuid, path, title, MARKDOWN_MEDIA_TYPE, markdown_bytes, match)
+
+
+def _markdown_article(archive_uuid: str, path: str, match: Optional[str], title: str,
+                      markdown_content: Optional[str], partial: bool, error: Optional[str]) -> ArticleContent:
+    """把转换结果包装为 ArticleContent，完整的结果写入内容缓存。"""
+    if not markdown_content:
+        status_code = 404 if error and "not found" in error.lower() else 500
+        raise SearchError(error or f"无法转换条目 '{path}'。", status_code)
+    article = ArticleContent(archive_uuid, path, title, MARKDOWN_MEDIA_TYPE, markdown_content, match, partial)
+    if not partial:
+        content_cache.put(archive_uuid, path, "markdown", title, article.body, MARKDOWN_MEDIA_TYPE)
+    return article
+
+
+def convert_markdown(searcher: WikiSearchAPI, article: ArticleContent, deadline: Optional[Deadline] = None) -> ArticleContent:
+    """
+    将已读取的条目（read_article 的结果）转换为 Markdown，只做转换，
+    异步服务器可以把定位、读取和转换分别交给不同的线程池。完整的结果写入内容缓存。
+
+    Raises:
+        SearchError: 转换失败时抛出 500，超过截止时间（"process" 后端下等待工作进程）时抛出 504
+    """
     try:
-        result = search_html_content(searcher, query, index)
-        title = result["title"]
-        html_content = result["content"]
-    except SearchError as e:
-        raise SearchError(e.message, e.status_code)
-
-    md_success, markdown_content, md_error = convert_html_to_markdown(html_content, None, title)
-
-    if md_success and markdown_content:
-        return {
-            "success": True,
-            "query": query,
-            "index": index,
-            "title": title,
-            "markdown": markdown_content
-        }
+        success, markdown_content, partial, error = searcher.convert_markdown(article.title, article.body, article.mimetype, deadline)
+    except TimeoutError as e:
+        raise SearchError(str(e), 504)
+    return _markdown_article(article.archive_uuid, article.path, article.match, article.title,
+                             markdown_content if success else None, partial, error)
+
+
+def _get_markdown(searcher: WikiSearchAPI, archive_uuid: str, path: str, match: Optional[str],
+                  deadline: Optional[Deadline]) -> ArticleContent:
+    """读取条目并转换为 Markdown，优先使用内容缓存。"""
+    cached = cached_markdown(archive_uuid, path, match)
+    if cached is not None:
+        return cached
+
+    # 读取和转换由 WikiSearchAPI 完成，"process" 后端下在工作进程中进行
+    try:
+        success, title, markdown_content, partial, error = searcher.get_markdown(archive_uuid, path, deadline)
+    except TimeoutError as e:
+        raise SearchError(str(e), 504)
+    return _markdown_article(archive_uuid, path, match, title, markdown_content if success else None, partial, error)
+
+
+def _search_markdown(searcher: WikiSearchAPI, query: str, index: int, timeout_ms: Optional[int],
+                     zim: Optional[str], lang: Optional[str]) -> ArticleContent:
+    deadline = request_deadline(timeout_ms)
+    archive_uuid, path, match = locate_article(searcher, query, index, deadline, zim, lang)
+    return _get_markdown(searcher, archive_uuid, path, match, deadline)
+
+
+def stream_markdown_content(searcher: WikiSearchAPI, query: str, index: int = 0, timeout_ms: Optional[int] = None,
+                            zim: Optional[str] = None, lang: Optional[str] = None) -> Dict[str, Any]:
+    """
+    使用 WikiSearchAPI 搜索，并以分块迭代器的形式返回 Markdown（见 markdown_chunks）。
+
+    Returns:
+        Dict: 包含 success, title, media_type, match, chunks 的字典
+
+    Raises:
+        SearchError: 搜索失败时抛出
+    """
+    deadline = request_deadline(timeout_ms)
+    archive_uuid, path, match = locate_article(searcher, query, index, deadline, zim, lang)
+    return markdown_chunks(searcher, archive_uuid, path, match, deadline)
+
+
+def markdown_chunks(searcher: WikiSearchAPI, archive_uuid: str, path: str, match: Optional[str],
+                    deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+    """
+    以分块迭代器的形式返回已定位条目的 Markdown。
+
+    读取 HTML 在调用时完成（失败时立即抛出 SearchError）；
+    转换按章节在迭代 chunks 时逐段进行，调用方停止迭代（如客户端断开）后剩余章节不再转换。
+    超过截止时间时同样停止转换，并以 PARTIAL_MARKER 结尾（响应头已发送，无法再标记）。
+    完整迭代后的结果会写入内容缓存，缓存命中时直接切分缓存的字节。
+
+    Returns:
+        Dict: 包含 success, title, media_type, match, chunks 的字典
+
+    Raises:
+        SearchError: 读取条目失败时抛出
+    """
+    cached = content_cache.get(archive_uuid, path, "markdown")
+    if cached is not None:
+        title, markdown_bytes, _ = cached
+        chunks = (bytes(chunk) for chunk in iter_chunks(markdown_bytes, config.WIKI_STREAM_CHUNK_SIZE))
     else:
-        raise SearchError(f"HTML 转 Markdown 失败: {md_error}", 500)
\ No newline at end of file
+        article = read_article(searcher, archive_uuid, path, match)
+        title, html_bytes = article.title, article.body
+        charset = charset_from_mimetype(article.mimetype) or "utf-8"
+
+        def convert() -> Iterator[bytes]:
+            parts = []
+            sections = iter_html_to_markdown(html_bytes, title, charset, deadline=deadline)
+            while True:
+                try:
+                    data = next(sections).encode("utf-8")
+                except StopIteration as stop:
+                    if stop.value:
+                        # 超时停止转换，部分结果不写入缓存
+                        yield PARTIAL_MARKER.encode("utf-8")
+                        return
+                    break
+                parts.append(data)
+                yield data
+            content_cache.put(archive_uuid, path, "markdown", title, b"".join(parts).rstrip(), MARKDOWN_MEDIA_TYPE)
+
+        chunks = convert()
+
+    return {
+        "success": True,
+        "title": title,
+        "media_type": MARKDOWN_MEDIA_TYPE,
+        "match": match,
+        "chunks": chunks
+    }
+
+
+def find_article(searcher: WikiSearchAPI, key: str, by: str, archive: Optional[str]) -> Tuple[str, str, str]:
+    """按路径或标题直接查找条目，返回 (档案 UUID, 最终条目路径, 命中方式)。"""
+    if not key.strip():
+        raise SearchError(f"Empty article {by}.", 400)
+    success, archive_uuid, path, match, error = searcher.find_entry(key, by, archive)
+    if not success:
+        status_code = 404 if error and "not found" in error.lower() else 400
+        raise SearchError(error or f"未找到条目 '{key}'。", status_code)
+    return archive_uuid, path, match
+
+
+def article_html_content(searcher: WikiSearchAPI, key: str, by: str = "path", archive: Optional[str] = None) -> ArticleContent:
+    """
+    按条目路径或标题直接读取条目（跟随重定向，不经过全文搜索），返回不解码的原始内容。
+
+    Args:
+        key (str): 条目路径或标题。
+        by (str): "path" 或 "title"。
+        archive (str, optional): 只在该档案中查找（UUID、文件名或不含扩展名的文件名）。
+
+    Returns:
+        ArticleContent: 文章内容，path 为跟随重定向后的条目路径
+
+    Raises:
+        SearchError: 条目或档案不存在时抛出 404
+    """
+    archive_uuid, path, match = find_article(searcher, key, by, archive)
+    return read_article(searcher, archive_uuid, path, match)
+
+
+def article_markdown_content(searcher: WikiSearchAPI, key: str, by: str = "path", archive: Optional[str] = None,
+                             timeout_ms: Optional[int] = None) -> ArticleContent:
+    """
+    按条目路径或标题直接读取条目（跟随重定向，不经过全文搜索）并转换为 Markdown。
+
+    Returns:
+        ArticleContent: MIME 类型为 MARKDOWN_MEDIA_TYPE 的文章内容，path 为跟随重定向后的条目路径
+
+    Raises:
+        SearchError: 条目或档案不存在时抛出 404，转换失败时抛出 500
+    """
+    archive_uuid, path, match = find_article(searcher, key, by, archive)
+    return _get_markdown(searcher, archive_uuid, path, match, request_deadline(timeout_ms))
+
+
+def _get_batch_executor() -> ThreadPoolExecutor:
+    global _batch_executor
+    with _batch_executor_lock:
+        if _batch_executor is None:
+            _batch_executor = ThreadPoolExecutor(max_workers=config.WIKI_BATCH_WORKERS, thread_name_prefix="wiki-batch")
+        return _batch_executor
+
+
+def _batch_key(item: Dict[str, Any]) -> Tuple[str, int, str, int, Optional[str], Optional[str]]:
+    """校验批量搜索的一项并返回其去重键 (query, index, format, limit, zim, lang)。"""
+    query = item.get("query")
+    if not isinstance(query, str) or not query.strip():
+        raise SearchError("Each batch item needs a non-empty 'query'.", 400)
+    index = item.get("index", 0)
+    limit = item.get("limit", 10)
+    if not _is_int(index) or index < 0 or not _is_int(limit) or not 1 <= limit <= MAX_HITS_LIMIT:
+        raise SearchError(f"Invalid 'index' or 'limit' for batch item '{query}'.", 400)
+    output_format = item.get("format", "markdown")
+    if output_format not in BATCH_FORMATS:
+        raise SearchError(f"Unsupported batch format '{output_format}', expected one of {BATCH_FORMATS}.", 400)
+    zim, lang = item.get("zim") or None, item.get("lang") or None
+    if not all(selector is None or isinstance(selector, str) for selector in (zim, lang)):
+        raise SearchError(f"Invalid 'zim' or 'lang' for batch item '{query}'.", 400)
+    return query, index, output_format, limit, zim, lang
+
+
+def _run_batch_item(searcher: WikiSearchAPI, key: Tuple[str, int, str, int, Optional[str], Optional[str]],
+                    deadline: Optional[Deadline]) -> Dict[str, Any]:
+    """执行批量搜索中的一项，失败时返回错误信息而不是抛出异常。"""
+    query, index, output_format, limit, zim, lang = key
+    # 整批共用一个截止时间，排队等待的项只得到剩余的时间
+    timeout_ms = None if deadline is None else max(1, int(deadline.remaining() * 1000))
+    try:
+        if output_format == "markdown":
+            article = search_markdown_content(searcher, query, index, timeout_ms, zim, lang)
+            result = {"query": query, "index": index, **article.to_dict("markdown")}
+        elif output_format == "html":
+            article = search_html_content(searcher, query, index, timeout_ms, zim, lang)
+            result = {"query": query, "index": index, **article.to_dict("content")}
+        else:
+            page = search_hits_content(searcher, query, index, limit, timeout_ms=timeout_ms, zim=zim, lang=lang)
+            page.pop("success", None)
+            result = {**page, "hits": [hit.to_dict() for hit in page["hits"]]}
+        return {"status": "success", "result": result}
+    except SearchError as e:
+        status = "not found" if e.status_code == 404 else "error"
+        return {"status": status, "status_code": e.status_code, "message": e.message}
+    except Exception as e:
+        return {"status": "error", "status_code": 500, "message": f"搜索过程中发生错误: {e}"}
+
+
+def iter_batch_results(searcher: WikiSearchAPI, items: List[Dict[str, Any]], timeout_ms: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    并行执行一批搜索，按完成顺序逐项产出结果（适合以 NDJSON 流式返回）。
+
+    每项为包含 query、index（默认 0）、format（"markdown"、"html" 或 "hits"，默认 "markdown"）
+    以及 hits 格式下 limit（默认 10）的字典，可选的 zim、lang 限定该项搜索的档案。完全相同的项只执行一次，结果复制给每个相同的项。
+    不同的项在共用的线程池中并行执行，每一项内部仍并行搜索所有档案。timeout_ms 是整批共用的截止时间。
+
+    Returns:
+        Iterator[Dict]: 每项结果为包含 item（在 items 中的下标）、query、index、format、status 的字典，
+              成功时附带 result，失败时附带 status_code 和 message。
+
+    Raises:
+        SearchError: items 为空、超过 WIKI_BATCH_MAX_ITEMS 或某一项无效时在调用时（开始执行前）抛出 400
+    """
+    if not items:
+        raise SearchError("Batch is empty.", 400)
+    if len(items) > config.WIKI_BATCH_MAX_ITEMS:
+        raise SearchError(f"Batch has {len(items)} items, the limit is {config.WIKI_BATCH_MAX_ITEMS}.", 400)
+
+    # 去重键 -> 使用该键的项的下标
+    positions: Dict[Tuple[str, int, str, int, Optional[str], Optional[str]], List[int]] = {}
+    for position, item in enumerate(items):
+        positions.setdefault(_batch_key(item), []).append(position)
+
+    # 校验通过后立即提交，调用方开始迭代前各项已在执行
+    deadline = request_deadline(timeout_ms)
+    executor = _get_batch_executor()
+    futures = {executor.submit(_run_batch_item, searcher, key, deadline): key for key in positions}
+
+    def collect() -> Iterator[Dict[str, Any]]:
+        try:
+            for future in as_completed(futures):
+                key = futures[future]
+                outcome = future.result()
+                for position in positions[key]:
+                    yield {"item": position, "query": key[0], "index": key[1], "format": key[2], **outcome}
+        finally:
+            # 调用方提前停止迭代（如客户端断开）时取消尚未开始的项
+            for future in futures:
+                future.cancel()
+
+    return collect()
+
+
+def search_batch_content(searcher: WikiSearchAPI, items: List[Dict[str, Any]], timeout_ms: Optional[int] = None) -> Dict[str, Any]:
+    """
+    并行执行一批搜索，等待全部完成后按 items 的顺序返回结果（见 iter_batch_results）。
+
+    Returns:
+        Dict: 包含 success, results 的字典，results[i] 对应 items[i]
+
+    Raises:
+        SearchError: 批量请求无效时抛出 400
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    for result in iter_batch_results(searcher, items, timeout_ms):
+        results[result["item"]] = result
+    return {"success": True, "results": results}
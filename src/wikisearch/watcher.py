@@ -0,0 +1,90 @@
+import os
+import glob
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+# 文件路径 -> (大小, 修改时间)
+Snapshot = Dict[str, Tuple[int, int]]
+
+
+def scan_zim_dir(directory: str) -> Snapshot:
+    """返回目录下所有 .zim 文件的大小和修改时间。"""
+    snapshot = {}
+    for path in glob.glob(os.path.join(directory, "*.zim")):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            # 扫描期间被删除或改名
+            continue
+        snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+    return snapshot
+
+
+class ZimDirectoryWatcher:
+    """
+    定期轮询 ZIM 目录，文件集合发生变化且在一个轮询间隔内保持不变后调用 on_change。
+
+    等待文件稳定是为了不加载仍在下载或复制中的 ZIM 文件。使用轮询而不是 inotify，
+    因此不依赖平台，也适用于网络文件系统。
+    """
+
+    def __init__(self, directory: str, on_change: Callable[[], object], interval: float = 30.0):
+        """
+        初始化 ZimDirectoryWatcher。
+
+        Args:
+            directory (str): 要监视的目录。
+            on_change (callable): 目录变化并稳定后调用，不带参数（通常为 WikiSearchAPI.reload）。
+            interval (float): 轮询间隔秒数。
+        """
+        self.directory = directory
+        self.on_change = on_change
+        self.interval = interval
+        # 最近一次通知时（或启动时）的目录状态，以及等待稳定的新状态
+        self._loaded: Snapshot = scan_zim_dir(directory)
+        self._pending: Optional[Snapshot] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def poll(self) -> bool:
+        """
+        扫描一次目录。
+
+        Returns:
+            bool: 本次是否调用了 on_change。
+        """
+        snapshot = scan_zim_dir(self.directory)
+        if snapshot == self._loaded:
+            self._pending = None
+            return False
+        if snapshot != self._pending:
+            # 第一次看到这个状态，等下一次轮询确认文件不再变化
+            self._pending = snapshot
+            return False
+
+        self._pending = None
+        self._loaded = snapshot
+        try:
+            self.on_change()
+        except Exception as e:
+            print(f"Reload after change in '{self.directory}' failed: {e}")
+        return True
+
+    def start(self) -> None:
+        """启动后台轮询线程。"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="zim-watcher", daemon=True)
+        self._thread.start()
+        print(f"Watching '{self.directory}' for ZIM file changes every {self.interval}s")
+
+    def stop(self) -> None:
+        """停止轮询线程，等待当前的一次重载完成。"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.poll()
@@ -0,0 +1,346 @@
+import uuid
+import struct
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from libzim.reader import Archive
+
+from wikisearch.zim.searcher_pool import SearcherPool
+
+# ZIM 文件头：magic (uint32)、主版本号 (uint16)、次版本号 (uint16)、UUID (16 字节)
+ZIM_MAGIC = 72173914
+ZIM_HEADER = struct.Struct("<IHH16s")
+
+# 当前请求的档案会话（见 ArchiveManager.session），ArchiveView 通过它访问档案
+_current_session: ContextVar[Optional["ArchiveSession"]] = ContextVar("archive_session", default=None)
+
+
+def read_zim_uuid(zim_file_path: str) -> str:
+    """
+    直接从文件头读取 ZIM 档案的 UUID，无需用 libzim 打开档案。
+
+    Raises:
+        ValueError: 文件不是 ZIM 格式。
+        OSError: 文件无法读取。
+    """
+    with open(zim_file_path, "rb") as f:
+        header = f.read(ZIM_HEADER.size)
+    if len(header) < ZIM_HEADER.size:
+        raise ValueError(f"File is too small to be a ZIM archive: {zim_file_path}")
+    magic, _, _, uuid_bytes = ZIM_HEADER.unpack(header)
+    if magic != ZIM_MAGIC:
+        raise ValueError(f"Not a ZIM archive (bad magic number): {zim_file_path}")
+    return str(uuid.UUID(bytes=uuid_bytes))
+
+
+class ArchiveManager:
+    """
+    管理一组 ZIM 档案的打开状态：已登记的档案都会被列出和搜索，但只有最近使用的至多 max_open 个保持打开。
+
+    登记 (add) 时只读取文件头中的 UUID；第一次访问 (get) 时才打开 Archive 并创建搜索句柄池，
+    打开的档案超过 max_open 时关闭最久未使用的档案。max_open 为 0 时不限制数量，并在登记时立即打开。
+    通过 acquire 或 session 取得的档案在释放前标记为使用中，不会被淘汰（此时打开的数量可能暂时超过 max_open，
+    释放后再淘汰）。被关闭的档案若仍有查询在使用，其 Archive 和句柄由这些查询持有的引用保持有效，直到查询结束。
+    所有方法都是线程安全的。
+    """
+
+    def __init__(self, max_open: int = 0, searchers_per_archive: int = 4,
+                 on_open: Optional[Callable[[str, str, Archive], None]] = None,
+                 on_close: Optional[Callable[[str], None]] = None):
+        """
+        初始化 ArchiveManager。
+
+        Args:
+            max_open (int): 同时保持打开的档案数量上限，0 表示不限制。
+            searchers_per_archive (int): 每个档案的搜索句柄池大小。
+            on_open (callable, optional): 档案被打开后调用，参数为 (路径, UUID, Archive)。
+            on_close (callable, optional): 档案被关闭（淘汰或移除）后调用，参数为 UUID。
+        """
+        self.max_open = max_open
+        self.searchers_per_archive = searchers_per_archive
+        self._on_open = on_open
+        self._on_close = on_close
+        # 已登记的档案，按加载顺序排列
+        self.paths: List[str] = []
+        self.uuids: List[str] = []
+        # 已打开的档案：UUID -> (Archive, SearcherPool)，按最近使用顺序排列
+        self._open: "OrderedDict[str, Tuple[Archive, SearcherPool]]" = OrderedDict()
+        # 使用中的档案：UUID -> 持有次数
+        self._in_use: Dict[str, int] = {}
+        # 正在打开的档案：UUID -> 打开完成（成功或失败）时触发的事件；打开在锁外进行
+        self._opening: Dict[str, threading.Event] = {}
+        self._lock = threading.RLock()
+        self.opens = 0
+        self.evictions = 0
+
+    @property
+    def lazy(self) -> bool:
+        return self.max_open > 0
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def add(self, zim_file_path: str, opened: Optional[Tuple[Archive, SearcherPool]] = None) -> str:
+        """
+        登记一个 ZIM 文件，返回其 UUID。非懒加载模式下立即打开。
+
+        Args:
+            zim_file_path (str): ZIM 文件路径。
+            opened (tuple, optional): 其他 ArchiveManager 中已打开的同一档案 (Archive, SearcherPool)，
+                                      UUID 一致且未超过打开数量上限时直接复用，不再重新打开。
+
+        Raises:
+            ValueError: 文件不是 ZIM 格式，或 UUID 与已登记的档案重复。
+            OSError: 文件无法读取。
+        """
+        archive_uuid = read_zim_uuid(zim_file_path)
+        with self._lock:
+            if archive_uuid in self.uuids:
+                raise ValueError(f"Archive {archive_uuid} is already loaded from '{self.paths[self.uuids.index(archive_uuid)]}'")
+            self.paths.append(zim_file_path)
+            self.uuids.append(archive_uuid)
+            if opened is not None and str(opened[0].uuid) == archive_uuid and (not self.lazy or len(self._open) < self.max_open):
+                self._open[archive_uuid] = opened
+        if not self.lazy:
+            try:
+                self.get(self.uuids.index(archive_uuid))
+            except Exception:
+                self.remove(zim_file_path)
+                raise
+        return archive_uuid
+
+    def remove(self, zim_file_path: str) -> str:
+        """注销一个 ZIM 文件并关闭它，返回其 UUID。"""
+        with self._lock:
+            index = self.paths.index(zim_file_path)
+            archive_uuid = self.uuids[index]
+            del self.paths[index]
+            del self.uuids[index]
+            opened = self._open.pop(archive_uuid, None)
+        if opened is not None:
+            self._close(archive_uuid, opened)
+        return archive_uuid
+
+    def get(self, archive_index: int) -> Tuple[Archive, SearcherPool]:
+        """
+        返回第 archive_index 个档案的 (Archive, SearcherPool)，未打开时打开它。
+
+        Raises:
+            Exception: 打开档案失败时抛出 libzim 的异常。
+        """
+        return self._get(archive_index)[1]
+
+    @contextmanager
+    def acquire(self, archive_index: int) -> Iterator[Tuple[Archive, SearcherPool]]:
+        """取得第 archive_index 个档案的 (Archive, SearcherPool)，退出前标记为使用中，不会被淘汰。"""
+        archive_uuid, opened = self._get(archive_index, hold=True)
+        try:
+            yield opened
+        finally:
+            self._release(archive_uuid)
+
+    @contextmanager
+    def session(self) -> Iterator["ArchiveSession"]:
+        """
+        在一个请求内共享档案：会话期间通过 ArchiveView 访问的每个档案只取得一次并保持使用中，
+        会话结束时统一释放。同一上下文中嵌套调用时复用外层会话；
+        在线程池中执行的任务需要用 contextvars.copy_context().run 提交才能看到会话。
+        """
+        current = _current_session.get()
+        if current is not None and current.manager is self:
+            yield current
+            return
+        session = ArchiveSession(self)
+        token = _current_session.set(session)
+        try:
+            yield session
+        finally:
+            _current_session.reset(token)
+            session.close()
+
+    def _get(self, archive_index: int, hold: bool = False) -> Tuple[str, Tuple[Archive, SearcherPool]]:
+        """
+        返回 (UUID, (Archive, SearcherPool))；hold 为 True 时标记为使用中，需要调用 _release。
+
+        打开档案（读取文件头和指针表，冷存储上可能很慢）在锁外进行，期间其他档案的访问不受影响；
+        同一档案同时只由一个线程打开，其他线程等待它完成。
+        """
+        while True:
+            with self._lock:
+                archive_uuid = self.uuids[archive_index]
+                opened = self._open.get(archive_uuid)
+                if opened is not None:
+                    self._open.move_to_end(archive_uuid)
+                    if hold:
+                        self._in_use[archive_uuid] = self._in_use.get(archive_uuid, 0) + 1
+                    return archive_uuid, opened
+                zim_file_path = self.paths[archive_index]
+                pending = self._opening.get(archive_uuid)
+                if pending is None:
+                    pending = self._opening[archive_uuid] = threading.Event()
+                    break
+            # 其他线程正在打开该档案；完成后重新查找（打开失败时由本线程重试）
+            pending.wait()
+
+        try:
+            archive = Archive(zim_file_path)
+            # 所有搜索句柄共享该 Archive
+            opened = (archive, SearcherPool(zim_file_path, self.searchers_per_archive, archive=archive))
+        except BaseException:
+            with self._lock:
+                self._opening.pop(archive_uuid, None)
+            pending.set()
+            raise
+
+        with self._lock:
+            self._opening.pop(archive_uuid, None)
+            evicted = []
+            # 打开期间档案可能已被注销，此时只把它交给本次调用使用
+            if archive_uuid in self.uuids:
+                self._open[archive_uuid] = opened
+                self.opens += 1
+                if hold:
+                    self._in_use[archive_uuid] = self._in_use.get(archive_uuid, 0) + 1
+                evicted = self._evict()
+        pending.set()
+
+        if self._on_open is not None:
+            self._on_open(zim_file_path, archive_uuid, archive)
+        self._close_evicted(evicted)
+        return archive_uuid, opened
+
+    def _release(self, archive_uuid: str) -> None:
+        with self._lock:
+            if archive_uuid not in self._in_use:
+                return
+            count = self._in_use[archive_uuid] - 1
+            if count > 0:
+                self._in_use[archive_uuid] = count
+            else:
+                self._in_use.pop(archive_uuid, None)
+            evicted = self._evict()
+        self._close_evicted(evicted)
+
+    def _evict(self) -> List[Tuple[str, Tuple[Archive, SearcherPool]]]:
+        # 调用方持有锁；按最久未使用的顺序淘汰未在使用中的档案
+        evicted = []
+        if not self.lazy:
+            return evicted
+        for archive_uuid in list(self._open):
+            if len(self._open) <= self.max_open:
+                break
+            if archive_uuid in self._in_use:
+                continue
+            evicted.append((archive_uuid, self._open.pop(archive_uuid)))
+            self.evictions += 1
+        return evicted
+
+    def _close_evicted(self, evicted: List[Tuple[str, Tuple[Archive, SearcherPool]]]) -> None:
+        for old_uuid, old in evicted:
+            # 淘汰只释放管理器持有的引用，不关闭句柄池：已取得该池的查询可以继续借用句柄，
+            # 查询结束后 Archive 与句柄随引用计数归零被释放
+            self._close(old_uuid, old, close_pool=False)
+
+    def is_open(self, archive_uuid: str) -> bool:
+        with self._lock:
+            return archive_uuid in self._open
+
+    def peek(self, archive_uuid: str) -> Optional[Tuple[Archive, SearcherPool]]:
+        """返回已打开档案的 (Archive, SearcherPool)，未打开时返回 None；不会打开档案，也不改变使用顺序。"""
+        with self._lock:
+            return self._open.get(archive_uuid)
+
+    def open_pools(self) -> List[Tuple[str, SearcherPool]]:
+        """返回当前打开的档案的 (路径, 搜索句柄池)，不会打开任何档案。"""
+        with self._lock:
+            return [(self.paths[self.uuids.index(u)], pool) for u, (_, pool) in self._open.items()]
+
+    def clear(self, keep: Iterable[str] = ()) -> None:
+        """
+        注销并关闭所有档案。
+
+        Args:
+            keep (iterable[str]): 仍被其他 ArchiveManager 共享的档案 UUID，这些档案只注销、不关闭。
+        """
+        keep = set(keep)
+        with self._lock:
+            opened = [(archive_uuid, item) for archive_uuid, item in self._open.items() if archive_uuid not in keep]
+            self._open.clear()
+            self.paths.clear()
+            self.uuids.clear()
+        for archive_uuid, item in opened:
+            self._close(archive_uuid, item)
+
+    def stats(self) -> Dict[str, int]:
+        """返回登记数量、打开数量、使用中的数量与打开/淘汰计数。"""
+        with self._lock:
+            return {
+                "archives": len(self.paths),
+                "open": len(self._open),
+                "in_use": len(self._in_use),
+                "max_open": self.max_open,
+                "opens": self.opens,
+                "evictions": self.evictions,
+            }
+
+    def _close(self, archive_uuid: str, opened: Tuple[Archive, SearcherPool], close_pool: bool = True) -> None:
+        if close_pool:
+            opened[1].close()
+        if self._on_close is not None:
+            self._on_close(archive_uuid)
+
+
+class ArchiveSession:
+    """
+    一次请求中取得的档案：每个档案只取得一次（不会在请求中途被淘汰后重新打开），关闭会话时统一释放。
+    线程安全，可被同一请求中并行搜索各档案的线程共享。
+    """
+
+    def __init__(self, manager: ArchiveManager):
+        self.manager = manager
+        # 档案下标 -> (UUID, (Archive, SearcherPool))
+        self._held: Dict[int, Tuple[str, Tuple[Archive, SearcherPool]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, archive_index: int) -> Tuple[Archive, SearcherPool]:
+        with self._lock:
+            held = self._held.get(archive_index)
+            if held is None:
+                held = self._held[archive_index] = self.manager._get(archive_index, hold=True)
+        return held[1]
+
+    def close(self) -> None:
+        with self._lock:
+            held, self._held = list(self._held.values()), {}
+        for archive_uuid, _ in held:
+            self.manager._release(archive_uuid)
+
+
+class ArchiveView(Sequence):
+    """
+    按档案下标访问 ArchiveManager 中的 Archive (field=0) 或 SearcherPool (field=1)，访问时按需打开。
+    在该管理器的会话（ArchiveManager.session）中访问时，同一档案在会话内只取得一次。
+    len() 和布尔判断不会打开档案。
+    """
+
+    def __init__(self, manager: ArchiveManager, field: int):
+        self._manager = manager
+        self._field = field
+
+    def __len__(self) -> int:
+        return len(self._manager)
+
+    def __getitem__(self, archive_index: int):
+        if isinstance(archive_index, slice):
+            return [self[i] for i in range(len(self))[archive_index]]
+        session = _current_session.get()
+        if session is not None and session.manager is self._manager:
+            return session.get(archive_index)[self._field]
+        return self._manager.get(archive_index)[self._field]
+
+    def __iter__(self) -> Iterator:
+        for archive_index in range(len(self)):
+            yield self[archive_index]
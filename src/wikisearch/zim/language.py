@@ -0,0 +1,108 @@
+import bisect
+import os
+import re
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+# 书写系统的 Unicode 码位区间 (起始, 结束, 书写系统)，按起始码位排序
+SCRIPT_RANGES: List[Tuple[int, int, str]] = sorted([
+    (0x0041, 0x005A, "latin"), (0x0061, 0x007A, "latin"), (0x00C0, 0x024F, "latin"), (0x1E00, 0x1EFF, "latin"),
+    (0x0370, 0x03FF, "greek"), (0x1F00, 0x1FFF, "greek"),
+    (0x0400, 0x052F, "cyrillic"),
+    (0x0590, 0x05FF, "hebrew"),
+    (0x0600, 0x06FF, "arabic"), (0x0750, 0x077F, "arabic"),
+    (0x0900, 0x097F, "devanagari"),
+    (0x0E00, 0x0E7F, "thai"),
+    (0x1100, 0x11FF, "hangul"), (0x3130, 0x318F, "hangul"), (0xAC00, 0xD7AF, "hangul"),
+    (0x3040, 0x30FF, "kana"), (0x31F0, 0x31FF, "kana"),
+    (0x3400, 0x4DBF, "han"), (0x4E00, 0x9FFF, "han"), (0xF900, 0xFAFF, "han"), (0x20000, 0x2FA1F, "han"),
+])
+_RANGE_STARTS = [start for start, _, _ in SCRIPT_RANGES]
+
+# ZIM 元数据 Language 使用的 ISO 639-3 语言代码 -> 该语言使用的书写系统；未列出的语言视为未知，总是参与搜索
+LANGUAGE_SCRIPTS: Dict[str, FrozenSet[str]] = {
+    "zho": frozenset({"han"}),
+    "jpn": frozenset({"han", "kana"}),
+    "kor": frozenset({"hangul", "han"}),
+    "ell": frozenset({"greek"}),
+    "heb": frozenset({"hebrew"}), "yid": frozenset({"hebrew"}),
+    "hin": frozenset({"devanagari"}), "mar": frozenset({"devanagari"}), "nep": frozenset({"devanagari"}),
+    "tha": frozenset({"thai"}),
+    **{code: frozenset({"cyrillic"}) for code in ("rus", "ukr", "bel", "bul", "srp", "mkd", "kaz", "kir", "tat", "bak", "chv", "tgk", "mon")},
+    **{code: frozenset({"arabic"}) for code in ("ara", "fas", "urd", "pus", "uig", "ckb", "arz")},
+    **{code: frozenset({"latin"}) for code in (
+        "eng", "fra", "deu", "spa", "ita", "por", "nld", "pol", "swe", "nor", "nob", "nno", "dan", "fin", "isl",
+        "ces", "slk", "hun", "ron", "tur", "vie", "ind", "msa", "zsm", "cat", "eus", "glg", "hrv", "bos", "slv",
+        "est", "lav", "lit", "epo", "lat", "afr", "swa", "tgl", "gle", "cym", "sqi", "aze", "uzb",
+    )},
+}
+
+# ISO 639-1 两字母代码 -> ISO 639-3
+ISO_639_1: Dict[str, str] = {
+    "en": "eng", "zh": "zho", "ja": "jpn", "ko": "kor", "ru": "rus", "uk": "ukr", "fr": "fra", "de": "deu",
+    "es": "spa", "it": "ita", "pt": "por", "nl": "nld", "pl": "pol", "sv": "swe", "no": "nor", "nb": "nob",
+    "da": "dan", "fi": "fin", "cs": "ces", "sk": "slk", "hu": "hun", "ro": "ron", "tr": "tur", "vi": "vie",
+    "id": "ind", "ms": "msa", "ca": "cat", "eu": "eus", "gl": "glg", "hr": "hrv", "sl": "slv", "et": "est",
+    "lv": "lav", "lt": "lit", "eo": "epo", "la": "lat", "el": "ell", "he": "heb", "hi": "hin", "th": "tha",
+    "ar": "ara", "fa": "fas", "ur": "urd", "bg": "bul", "sr": "srp", "be": "bel", "kk": "kaz", "is": "isl",
+}
+
+
+def script_of(char: str) -> Optional[str]:
+    """返回字符所属的书写系统，不属于任何已知区间（数字、标点、空白等）时返回 None。"""
+    codepoint = ord(char)
+    i = bisect.bisect_right(_RANGE_STARTS, codepoint) - 1
+    if i >= 0 and codepoint <= SCRIPT_RANGES[i][1]:
+        return SCRIPT_RANGES[i][2]
+    return None
+
+
+def detect_script(text: str) -> Optional[str]:
+    """
+    按码位区间判断查询所用的书写系统。
+
+    出现假名时判为 "kana"（日文中的汉字不单独决定语言）；否则取出现最多的非拉丁书写系统，
+    没有非拉丁字母时为 "latin"（混合查询如 "Python 编程" 判为 "han"）。
+
+    Returns:
+        str or None: 书写系统名称，查询中没有可识别的字母时返回 None。
+    """
+    counts: Dict[str, int] = {}
+    for char in text:
+        script = script_of(char)
+        if script is not None:
+            counts[script] = counts.get(script, 0) + 1
+    if not counts:
+        return None
+    if "kana" in counts:
+        return "kana"
+    non_latin = {script: count for script, count in counts.items() if script != "latin"}
+    if non_latin:
+        return max(non_latin, key=non_latin.get)
+    return "latin"
+
+
+def normalize_language(code: str) -> str:
+    """把 "en"、"zh-Hans"、"zh_CN"、"ENG" 等语言代码规范化为 ISO 639-3。"""
+    code = re.split(r"[-_]", code.strip().lower(), maxsplit=1)[0]
+    return ISO_639_1.get(code, code)
+
+
+def parse_languages(value: str) -> FrozenSet[str]:
+    """解析逗号分隔的语言列表（如 ZIM 元数据 "eng,fra"），返回规范化后的 ISO 639-3 代码集合。"""
+    return frozenset(normalize_language(part) for part in value.split(",") if part.strip())
+
+
+def language_from_filename(zim_file_path: str) -> str:
+    """从 Kiwix 风格的文件名（如 wikipedia_zh_all_maxi_2025-07.zim）推断语言，无法推断时返回空字符串。"""
+    tokens = os.path.basename(zim_file_path).lower().split("_")
+    if len(tokens) > 1 and re.fullmatch(r"[a-z]{2,3}", tokens[1]):
+        return normalize_language(tokens[1])
+    return ""
+
+
+def matches_script(languages: FrozenSet[str], script: str) -> bool:
+    """档案语言是否使用该书写系统；语言未知的档案总是匹配。"""
+    known = [LANGUAGE_SCRIPTS[language] for language in languages if language in LANGUAGE_SCRIPTS]
+    if not known:
+        return True
+    return any(script in scripts for scripts in known)
@@ -0,0 +1,182 @@
+import os
+import mmap
+import threading
+import struct
+import bisect
+import unicodedata
+from typing import List, Optional, Tuple
+
+from libzim.reader import Archive
+
+# 文件格式：头部 (MAGIC, UUID, 条目数)，偏移表 (条目数 + 1 个 uint64)，记录区。
+# 每条记录为 "规范化标题\0标题\0路径" 的 UTF-8 编码，记录按规范化标题的字节序排列。
+MAGIC = b"WSPXIDX1"
+HEADER = struct.Struct("<8s16sQ")
+OFFSET = struct.Struct("<Q")
+SIDECAR_SUFFIX = ".titles.idx"
+
+
+def normalize_title(title: str) -> str:
+    """标题规范化：NFKC、忽略大小写、下划线视为空格、去除首尾空白。"""
+    return unicodedata.normalize("NFKC", title).replace("_", " ").strip().casefold()
+
+
+class TitlePrefixIndex:
+    """
+    档案标题的前缀索引：按规范化标题排序的数组，通过二分查找定位前缀。
+
+    索引以 sidecar 文件形式保存在 ZIM 文件旁（或 index_dir 中），通过 mmap 加载，
+    重启后无需重建。文件头记录档案 UUID，档案变化后会自动重建。
+    只读查询是线程安全的。
+    """
+
+    def __init__(self, buffer, count: int, close_handle=None):
+        self._buffer = buffer
+        self._count = count
+        self._close_handle = close_handle
+        self._offsets_start = HEADER.size
+        self._records_start = HEADER.size + OFFSET.size * (count + 1)
+
+    def __len__(self) -> int:
+        return self._count
+
+    @classmethod
+    def load_or_build(cls, archive: Archive, zim_file_path: str, index_dir: Optional[str] = None) -> "TitlePrefixIndex":
+        """
+        加载档案的 sidecar 索引；不存在或 UUID 不匹配时重新构建并写入。
+        sidecar 无法写入时（如目录只读），索引只保存在内存中。
+
+        Args:
+            archive (Archive): 已打开的档案。
+            zim_file_path (str): ZIM 文件路径，用于确定 sidecar 位置。
+            index_dir (str, optional): sidecar 目录，默认与 ZIM 文件相同。
+
+        Returns:
+            TitlePrefixIndex: 可查询的索引。
+        """
+        sidecar = sidecar_path(zim_file_path, index_dir)
+        index = cls._open_sidecar(sidecar, archive.uuid.bytes)
+        if index is not None:
+            return index
+
+        data = cls.build(archive)
+        try:
+            os.makedirs(os.path.dirname(sidecar) or ".", exist_ok=True)
+            tmp_path = f"{sidecar}.tmp.{os.getpid()}.{threading.get_ident()}"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, sidecar)
+            index = cls._open_sidecar(sidecar, archive.uuid.bytes)
+            if index is not None:
+                return index
+        except OSError as e:
+            print(f"Failed to write title index '{sidecar}', keeping it in memory: {e}")
+        return cls(data, HEADER.unpack_from(data)[2])
+
+    @staticmethod
+    def build(archive: Archive) -> bytes:
+        """
+        遍历档案中的所有条目，构建索引文件内容。
+        收录 HTML 条目和重定向条目（重定向以自身标题收录，路径指向目标条目）。
+        """
+        records = []
+        for entry_id in range(archive.entry_count):
+            try:
+                entry = archive._get_entry_by_id(entry_id)
+                title = entry.title
+                if entry.is_redirect:
+                    path = entry.get_redirect_entry().path
+                elif entry.get_item().mimetype.startswith("text/html"):
+                    path = entry.path
+                else:
+                    continue
+            except Exception:
+                continue
+            key = normalize_title(title)
+            if key:
+                records.append(f"{key}\0{title}\0{path}".encode("utf-8"))
+        records.sort()
+
+        offsets = bytearray()
+        position = 0
+        for record in records:
+            offsets += OFFSET.pack(position)
+            position += len(record)
+        offsets += OFFSET.pack(position)
+        return HEADER.pack(MAGIC, archive.uuid.bytes, len(records)) + bytes(offsets) + b"".join(records)
+
+    def search(self, prefix: str, limit: int = 10) -> List[Tuple[str, str, str]]:
+        """
+        查找规范化标题以 prefix 开头的条目。
+
+        Args:
+            prefix (str): 标题前缀。
+            limit (int): 最多返回的数量。
+
+        Returns:
+            list[tuple]: (规范化标题, 标题, 路径) 组成的列表，按规范化标题排序。
+        """
+        key = normalize_title(prefix).encode("utf-8")
+        if not key or limit <= 0:
+            return []
+
+        keys = _KeyView(self)
+        start = bisect.bisect_left(keys, key)
+        results = []
+        for i in range(start, self._count):
+            record = self._record(i)
+            if not record.startswith(key):
+                break
+            norm, title, path = record.decode("utf-8").split("\0")
+            results.append((norm, title, path))
+            if len(results) >= limit:
+                break
+        return results
+
+    def close(self) -> None:
+        if self._close_handle is not None:
+            self._buffer.close()
+            self._close_handle.close()
+            self._close_handle = None
+
+    def _record(self, i: int) -> bytes:
+        start, end = struct.unpack_from("<QQ", self._buffer, self._offsets_start + OFFSET.size * i)
+        return self._buffer[self._records_start + start:self._records_start + end]
+
+    @classmethod
+    def _open_sidecar(cls, path: str, uuid_bytes: bytes) -> Optional["TitlePrefixIndex"]:
+        if not os.path.isfile(path) or os.path.getsize(path) < HEADER.size:
+            return None
+        f = open(path, "rb")
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            f.close()
+            return None
+        magic, stored_uuid, count = HEADER.unpack_from(buffer)
+        if magic != MAGIC or stored_uuid != uuid_bytes:
+            buffer.close()
+            f.close()
+            return None
+        return cls(buffer, count, close_handle=f)
+
+
+class _KeyView:
+    """把索引记录的规范化标题暴露为可供 bisect 使用的序列。"""
+
+    def __init__(self, index: TitlePrefixIndex):
+        self._index = index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __getitem__(self, i: int) -> bytes:
+        record = self._index._record(i)
+        return record[:record.index(b"\0")]
+
+
+def sidecar_path(zim_file_path: str, index_dir: Optional[str] = None, suffix: str = SIDECAR_SUFFIX) -> str:
+    """返回 ZIM 文件对应的 sidecar 路径，默认为标题索引。"""
+    if index_dir:
+        return os.path.join(index_dir, os.path.basename(zim_file_path) + suffix)
+    return zim_file_path + suffix
@@ -0,0 +1,136 @@
+import sys
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+
+class QueryCache:
+    """
+    搜索结果缓存：(档案, 查询词) -> 档案内的有序条目路径列表。
+
+    以条目数和估算内存双重限制容量，支持 TTL 过期和 LRU 淘汰。
+    缓存键包含档案路径，添加或移除 ZIM 文件时只需失效该档案的条目。
+    所有方法都是线程安全的。
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024, ttl_seconds: float = 600):
+        """
+        初始化 QueryCache。
+
+        Args:
+            max_entries (int): 最多缓存的查询数量，0 表示禁用缓存。
+            max_bytes (int): 缓存路径列表的估算内存上限（字节）。
+            ttl_seconds (float): 缓存条目的存活时间（秒），0 表示永不过期。
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # key -> (写入时间, 路径列表, 是否已取完全部结果, 估算大小)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, List[str], bool, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, archive_key: str, search_term: str, limit: int) -> Optional[List[str]]:
+        """
+        查找缓存的结果。
+
+        Args:
+            archive_key (str): 档案标识（ZIM 文件路径）。
+            search_term (str): 查询词。
+            limit (int): 需要的结果数量。
+
+        Returns:
+            list[str] or None: 最多 limit 个条目路径；缓存未命中或缓存的结果不足时返回 None。
+        """
+        if not self.enabled:
+            return None
+
+        key = (archive_key, search_term)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                stored_at, paths, exhausted, _ = cached
+                if self.ttl_seconds and time.monotonic() - stored_at > self.ttl_seconds:
+                    self._remove(key)
+                elif exhausted or len(paths) >= limit:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return paths[:limit]
+            self.misses += 1
+            return None
+
+    def put(self, archive_key: str, search_term: str, paths: List[str], exhausted: bool) -> None:
+        """
+        写入一个查询的结果。
+
+        Args:
+            archive_key (str): 档案标识（ZIM 文件路径）。
+            search_term (str): 查询词。
+            paths (list[str]): 按档案内排名排列的条目路径。
+            exhausted (bool): paths 是否已包含该查询的全部结果。
+        """
+        if not self.enabled:
+            return
+
+        size = self._estimate_size(search_term, paths)
+        if size > self.max_bytes:
+            return
+
+        key = (archive_key, search_term)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic(), list(paths), exhausted, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate_archive(self, archive_key: str) -> int:
+        """
+        移除某个档案的所有缓存条目。
+
+        Returns:
+            int: 被移除的条目数量。
+        """
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == archive_key]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        """清空缓存（不重置计数器）。"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """返回命中/未命中计数及当前容量。"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        _, _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    @staticmethod
+    def _estimate_size(search_term: str, paths: List[str]) -> int:
+        return sys.getsizeof(search_term) + sys.getsizeof(paths) + sum(sys.getsizeof(p) for p in paths)
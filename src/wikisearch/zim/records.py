@@ -0,0 +1,146 @@
+from typing import Any, Dict, Iterator, Optional, Union
+
+
+def iter_chunks(content: Union[bytes, memoryview], chunk_size: int) -> Iterator[memoryview]:
+    """把缓冲区切成 chunk_size 大小的 memoryview 分块，不复制数据。"""
+    view = memoryview(content).cast('B')
+    for start in range(0, len(view), chunk_size):
+        yield view[start:start + chunk_size]
+
+
+class SearchHit:
+    """
+    一条搜索命中：档案、条目路径、标题、大小和 MIME 类型，不包含文章内容。
+
+    由 ZIMSearcher.search_hits 创建，原样经过 WikiSearchAPI、查询缓存和工作进程（可以 pickle），
+    只在响应序列化时通过 to_dict 转换为字典。创建后视为只读，可以在多个请求间共享。
+    """
+
+    __slots__ = ("rank", "archive", "archive_uuid", "path", "title", "size", "mimetype", "snippet")
+
+    def __init__(self, rank: int, archive: str, archive_uuid: str, path: str, title: str = "",
+                 size: Optional[int] = None, mimetype: Optional[str] = None, snippet: Optional[str] = None):
+        self.rank = rank
+        # 档案文件名（不含目录）
+        self.archive = archive
+        self.archive_uuid = archive_uuid
+        self.path = path
+        self.title = title
+        self.size = size
+        self.mimetype = mimetype
+        self.snippet = snippet
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, SearchHit):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"SearchHit(rank={self.rank!r}, archive={self.archive!r}, path={self.path!r}, title={self.title!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """返回响应中的命中字典，包含 rank, archive, path, title, size, mimetype，有片段时附带 snippet。"""
+        hit = {
+            "rank": self.rank,
+            "archive": self.archive,
+            "path": self.path,
+            "title": self.title,
+            "size": self.size,
+            "mimetype": self.mimetype,
+        }
+        if self.snippet is not None:
+            hit["snippet"] = self.snippet
+        return hit
+
+
+class ArticleContent:
+    """
+    一篇文章的内容：档案 UUID、条目路径、标题、MIME 类型、命中方式，以及原始字节或文本形式的正文。
+
+    正文只保存创建时得到的一种形式：从 ZIM 读取时为直接引用 libzim blob 的 memoryview（或缓存中的字节），
+    转换得到的 Markdown 为字符串。另一种形式在第一次访问 body / text 时才生成并保留，
+    因此流式发送原始 HTML 时不会解码，返回 JSON 时不会重新编码。
+    创建后视为只读，可以在合并的请求间共享；并发的第一次访问最多重复一次解码，结果相同。
+    """
+
+    __slots__ = ("archive_uuid", "path", "title", "mimetype", "match", "partial", "_body", "_text")
+
+    def __init__(self, archive_uuid: str, path: str, title: str, mimetype: str, body: Union[bytes, memoryview, str],
+                 match: Optional[str] = None, partial: bool = False):
+        """
+        初始化 ArticleContent。
+
+        Args:
+            archive_uuid (str): 档案的 UUID。
+            path (str): 条目路径（跟随重定向后的路径）。
+            title (str): 条目标题。
+            mimetype (str): 正文的 MIME 类型（含 charset）。
+            body (bytes, memoryview or str): 原始字节或已解码的文本。
+            match (str, optional): 命中方式："title"、"path"、"redirect" 或 "fulltext"。
+            partial (bool): 是否因超时只包含部分内容。
+        """
+        self.archive_uuid = archive_uuid
+        self.path = path
+        self.title = title
+        self.mimetype = mimetype
+        self.match = match
+        self.partial = partial
+        if isinstance(body, str):
+            self._body: Optional[Union[bytes, memoryview]] = None
+            self._text: Optional[str] = body
+        else:
+            self._body = body
+            self._text = None
+
+    def __repr__(self) -> str:
+        return f"ArticleContent(archive_uuid={self.archive_uuid!r}, path={self.path!r}, title={self.title!r}, mimetype={self.mimetype!r})"
+
+    @property
+    def body(self) -> Union[bytes, memoryview]:
+        """正文的原始字节；由文本创建时按 UTF-8 编码。"""
+        if self._body is None:
+            self._body = self._text.encode("utf-8")
+        return self._body
+
+    @property
+    def size(self) -> int:
+        """正文的字节数。"""
+        return memoryview(self.body).nbytes
+
+    @property
+    def text(self) -> str:
+        """
+        正文的文本；由字节创建时按 MIME 类型中的 charset（失败时尝试常见编码）解码。
+
+        Raises:
+            ValueError: 无法解码时抛出。
+        """
+        if self._text is None:
+            # 解码函数位于 zim_searcher，它本身依赖本模块
+            from wikisearch.zim.zim_searcher import decode_content
+
+            text = decode_content(self._body, self.mimetype)
+            if text is None:
+                raise ValueError(f"Failed to decode content of '{self.title}' using {self.mimetype} or common encodings.")
+            self._text = text
+        return self._text
+
+    def chunks(self, chunk_size: int) -> Iterator[memoryview]:
+        """把原始字节切成 chunk_size 大小的 memoryview 分块，用于流式响应。"""
+        return iter_chunks(self.body, chunk_size)
+
+    def to_dict(self, text_key: str = "content") -> Dict[str, Any]:
+        """
+        返回响应中的文章字典，包含 title, archive (UUID), path, match, partial，以及 text_key 下的正文文本。
+
+        Raises:
+            ValueError: 正文无法解码时抛出。
+        """
+        return {
+            "title": self.title,
+            "archive": self.archive_uuid,
+            "path": self.path,
+            text_key: self.text,
+            "match": self.match,
+            "partial": self.partial,
+        }
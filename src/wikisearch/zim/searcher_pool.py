@@ -0,0 +1,160 @@
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from libzim.reader import Archive
+from libzim.search import Searcher
+from libzim.suggestion import SuggestionSearcher
+
+# 一个句柄：(Archive, 基于该 Archive 的 Searcher)
+SearcherHandle = Tuple[Archive, Searcher]
+
+
+def open_handle(zim_file_path: str, archive: Optional[Archive] = None) -> SearcherHandle:
+    """打开一个新的搜索句柄；提供 archive 时复用它，只新建 Searcher。"""
+    archive = archive if archive is not None else Archive(zim_file_path)
+    return archive, Searcher(archive)
+
+
+def open_suggestion_handle(zim_file_path: str, archive: Optional[Archive] = None) -> Tuple[Archive, SuggestionSearcher]:
+    """打开一个新的标题建议句柄 (Archive, SuggestionSearcher)，用作 SearcherPool 的 opener。"""
+    archive = archive if archive is not None else Archive(zim_file_path)
+    return archive, SuggestionSearcher(archive)
+
+
+class SearcherPool:
+    """
+    单个 ZIM 档案的搜索句柄池，最多持有 size 个 (Archive, Searcher) 句柄。
+
+    线程安全约定：
+    - 同一时刻一个句柄只会被一个线程借出，借出期间该线程可以独占使用句柄中的
+      Searcher 以及由它产生的 Search 对象和结果迭代器；归还前必须读取完需要的结果。
+    - 所有句柄共享同一个 Archive（libzim 的 Archive 可以被多个线程同时读取），
+      各自创建 Searcher，互不共享搜索状态，因此同一档案上可以有 size 个查询同时执行，无需全局锁；
+      档案只打开一次，句柄不会额外占用文件描述符和 libzim 缓存。
+    - 句柄按需创建，复用构造时传入的 Archive；未传入时第一个句柄打开档案，之后的句柄复用它。
+      池满时 checkout 阻塞等待归还。
+    - checkout/release/close/stats 本身都是线程安全的。
+    """
+
+    def __init__(self, zim_file_path: str, size: int = 4, archive: Optional[Archive] = None,
+                 opener: Optional[Callable[[str, Optional[Archive]], SearcherHandle]] = None):
+        """
+        初始化 SearcherPool。
+
+        Args:
+            zim_file_path (str): ZIM 文件路径。
+            size (int): 句柄数量上限（至少为 1）。
+            archive (Archive, optional): 已打开的档案，所有句柄共享。
+            opener (callable, optional): 创建句柄的函数，默认为 open_handle。
+        """
+        self.zim_file_path = zim_file_path
+        self.size = max(1, size)
+        self._archive = archive
+        self._opener = opener or open_handle
+        self._idle: "queue.LifoQueue[SearcherHandle]" = queue.LifoQueue()
+        self._handles: List[SearcherHandle] = []
+        self._lock = threading.Lock()
+        # 未传入 archive 时串行打开第一个句柄，避免并发创建句柄时重复打开档案
+        self._open_lock = threading.Lock()
+        self._closed = False
+        self.checkouts = 0
+        self.waits = 0
+
+    def acquire(self, timeout: Optional[float] = None) -> SearcherHandle:
+        """
+        借出一个句柄。没有空闲句柄且未达上限时新建一个，否则阻塞等待。
+
+        Args:
+            timeout (float, optional): 最长等待秒数，None 表示一直等待。
+
+        Returns:
+            tuple: (Archive, Searcher) 句柄。
+
+        Raises:
+            RuntimeError: 池已关闭。
+            TimeoutError: 等待超时。
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"Searcher pool for '{self.zim_file_path}' is closed")
+            self.checkouts += 1
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            create = len(self._handles) < self.size
+            if create:
+                # 先占位，避免并发时超出上限；打开档案放在锁外进行
+                self._handles.append(None)
+            else:
+                self.waits += 1
+
+        if create:
+            try:
+                handle = self._open_handle()
+            except Exception:
+                with self._lock:
+                    if None in self._handles:
+                        self._handles.remove(None)
+                raise
+            with self._lock:
+                # close() 可能已清空句柄列表，此时句柄在归还时被丢弃
+                if None in self._handles:
+                    self._handles[self._handles.index(None)] = handle
+            return handle
+
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No searcher available for '{self.zim_file_path}' within {timeout}s")
+
+    def _open_handle(self) -> SearcherHandle:
+        """新建一个共享 Archive 的句柄；还没有 Archive 时由这个句柄打开。"""
+        archive = self._archive
+        if archive is None:
+            with self._open_lock:
+                if self._archive is None:
+                    handle = self._opener(self.zim_file_path, None)
+                    self._archive = handle[0]
+                    return handle
+                archive = self._archive
+        return self._opener(self.zim_file_path, archive)
+
+    def release(self, handle: SearcherHandle) -> None:
+        """归还借出的句柄。池已关闭时直接丢弃。"""
+        with self._lock:
+            if not self._closed:
+                self._idle.put(handle)
+
+    @contextmanager
+    def checkout(self, timeout: Optional[float] = None) -> Iterator[SearcherHandle]:
+        """以上下文管理器的形式借出句柄，退出时自动归还。"""
+        handle = self.acquire(timeout)
+        try:
+            yield handle
+        finally:
+            self.release(handle)
+
+    def close(self) -> None:
+        """关闭池并释放所有句柄的引用，已借出的句柄在归还时被丢弃。"""
+        with self._lock:
+            self._closed = True
+            self._handles.clear()
+            while True:
+                try:
+                    self._idle.get_nowait()
+                except queue.Empty:
+                    break
+
+    def stats(self) -> dict:
+        """返回句柄数量与借出计数。"""
+        with self._lock:
+            return {
+                "size": self.size,
+                "open": sum(1 for handle in self._handles if handle is not None),
+                "idle": self._idle.qsize(),
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+            }
@@ -0,0 +1,64 @@
+import re
+import html
+from typing import List, Optional, Union
+
+# 去掉不可见内容和 <h1> (命中记录中已单独返回标题)，再去掉所有标签
+_INVISIBLE = re.compile(r'<(script|style|head|noscript|h1)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_TAG = re.compile(r'<[^>]*>')
+_SPACE = re.compile(r'\s+')
+_BODY = re.compile(rb'<body[\s>]', re.IGNORECASE)
+
+
+def query_terms(query: str) -> List[str]:
+    """把查询拆成需要高亮的词 (按空白切分，去重，长词优先)。"""
+    terms = {term for term in query.split() if term}
+    return sorted(terms, key=len, reverse=True)
+
+
+def html_to_text(content: Union[bytes, memoryview], scan_bytes: int, charset: Optional[str] = None) -> str:
+    """从 <body> 开始读取最多 scan_bytes 字节的 HTML，按 charset（默认 UTF-8）解码并转换为纯文本。"""
+    view = memoryview(content).cast('B')
+    body = _BODY.search(view)
+    start = body.start() if body else 0
+    # 截断处不完整的字符被忽略
+    try:
+        chunk = str(view[start:start + scan_bytes], charset or 'utf-8', errors='ignore')
+    except LookupError:
+        # 无法识别的 charset 按 UTF-8 解码
+        chunk = str(view[start:start + scan_bytes], 'utf-8', errors='ignore')
+    text = _TAG.sub(' ', _INVISIBLE.sub(' ', chunk))
+    return _SPACE.sub(' ', html.unescape(text)).strip()
+
+
+def make_snippet(content: Union[bytes, memoryview], query: str, width: int = 200, scan_bytes: int = 64 * 1024,
+                 charset: Optional[str] = None) -> str:
+    """
+    从文章开头的有限范围内截取包含查询词的上下文片段，并用 ** 高亮查询词。
+
+    只扫描 <body> 之后的前 scan_bytes 字节；范围内找不到查询词时返回正文开头。
+
+    Args:
+        content (bytes or memoryview): 文章的 HTML 内容。
+        query (str): 搜索词。
+        width (int): 片段的最大字符数（不含高亮标记）。
+        scan_bytes (int): 最多扫描的 HTML 字节数。
+        charset (str, optional): HTML 的字符编码（取自 MIME 类型，见 charset_from_mimetype），默认 UTF-8。
+
+    Returns:
+        str: 片段文本，被截断的一端以 "..." 表示。
+    """
+    text = html_to_text(content, scan_bytes, charset)
+    terms = query_terms(query)
+    if not text:
+        return ""
+
+    pattern = re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE) if terms else None
+    first = pattern.search(text) if pattern else None
+    start = max(0, first.start() - width // 3) if first else 0
+    end = min(len(text), start + width)
+    start = max(0, end - width)
+
+    snippet = text[start:end]
+    if pattern:
+        snippet = pattern.sub(lambda m: f"**{m.group(0)}**", snippet)
+    return ("..." if start > 0 else "") + snippet + ("..." if end < len(text) else "")
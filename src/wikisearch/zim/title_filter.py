@@ -0,0 +1,141 @@
+import os
+import mmap
+import math
+import struct
+import hashlib
+import threading
+from typing import Optional
+
+from libzim.reader import Archive
+
+from wikisearch.zim.prefix_index import normalize_title, sidecar_path
+
+# 文件格式：头部 (MAGIC, UUID, 位数, 哈希函数个数, 收录的键数)，之后是位数组。
+MAGIC = b"WSBLOOM1"
+HEADER = struct.Struct("<8s16sQIQ")
+SIDECAR_SUFFIX = ".titles.bloom"
+
+
+def _hashes(key: str):
+    """键的两个 64 位哈希值，用于双重哈希 h1 + i * h2 生成各个位置。"""
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+    h1, h2 = struct.unpack("<QQ", digest)
+    return h1, h2 | 1
+
+
+class TitleFilter:
+    """
+    档案中条目标题与路径的 Bloom 过滤器，用于在精确查找前跳过一定不包含该标题的档案。
+
+    键为规范化后的标题和路径（见 prefix_index.normalize_title），因此覆盖 lookup_title / find_entry
+    尝试的所有形式。判断为不包含时一定不包含；判断为包含时有约 bits_per_key 决定的误判率（10 位约 1%）。
+    过滤器以 sidecar 文件形式保存在 ZIM 文件旁（或 index_dir 中），文件头记录档案 UUID，通过 mmap 加载，
+    加载时不需要打开档案。只读查询是线程安全的。
+    """
+
+    def __init__(self, buffer, num_bits: int, num_hashes: int, count: int, close_handle=None):
+        self._buffer = buffer
+        self._num_bits = num_bits
+        self._num_hashes = num_hashes
+        self._count = count
+        self._close_handle = close_handle
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, title: str) -> bool:
+        key = normalize_title(title)
+        if not key:
+            # 未收录空键，无法排除
+            return True
+        h1, h2 = _hashes(key)
+        buffer, start = self._buffer, HEADER.size
+        for i in range(self._num_hashes):
+            bit = (h1 + i * h2) % self._num_bits
+            if not buffer[start + (bit >> 3)] & (1 << (bit & 7)):
+                return False
+        return True
+
+    @classmethod
+    def load(cls, zim_file_path: str, uuid_bytes: bytes, index_dir: Optional[str] = None) -> Optional["TitleFilter"]:
+        """加载已有的 sidecar 过滤器；不存在、损坏或 UUID 不匹配时返回 None。"""
+        path = sidecar_path(zim_file_path, index_dir, SIDECAR_SUFFIX)
+        if not os.path.isfile(path) or os.path.getsize(path) < HEADER.size:
+            return None
+        f = open(path, "rb")
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            f.close()
+            return None
+        magic, stored_uuid, num_bits, num_hashes, count = HEADER.unpack_from(buffer)
+        if magic != MAGIC or stored_uuid != uuid_bytes or num_bits == 0 or len(buffer) < HEADER.size + (num_bits + 7) // 8:
+            buffer.close()
+            f.close()
+            return None
+        return cls(buffer, num_bits, num_hashes, count, close_handle=f)
+
+    @classmethod
+    def load_or_build(cls, archive: Archive, zim_file_path: str, index_dir: Optional[str] = None,
+                      bits_per_key: int = 10) -> "TitleFilter":
+        """
+        加载档案的 sidecar 过滤器；不存在或 UUID 不匹配时重新构建并写入。
+        sidecar 无法写入时（如目录只读），过滤器只保存在内存中。
+
+        Args:
+            archive (Archive): 已打开的档案。
+            zim_file_path (str): ZIM 文件路径，用于确定 sidecar 位置。
+            index_dir (str, optional): sidecar 目录，默认与 ZIM 文件相同。
+            bits_per_key (int): 每个键占用的位数，越大误判率越低。
+
+        Returns:
+            TitleFilter: 可查询的过滤器。
+        """
+        title_filter = cls.load(zim_file_path, archive.uuid.bytes, index_dir)
+        if title_filter is not None:
+            return title_filter
+
+        data = cls.build(archive, bits_per_key)
+        sidecar = sidecar_path(zim_file_path, index_dir, SIDECAR_SUFFIX)
+        try:
+            os.makedirs(os.path.dirname(sidecar) or ".", exist_ok=True)
+            tmp_path = f"{sidecar}.tmp.{os.getpid()}.{threading.get_ident()}"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, sidecar)
+            title_filter = cls.load(zim_file_path, archive.uuid.bytes, index_dir)
+            if title_filter is not None:
+                return title_filter
+        except OSError as e:
+            print(f"Failed to write title filter '{sidecar}', keeping it in memory: {e}")
+        _, _, num_bits, num_hashes, count = HEADER.unpack_from(data)
+        return cls(data, num_bits, num_hashes, count)
+
+    @staticmethod
+    def build(archive: Archive, bits_per_key: int = 10) -> bytes:
+        """遍历档案中的所有条目，收录规范化的标题和路径，构建过滤器文件内容。"""
+        keys = set()
+        for entry_id in range(archive.entry_count):
+            try:
+                entry = archive._get_entry_by_id(entry_id)
+                keys.add(normalize_title(entry.title))
+                keys.add(normalize_title(entry.path))
+            except Exception:
+                continue
+        keys.discard("")
+
+        num_bits = max(64, len(keys) * bits_per_key)
+        num_hashes = max(1, round(bits_per_key * math.log(2)))
+        bits = bytearray((num_bits + 7) // 8)
+        for key in keys:
+            h1, h2 = _hashes(key)
+            for i in range(num_hashes):
+                bit = (h1 + i * h2) % num_bits
+                bits[bit >> 3] |= 1 << (bit & 7)
+        return HEADER.pack(MAGIC, archive.uuid.bytes, num_bits, num_hashes, len(keys)) + bytes(bits)
+
+    def close(self) -> None:
+        if self._close_handle is not None:
+            self._buffer.close()
+            self._close_handle.close()
+            self._close_handle = None
@@ -1,23 +1,56 @@
 import os
 import json
+import uuid
 import pickle
 import re
+import heapq
+import itertools
+import threading
+import time
+import functools
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from pathlib import Path
-from typing import List, Dict, Optional,Tuple
+from typing import FrozenSet, List, Dict, Optional, Sequence, Tuple
 from libzim.reader import Archive
-from libzim.search import Query, Searcher
+from libzim.search import Query
 from wikisearch.config import config
+from wikisearch.zim.query_cache import QueryCache
+from wikisearch.zim.prefix_index import TitlePrefixIndex, normalize_title
+from wikisearch.zim.title_filter import TitleFilter
+from wikisearch.zim.snippet import make_snippet
+from wikisearch.zim.records import ArticleContent, SearchHit
+from wikisearch.zim.searcher_pool import SearcherPool, open_suggestion_handle
+from wikisearch.zim.archive_manager import ArchiveManager, ArchiveView, read_zim_uuid
+from wikisearch.zim.warmup import advise_willneed
+from wikisearch.zim.language import detect_script, language_from_filename, matches_script, parse_languages
+from wikisearch.deadline import Deadline, expired, remaining
 
 DEFAULT_ZIM_FILE_PATH=config.ZIM_FILE_PATH
 
 
+def _archive_session(method):
+    """在档案会话中执行请求（见 ArchiveManager.session）：每个档案在请求内只取得一次，请求结束前不会被淘汰。"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.archives.session():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 class ZIMSearcher:
     """
     用于搜索 ZIM 文件并检索条目 HTML 内容的类。
     支持处理单个 ZIM 文件，并可以动态切换或同时管理多个文件。
     """
 
-    def __init__(self, zim_file_path: Optional[str] = None):
+    # 每个档案每次搜索至少取出的结果数量，多出的部分写入查询缓存
+    RESULT_PREFETCH = 20
+    # 解析重定向时最多跟随的次数
+    MAX_REDIRECTS = 8
+
+    def __init__(self, zim_file_path: Optional[str] = None, max_workers: Optional[int] = None,
+                 predecessor: Optional["ZIMSearcher"] = None):
         """
         初始化 ZIMSearcher。
 
@@ -25,11 +58,62 @@ class ZIMSearcher:
             zim_file_path (str, optional): ZIM 文件的路径。
                                        如果未提供，则使用配置中的默认路径。
                                        如果为列表，则打开多个 ZIM 文件。
+            max_workers (int, optional): 多 ZIM 并行搜索的线程数。
+                                       如果未提供，则使用配置中的 WIKI_SEARCH_WORKERS。
+            predecessor (ZIMSearcher, optional): 被新搜索器取代的搜索器（见 derive），
+                                       两者都包含的档案复用其已打开的档案、前缀索引和查询缓存。
         """
         self.default_zim_paths: List[str] = []
-        self.current_zim_paths: List[str] = []
-        self.zim_archives: List[Archive] = []
-        self.searchers: List[Searcher] = []
+        # 档案管理：登记的档案都会被搜索，最多 WIKI_MAX_OPEN_ARCHIVES 个保持打开（0 表示全部打开）
+        self.searchers_per_archive: int = config.WIKI_SEARCHERS_PER_ARCHIVE
+        self.archives = ArchiveManager(
+            max_open=config.WIKI_MAX_OPEN_ARCHIVES,
+            searchers_per_archive=self.searchers_per_archive,
+            on_open=self._on_archive_open,
+            on_close=self._drop_suggesters,
+        )
+        self.current_zim_paths: List[str] = self.archives.paths
+        self.archive_uuids: List[str] = self.archives.uuids
+        # 按下标访问 Archive 和搜索句柄池（每个档案一个池，同一档案上的查询可以并发执行），访问时按需打开
+        self.zim_archives: Sequence[Archive] = ArchiveView(self.archives, 0)
+        self.searcher_pools: Sequence[SearcherPool] = ArchiveView(self.archives, 1)
+        self.max_workers: Optional[int] = max_workers or config.WIKI_SEARCH_WORKERS or None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # 全文搜索前是否先按标题/路径精确查找
+        self.title_fast_path: bool = config.WIKI_TITLE_FAST_PATH
+        # 跨档案去重：档案 UUID -> (日期, 版本)，以及重复时的档案优先规则
+        self.dedup: bool = config.WIKI_DEDUP
+        self.archive_preference: List[str] = [rule.strip() for rule in config.WIKI_ARCHIVE_PREFERENCE.split(",") if rule.strip()]
+        self._archive_traits: Dict[str, Tuple[str, str]] = {}
+        # 档案元数据：UUID -> archive_info()，在档案打开时收集一次
+        self._archive_info: Dict[str, Dict] = {}
+        # 标题建议：按档案 UUID 的前缀索引，缺少时在第一次建议后或预热时由后台线程构建（每个档案最多一次）；
+        # 构建完成前以及未启用前缀索引时使用 libzim SuggestionSearcher，它不能被多个线程同时使用，
+        # 因此每个打开的档案一个句柄池，与全文搜索相同
+        self.use_prefix_index: bool = config.WIKI_PREFIX_INDEX
+        self._prefix_indexes: Dict[str, TitlePrefixIndex] = {}
+        self._prefix_index_builds: Dict[str, Future] = {}
+        self._prefix_index_executor: Optional[ThreadPoolExecutor] = None
+        self._suggestion_pools: Dict[str, SearcherPool] = {}
+        self._suggest_lock = threading.Lock()
+        # 精确查找前的标题过滤器：档案 UUID -> TitleFilter，登记时加载已有的 sidecar；
+        # 缺少的在档案第一次打开后或预热时由后台线程构建（每个档案最多一次），构建完成前该档案不经过滤
+        self.use_title_filter: bool = config.WIKI_TITLE_FILTER
+        self._title_filters: Dict[str, TitleFilter] = {}
+        self._title_filter_builds: Dict[str, Future] = {}
+        self._title_filter_executor: Optional[ThreadPoolExecutor] = None
+        self._title_filter_lock = threading.Lock()
+        self.title_filter_probes = 0
+        self.title_filter_skips = 0
+        # 查询结果缓存：(档案, 查询词) -> 有序路径列表
+        if predecessor is not None:
+            self.query_cache = predecessor.query_cache
+        else:
+            self.query_cache = QueryCache(
+                max_entries=config.WIKI_QUERY_CACHE_SIZE,
+                max_bytes=config.WIKI_QUERY_CACHE_MAX_BYTES,
+                ttl_seconds=config.WIKI_QUERY_CACHE_TTL,
+            )
 
         # 处理初始化时提供的路径（单个或多个）
         initial_paths = []
@@ -38,12 +122,57 @@ class ZIMSearcher:
         elif isinstance(zim_file_path, (list, tuple)):
             initial_paths = list(zim_file_path)
         # 如果 zim_file_path 为 None 或其他情况，则使用默认路径
-        if not initial_paths:
+        if not initial_paths and predecessor is None:
             initial_paths = [DEFAULT_ZIM_FILE_PATH]
 
         # 打开初始 ZIM 文件
         for path in initial_paths:
-            self.add_zim(path)
+            if predecessor is None or not self._adopt(predecessor, path):
+                self.add_zim(path)
+
+    def derive(self, zim_file_paths: List[str]) -> "ZIMSearcher":
+        """
+        创建覆盖 zim_file_paths 的新搜索器，当前搜索器保持不变，可继续服务已开始的查询。
+        两者都包含的档案共享已打开的 Archive、搜索句柄池、前缀索引和查询缓存，只有新增的档案需要打开。
+        当前搜索器不再使用后应调用 release(新搜索器) 关闭新搜索器中不存在的档案。
+
+        Args:
+            zim_file_paths (list[str]): 新搜索器的 ZIM 文件路径。
+
+        Returns:
+            ZIMSearcher: 新的搜索器。
+        """
+        successor = ZIMSearcher(list(zim_file_paths), max_workers=self.max_workers, predecessor=self)
+        for path in self.current_zim_paths:
+            if path not in successor.current_zim_paths:
+                self.query_cache.invalidate_archive(path)
+        return successor
+
+    def _adopt(self, predecessor: "ZIMSearcher", zim_file_path: str) -> bool:
+        """复用 predecessor 中同一档案（路径与 UUID 均相同）的资源；文件已被替换或不存在时返回 False。"""
+        if zim_file_path not in predecessor.current_zim_paths:
+            return False
+        archive_uuid = predecessor.archive_uuids[predecessor.current_zim_paths.index(zim_file_path)]
+        try:
+            if read_zim_uuid(zim_file_path) != archive_uuid:
+                return False
+            self.archives.add(zim_file_path, opened=predecessor.archives.peek(archive_uuid))
+        except Exception as e:
+            print(f"Failed to reuse ZIM file '{zim_file_path}': {e}")
+            return False
+        self._archive_traits[archive_uuid] = predecessor._archive_traits.get(archive_uuid) or archive_traits(None, zim_file_path)
+        if archive_uuid in predecessor._archive_info:
+            self._archive_info[archive_uuid] = predecessor._archive_info[archive_uuid]
+        prefix_index = predecessor._prefix_indexes.get(archive_uuid)
+        if prefix_index is not None:
+            self._prefix_indexes[archive_uuid] = prefix_index
+        title_filter = predecessor._title_filters.get(archive_uuid)
+        if title_filter is not None:
+            self._title_filters[archive_uuid] = title_filter
+        elif self.use_title_filter and predecessor.archives.is_open(archive_uuid):
+            # 已打开的档案在新搜索器中不会再触发 _on_archive_open
+            self._start_title_filter(zim_file_path, archive_uuid)
+        return True
 
     def add_zim(self, zim_file_path: str) -> bool:
         """
@@ -64,14 +193,18 @@ class ZIMSearcher:
             return True
 
         try:
-            archive = Archive(zim_file_path)
-            searcher = Searcher(archive) # 为每个 Archive 创建一个 Searcher
-            
-            self.zim_archives.append(archive)
-            self.searchers.append(searcher)
-            self.current_zim_paths.append(zim_file_path)
-            
-            print(f"Successfully added ZIM file: {zim_file_path} (Article count: {archive.article_count})")
+            # 懒加载时档案的日期/版本先从文件名推断，打开后用元数据更新
+            archive_uuid = self.archives.add(zim_file_path)
+            self._archive_traits.setdefault(archive_uuid, archive_traits(None, zim_file_path))
+            if self.use_title_filter and archive_uuid not in self._title_filters:
+                # 已有的 sidecar 不需要打开档案即可加载，懒加载的档案也能被跳过
+                title_filter = TitleFilter.load(zim_file_path, uuid.UUID(archive_uuid).bytes, config.WIKI_INDEX_DIR or None)
+                if title_filter is not None:
+                    self._title_filters[archive_uuid] = title_filter
+            self.query_cache.invalidate_archive(zim_file_path)
+
+            if self.archives.lazy:
+                print(f"Successfully added ZIM file: {zim_file_path} (opened on first use)")
             return True
         except Exception as e:
             print(f"Failed to add ZIM file '{zim_file_path}': {e}")
@@ -92,125 +225,1068 @@ class ZIMSearcher:
             return False
 
         try:
-            index = self.current_zim_paths.index(zim_file_path)
-            # 移除引用，让 Python 垃圾回收处理
-            del self.zim_archives[index]
-            del self.searchers[index]
-            del self.current_zim_paths[index]
+            # 关闭档案并移除引用，正在使用它的查询结束后由 Python 垃圾回收处理
+            archive_uuid = self.archives.remove(zim_file_path)
+            self._drop_suggesters(archive_uuid)
+            self._archive_traits.pop(archive_uuid, None)
+            self._archive_info.pop(archive_uuid, None)
+            with self._title_filter_lock:
+                title_filter = self._title_filters.pop(archive_uuid, None)
+                self._title_filter_builds.pop(archive_uuid, None)
+            if title_filter is not None:
+                title_filter.close()
+            self.query_cache.invalidate_archive(zim_file_path)
             print(f"Successfully removed ZIM file: {zim_file_path}")
             return True
         except Exception as e:
             print(f"Failed to remove ZIM file '{zim_file_path}': {e}")
             return False
 
-    def search_and_get_html(self, search_term: str, result_index: int = 0) -> Tuple[bool, str, Optional[str], Optional[str]]:
+    def _on_archive_open(self, zim_file_path: str, archive_uuid: str, archive: Archive) -> None:
+        """档案被打开时收集其元数据，并读取日期/版本。"""
+        if archive_uuid not in self._archive_info:
+            self._archive_info[archive_uuid] = archive_info(archive, zim_file_path)
+        self._archive_traits[archive_uuid] = archive_traits(archive, zim_file_path)
+        print(f"Opened ZIM file: {zim_file_path} (Article count: {archive.article_count})")
+        if self.use_title_filter:
+            self._start_title_filter(zim_file_path, archive_uuid)
+
+    def build_title_filters(self, wait: bool = False) -> int:
         """
-        根据搜索词在所有已添加的 ZIM 文件中搜索，并获取第一个匹配条目的 HTML 内容。
+        为所有缺少标题过滤器的档案安排后台构建（已有 sidecar 时直接加载）。
 
         Args:
-            search_term (str): 要搜索的关键词。
-            result_index (int): 要获取的搜索结果的索引（默认第一个）。
-                           注意：此参数在多ZIM场景下可能需要更复杂的逻辑来确定全局第N个结果。
+            wait (bool): 是否等待全部构建完成。
 
         Returns:
-            tuple: (成功标志 (bool), 标题 (str), HTML 内容 (str 或 None), 错误信息 (str 或 None))
-                   - 如果成功：(True, title, html_content_str, None)
-                   - 如果失败：(False, "", None, error_message)
-                   返回的是在所有 ZIM 文件中找到的第一个匹配项。
+            int: 当前已加载的过滤器数量。
         """
-        if not self.zim_archives:
-            return False, "", None, "No ZIM archives are open."
+        if not self.use_title_filter:
+            return 0
+        builds = [self._start_title_filter(path, archive_uuid)
+                  for path, archive_uuid in zip(self.current_zim_paths.copy(), self.archive_uuids.copy())]
+        if wait:
+            for future in builds:
+                if future is not None and not future.cancelled():
+                    future.exception()
+        with self._title_filter_lock:
+            return len(self._title_filters)
+
+    def _start_title_filter(self, zim_file_path: str, archive_uuid: str) -> Optional[Future]:
+        """在后台线程中构建档案的标题过滤器，不阻塞当前请求；已加载或已安排构建时不重复构建。"""
+        with self._title_filter_lock:
+            if archive_uuid in self._title_filters:
+                return None
+            future = self._title_filter_builds.get(archive_uuid)
+            if future is None:
+                if self._title_filter_executor is None:
+                    self._title_filter_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="zim-title-filter")
+                future = self._title_filter_executor.submit(self._build_title_filter, zim_file_path, archive_uuid)
+                self._title_filter_builds[archive_uuid] = future
+            return future
 
+    def _build_title_filter(self, zim_file_path: str, archive_uuid: str) -> None:
         try:
-            # 遍历所有已打开的 ZIM 文件进行搜索
-            for i, (archive, searcher) in enumerate(zip(self.zim_archives, self.searchers)):
-                # print(f"Searching in ZIM '{self.current_zim_paths[i]}' for term: '{search_term}' ...")
-                
-                query = Query().set_query(search_term)
+            # 使用单独打开的 Archive，构建期间档案管理器可以照常淘汰该档案
+            archive = Archive(zim_file_path)
+            if str(archive.uuid) != archive_uuid:
+                print(f"ZIM file '{zim_file_path}' was replaced, skipping its title filter.")
+                return
+            title_filter = TitleFilter.load_or_build(
+                archive, zim_file_path, config.WIKI_INDEX_DIR or None, config.WIKI_TITLE_FILTER_BITS
+            )
+        except Exception as e:
+            print(f"Failed to build title filter for '{zim_file_path}': {e}")
+            return
+        with self._title_filter_lock:
+            # 构建期间档案可能已被移除或搜索器已关闭
+            if archive_uuid in self.archive_uuids and archive_uuid not in self._title_filters:
+                self._title_filters[archive_uuid] = title_filter
+                return
+        title_filter.close()
+
+    def _stop_title_filter_builds(self) -> None:
+        """取消尚未开始的过滤器构建；正在进行的构建完成后发现档案已注销，会自行关闭结果。"""
+        with self._title_filter_lock:
+            executor, self._title_filter_executor = self._title_filter_executor, None
+            self._title_filter_builds.clear()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def title_filter_stats(self) -> Dict[str, int]:
+        """返回已加载的标题过滤器数量、正在构建的数量，以及查询过滤器和因此跳过档案的次数。"""
+        with self._title_filter_lock:
+            return {
+                "filters": len(self._title_filters),
+                "building": sum(not future.done() for future in self._title_filter_builds.values()),
+                "probes": self.title_filter_probes,
+                "skipped": self.title_filter_skips,
+            }
+
+    def _may_contain_title(self, archive_index: int, title: str) -> bool:
+        """档案是否可能包含该标题或路径；没有过滤器（或尚未构建完成）时总是返回 True。被排除的档案不会被打开。"""
+        title_filter = self._title_filters.get(self.archive_uuids[archive_index])
+        if title_filter is None:
+            return True
+        contained = title in title_filter
+        with self._title_filter_lock:
+            self.title_filter_probes += 1
+            if not contained:
+                self.title_filter_skips += 1
+        return contained
+
+    def _search_archive(self, archive_index: int, search_term: str, limit: int) -> List[Tuple[int, int, str]]:
+        """
+        在单个 ZIM 文件中执行全文搜索，返回前 limit 个结果。
+
+        Args:
+            archive_index (int): 档案在 self.zim_archives 中的下标。
+            search_term (str): 要搜索的关键词。
+            limit (int): 最多返回的结果数量。
+
+        Returns:
+            list[tuple]: (档案内排名, 档案下标, 条目路径) 组成的列表，按排名升序。
+        """
+        zim_path = self.current_zim_paths[archive_index]
+        paths = self.query_cache.get(zim_path, search_term, limit)
+        if paths is None:
+            query = Query().set_query(search_term)
+            # 多取一些结果写入缓存，按 index=0,1,2... 翻页时可以直接命中
+            fetch = max(limit, self.RESULT_PREFETCH) if self.query_cache.enabled else limit
+            with self.searcher_pools[archive_index].checkout() as (_, searcher):
                 search = searcher.search(query)
                 estimated_matches = search.getEstimatedMatches()
-                # print(f"Estimated matches in '{self.current_zim_paths[i]}': {estimated_matches}")
-
                 if estimated_matches > 0:
-                    if result_index >= estimated_matches:
-                        # 如果当前 ZIM 文件的结果不够，则继续下一个 ZIM 文件
-                        # print(f"Requested index {result_index} out of range in '{self.current_zim_paths[i]}'. Checking next ZIM...")
-                        continue
+                    paths = list(search.getResults(0, min(fetch, estimated_matches)))
+                else:
+                    paths = []
+            self.query_cache.put(zim_path, search_term, paths, exhausted=len(paths) < fetch)
+        return [(rank, archive_index, path) for rank, path in enumerate(paths[:limit])]
+
+    def search_ranked(self, search_term: str, limit: int, deadline: Optional[Deadline] = None,
+                      archives: Optional[Sequence[str]] = None) -> List[Tuple[int, str]]:
+        """
+        并行搜索所有已添加的 ZIM 文件，并将各档案的结果合并为一个全局排名列表。
+
+        libzim 的 Python 绑定不暴露 Xapian 的相关度分数，因此以档案内排名作为相关度：
+        各档案的有序结果按 (排名, 档案顺序) 做堆归并，同一排名的结果按档案加载顺序排列。
+
+        Args:
+            search_term (str): 要搜索的关键词。
+            limit (int): 全局结果列表的最大长度。
+            deadline (Deadline, optional): 截止时间，超时未返回的档案被跳过。
+            archives (list[str], optional): 只搜索这些档案 (UUID)，默认搜索全部档案（见 route）。
+
+        Returns:
+            list[tuple]: (档案下标, 条目路径) 组成的列表，下标即全局排名。
+        """
+        return self.search_ranked_partial(search_term, limit, deadline, archives)[0]
+
+    @_archive_session
+    def search_ranked_partial(self, search_term: str, limit: int, deadline: Optional[Deadline] = None,
+                              archives: Optional[Sequence[str]] = None) -> Tuple[List[Tuple[int, str]], bool]:
+        """
+        与 search_ranked 相同，同时返回结果是否因超时而不完整。
+
+        Returns:
+            tuple: ((档案下标, 条目路径) 列表, 是否为部分结果)
+        """
+        archive_indices = self._archive_indices(archives)
+        if limit <= 0 or not archive_indices:
+            return [], False
+
+        partial = False
+        if len(archive_indices) == 1:
+            if expired(deadline):
+                return [], True
+            per_archive = [self._search_archive(archive_indices[0], search_term, limit)]
+        else:
+            executor = self._get_executor()
+            # 每个任务在请求上下文的副本中执行，共享本请求的档案会话
+            futures = [executor.submit(contextvars.copy_context().run, self._search_archive, i, search_term, limit)
+                       for i in archive_indices]
+            per_archive = []
+            for i, future in zip(archive_indices, futures):
+                try:
+                    per_archive.append(future.result(timeout=remaining(deadline)))
+                except FutureTimeoutError:
+                    # 超时的档案被放弃，尚未开始的查询不再执行
+                    future.cancel()
+                    partial = True
+                    print(f"Search in '{self.current_zim_paths[i]}' exceeded the deadline, skipped.")
+                except Exception as e:
+                    # 单个档案失败不影响其他档案的结果
+                    print(f"Search failed in '{self.current_zim_paths[i]}': {e}")
+
+        merged = heapq.merge(*per_archive)
+        if self.dedup and len(per_archive) > 1:
+            ranked, truncated = self._dedup_ranked(merged, limit, deadline)
+            return ranked, partial or truncated
+        return [(archive_index, path) for _, archive_index, path in itertools.islice(merged, limit)], partial
+
+    def _dedup_ranked(self, merged, limit: int, deadline: Optional[Deadline] = None) -> Tuple[List[Tuple[int, str]], bool]:
+        """
+        合并多个档案中的同一篇文章（规范化标题相同，重定向按目标条目的标题计算）。
+
+        每组重复结果保留最先出现的排名位置，实际使用的档案按 archive_preference 选择。
+        只读取目录项获取标题，不读取条目内容。
+
+        Args:
+            merged: 按全局排名排列的 (排名, 档案下标, 路径) 迭代器。
+            limit (int): 去重后结果列表的最大长度。
+            deadline (Deadline, optional): 截止时间，超时后停止读取目录项。
+
+        Returns:
+            tuple: (去重后的 (档案下标, 条目路径) 列表, 是否因超时而不完整)
+        """
+        groups: Dict[str, Tuple[int, str]] = {}
+        order: List[str] = []
+        for _, archive_index, path in merged:
+            if expired(deadline):
+                return [groups[key] for key in order], True
+            key = self._dedup_key(archive_index, path)
+            if key not in groups:
+                if len(order) >= limit:
+                    continue
+                groups[key] = (archive_index, path)
+                order.append(key)
+            elif self._preference_key(archive_index) < self._preference_key(groups[key][0]):
+                groups[key] = (archive_index, path)
+        return [groups[key] for key in order], False
+
+    def _dedup_key(self, archive_index: int, path: str) -> str:
+        try:
+            entry = self.zim_archives[archive_index].get_entry_by_path(path)
+            if entry.is_redirect:
+                entry = entry.get_redirect_entry()
+            return normalize_title(entry.title) or path
+        except Exception:
+            # 无法读取标题时按档案和路径区分，不参与去重
+            return f"{archive_index}:{path}"
+
+    def _preference_key(self, archive_index: int) -> Tuple:
+        """
+        档案的优先级排序键，越小越优先。
+        按 archive_preference 中的规则依次比较："newest" 日期较新者优先，"pic" 含图版本优先；
+        最后按加载顺序。
+        """
+        date, flavour = self._archive_traits[self.archive_uuids[archive_index]]
+        key = []
+        for rule in self.archive_preference:
+            if rule == "newest":
+                key.append(tuple(-int(part) for part in re.findall(r"\d+", date)))
+            elif rule == "pic":
+                key.append(-FLAVOUR_PICTURE_RANK.get(flavour, 1))
+        key.append(archive_index)
+        return tuple(key)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """按需创建用于并行搜索的线程池。"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="zim-search")
+        return self._executor
+
+    def _get_entry_content(self, archive_index: int, path: str) -> Tuple[bool, str, Optional[memoryview], Optional[str], Optional[str]]:
+        """
+        读取指定档案中某个文本条目的原始内容，不复制、不解码。
+
+        Args:
+            archive_index (int): 档案在 self.zim_archives 中的下标。
+            path (str): 条目路径。
+
+        Returns:
+            tuple: (成功标志 (bool), 标题 (str), 内容 (memoryview 或 None), MIME 类型 (str 或 None), 错误信息 (str 或 None))
+                   内容直接引用 libzim 的 blob，在 memoryview 存活期间有效。
+        """
+        archive = self.zim_archives[archive_index]
+        zim_path = self.current_zim_paths[archive_index]
+
+        try:
+            entry = archive.get_entry_by_path(path)
+        except Exception as entry_e:
+            return False, "", None, None, f"Failed to get entry by path '{path}' in '{zim_path}': {entry_e}"
+
+        title = entry.title
+
+        try:
+            item = entry.get_item()
+        except Exception as item_e:
+            return False, title, None, None, f"Failed to get item for entry '{path}' in '{zim_path}': {item_e}"
+
+        if not item.mimetype.startswith('text/'):
+            return False, title, None, item.mimetype, f"Entry content is not text type in '{zim_path}', MIME type: {item.mimetype}"
+
+        try:
+            content = item.content
+        except Exception as content_e:
+            return False, title, None, item.mimetype, f"Failed to get content bytes for entry '{path}' in '{zim_path}': {content_e}"
+
+        return True, title, content, item.mimetype, None
+
+    def _get_entry_html(self, archive_index: int, path: str) -> Tuple[bool, str, Optional[str], Optional[str]]:
+        """
+        读取指定档案中某个条目的 HTML 内容并解码为字符串。
+
+        Args:
+            archive_index (int): 档案在 self.zim_archives 中的下标。
+            path (str): 条目路径。
+
+        Returns:
+            tuple: (成功标志 (bool), 标题 (str), HTML 内容 (str 或 None), 错误信息 (str 或 None))
+        """
+        success, title, content, mimetype, error = self._get_entry_content(archive_index, path)
+        if not success:
+            return False, title, None, error
+
+        html_content_str = decode_content(content, mimetype)
+        if html_content_str is None:
+            return False, title, None, f"Failed to decode content (size: {len(content)} bytes) in '{self.current_zim_paths[archive_index]}' using {mimetype} or common encodings."
+
+        return True, title, html_content_str, None
+
+    @_archive_session
+    def search_hits(self, search_term: str, offset: int = 0, limit: int = 10, snippets: bool = False,
+                    deadline: Optional[Deadline] = None, archives: Optional[Sequence[str]] = None) -> Tuple[List[SearchHit], bool, bool]:
+        """
+        返回全局排名 [offset, offset + limit) 内的轻量级命中记录，默认不读取条目内容。
+
+        Args:
+            search_term (str): 要搜索的关键词。
+            offset (int): 起始的全局排名。
+            limit (int): 最多返回的命中数量。
+            snippets (bool): 是否为 HTML 命中附加高亮查询词的上下文片段。
+                             片段取自文章开头的有限范围，需要读取条目内容。
+            deadline (Deadline, optional): 截止时间。超时后不再等待未返回的档案，也不再读取后续命中，
+                             返回已得到的命中并标记为部分结果。
+            archives (list[str], optional): 只搜索这些档案 (UUID)，默认搜索全部档案。
+
+        Returns:
+            tuple: (命中列表 (list[SearchHit]), 是否还有更多结果, 是否为部分结果)
+                   snippets 为 True 时 HTML 命中的 snippet 为上下文片段，否则为 None。
+        """
+        archive_indices = self._archive_indices(archives)
+        if not archive_indices or limit <= 0:
+            return [], False, False
+
+        partial = False
+
+        # 多排一名用于判断是否还有下一页，但不读取它的条目；
+        # 单个档案的后续页同样经过 _search_archive，共用查询缓存
+        ranked, partial = self.search_ranked_partial(search_term, offset + limit + 1, deadline, archives)
+        ranked = ranked[offset:]
+        # 有档案超时被跳过时，后面可能还有结果
+        has_more = len(ranked) > limit or partial
+
+        hits = []
+        for rank, (archive_index, path) in enumerate(ranked[:limit], start=offset):
+            if expired(deadline):
+                # 剩余命中留给下一页
+                partial = has_more = True
+                break
+            hit = SearchHit(rank, os.path.basename(self.current_zim_paths[archive_index]), self.archive_uuids[archive_index], path)
+            try:
+                entry = self.zim_archives[archive_index].get_entry_by_path(path)
+                hit.title = entry.title
+                # get_item 只读取目录项和簇信息，不会解压内容
+                item = entry.get_item()
+                hit.size = item.size
+                hit.mimetype = item.mimetype
+                if snippets and item.mimetype.startswith("text/html"):
+                    hit.snippet = make_snippet(item.content, search_term, scan_bytes=config.WIKI_SNIPPET_SCAN_BYTES,
+                                               charset=charset_from_mimetype(item.mimetype))
+            except Exception as e:
+                print(f"Failed to read hit '{path}' in '{self.current_zim_paths[archive_index]}': {e}")
+            hits.append(hit)
+        return hits, has_more, partial
+
+    @_archive_session
+    def lookup_title(self, search_term: str, archives: Optional[Sequence[str]] = None) -> Optional[Tuple[int, str, str]]:
+        """
+        把搜索词当作条目标题或路径，在所有档案中直接查找（不经过全文搜索），并解析重定向。
+
+        按档案优先级（WIKI_ARCHIVE_PREFERENCE，与全文搜索去重和 find_entry 一致）依次尝试 get_entry_by_title 和 get_entry_by_path，
+        路径会同时尝试原样和空格替换为下划线的形式。启用 WIKI_TITLE_FILTER 时先用标题过滤器跳过一定不包含该标题的档案。
+
+        Args:
+            search_term (str): 搜索词。
+            archives (list[str], optional): 只在这些档案 (UUID) 中查找，默认查找全部档案。
 
-                    # 获取指定索引的结果路径
-                    results_set = search.getResults(result_index, 1)
-                    path_list = list(results_set)
-                    if not path_list:
-                        # print(f"Failed to retrieve path for result index {result_index} in '{self.current_zim_paths[i]}'. Checking next ZIM...")
-                        continue # 尝试下一个 ZIM 文件
-                
-                    path = path_list[0]
-                    # print(f"Found result in '{self.current_zim_paths[i]}', path: {path}")
-
-                    # 获取条目和内容
+        Returns:
+            tuple or None: (档案下标, 最终条目路径, 命中方式)，命中方式为 "title"、"path" 或 "redirect"；
+                           未命中时返回 None。
+        """
+        term = search_term.strip()
+        if not term:
+            return None
+
+        candidate_paths = [term]
+        if " " in term:
+            candidate_paths.append(term.replace(" ", "_"))
+
+        for archive_index in sorted(self._archive_indices(archives), key=self._preference_key):
+            if not self._may_contain_title(archive_index, term):
+                continue
+            archive = self.zim_archives[archive_index]
+            entry = None
+            match = "title"
+            try:
+                entry = archive.get_entry_by_title(term)
+            except KeyError:
+                match = "path"
+                for path in candidate_paths:
                     try:
                         entry = archive.get_entry_by_path(path)
-                    except Exception as entry_e:
-                        # print(f"Failed to get entry by path '{path}' in '{self.current_zim_paths[i]}': {entry_e}. Checking next ZIM...")
-                        continue # 尝试下一个 ZIM 文件
+                        break
+                    except KeyError:
+                        continue
+            except Exception as e:
+                print(f"Title lookup failed in '{self.current_zim_paths[archive_index]}': {e}")
+                continue
+            if entry is None:
+                continue
 
-                    title = entry.title
-                    # print(f"Entry title: {title}")
+            try:
+                entry, redirected = self._resolve_redirects(entry)
+                if redirected:
+                    match = "redirect"
+                if entry is None or not entry.get_item().mimetype.startswith("text/html"):
+                    continue
+            except Exception as e:
+                print(f"Failed to resolve '{term}' in '{self.current_zim_paths[archive_index]}': {e}")
+                continue
+            return archive_index, entry.path, match
 
-                    try:
-                        item = entry.get_item()
-                    except Exception as item_e:
-                        return False, title, None, f"Failed to get item for entry '{path}' in '{self.current_zim_paths[i]}': {item_e}"
+        return None
 
-                    if not item.mimetype.startswith('text/'):
-                        return False, title, None, f"Entry content is not text type in '{self.current_zim_paths[i]}', MIME type: {item.mimetype}"
+    def _resolve_redirects(self, entry):
+        """
+        跟随重定向直到非重定向条目。重定向可能是多级的，超过 MAX_REDIRECTS 次（可能是循环）时返回 None。
 
-                    try:
-                        content_bytes = bytes(item.content)
-                    except Exception as content_e:
-                        return False, title, None, f"Failed to get content bytes for entry '{path}' in '{self.current_zim_paths[i]}': {content_e}"
-                
-                    # 解码 HTML 内容
-                    html_content_str = None
-                    decode_errors = []
-                    for encoding in ['utf-8', 'latin-1']: # 尝试常用编码
-                        try:
-                            html_content_str = content_bytes.decode(encoding)
-                            # print(f"Successfully decoded content using {encoding}.")
-                            break
-                        except UnicodeDecodeError as ue:
-                            decode_errors.append(f"{encoding}: {ue}")
-                
-                    if html_content_str is None:
-                        error_msg = f"Failed to decode content (size: {len(content_bytes)} bytes) in '{self.current_zim_paths[i]}' using common encodings. Errors: {'; '.join(decode_errors)}"
-                        return False, title, None, error_msg
-
-                    # print(f"Successfully retrieved HTML content, size: {len(html_content_str)} characters.")
-                    return True, title, html_content_str, None
-
-            # 如果所有 ZIM 文件都搜索完还没有结果
-            return False, "", None, f"No matches found for term '{search_term}' in any of the added ZIM files."
+        Returns:
+            tuple: (最终条目或 None, 是否经过了重定向)
+        """
+        redirected = False
+        for _ in range(self.MAX_REDIRECTS):
+            if not entry.is_redirect:
+                return entry, redirected
+            entry = entry.get_redirect_entry()
+            redirected = True
+        return (None if entry.is_redirect else entry), redirected
+
+    def select_archives(self, selector: Optional[str] = None) -> List[int]:
+        """
+        按 UUID、文件名或不含 .zim 扩展名的文件名选择档案。
+
+        Args:
+            selector (str, optional): 档案选择器，多个选择器以逗号分隔；为空时选择全部档案。
+
+        Returns:
+            list[int]: 档案下标，按档案优先级（WIKI_ARCHIVE_PREFERENCE）排序。
+        """
+        indexes = range(len(self.archive_uuids))
+        if selector:
+            selectors = {part.strip() for part in selector.split(",") if part.strip()}
+            indexes = [
+                i for i in indexes
+                if selectors & {self.archive_uuids[i], os.path.basename(self.current_zim_paths[i]),
+                                os.path.splitext(os.path.basename(self.current_zim_paths[i]))[0]}
+            ]
+        return sorted(indexes, key=self._preference_key)
+
+    def archive_languages(self, archive_index: int) -> FrozenSet[str]:
+        """档案的语言 (ISO 639-3)，取自元数据 Language；档案尚未打开过时从文件名推断，无法确定时为空集合。"""
+        info = self._archive_info.get(self.archive_uuids[archive_index])
+        if info and info.get("language"):
+            return parse_languages(info["language"])
+        return parse_languages(language_from_filename(self.current_zim_paths[archive_index]))
+
+    def route(self, search_term: str, zim: Optional[str] = None, lang: Optional[str] = None) -> Optional[List[str]]:
+        """
+        选择查询应搜索的档案。
+
+        提供 zim（档案选择器，见 select_archives）或 lang（逗号分隔的语言代码，如 "zh,en"）时只选择符合的档案，
+        两者同时提供时取交集。都未提供时按查询的书写系统（见 language.detect_script）选择语言匹配的档案，
+        语言未知的档案总是被选中。
+
+        Returns:
+            list[str] or None: 档案 UUID 列表（按加载顺序）；None 表示不限制（自动选择时全部档案都匹配或无法判断）。
+                               提供了 zim/lang 但没有匹配的档案时返回空列表。
+        """
+        archive_indices = list(range(len(self.archive_uuids)))
+        if zim or lang:
+            if zim:
+                archive_indices = sorted(self.select_archives(zim))
+            if lang:
+                wanted = parse_languages(lang)
+                archive_indices = [i for i in archive_indices if self.archive_languages(i) & wanted]
+            return [self.archive_uuids[i] for i in archive_indices]
+
+        script = detect_script(search_term)
+        if script is None:
+            return None
+        selected = [i for i in archive_indices if matches_script(self.archive_languages(i), script)]
+        if not selected or len(selected) == len(archive_indices):
+            return None
+        return [self.archive_uuids[i] for i in selected]
+
+    def _archive_indices(self, archives: Optional[Sequence[str]] = None) -> List[int]:
+        """把档案 UUID 列表转换为下标（忽略未加载的 UUID），None 表示全部档案。"""
+        if archives is None:
+            return list(range(len(self.archive_uuids)))
+        return [self.archive_uuids.index(archive_uuid) for archive_uuid in archives if archive_uuid in self.archive_uuids]
 
+    @_archive_session
+    def find_entry(self, key: str, by: str = "path", archive: Optional[str] = None) -> Tuple[bool, Optional[str], Optional[str], Optional[str], Optional[str]]:
+        """
+        按条目路径或标题直接查找条目（libzim 的有序目录查找，不经过全文搜索），并跟随重定向。
+
+        路径会同时尝试原样和空格替换为下划线的形式。未指定档案时按档案优先级依次查找，返回第一个命中。
+
+        Args:
+            key (str): 条目路径或标题。
+            by (str): "path" 或 "title"。
+            archive (str, optional): 档案选择器（UUID、文件名或不含扩展名的文件名），见 select_archives。
+
+        Returns:
+            tuple: (成功标志 (bool), 档案 UUID (str 或 None), 最终条目路径 (str 或 None),
+                    命中方式 (str 或 None), 错误信息 (str 或 None))
+                   命中方式为 "path"、"title" 或 "redirect"。
+        """
+        if by not in ("path", "title"):
+            return False, None, None, None, f"Unsupported lookup '{by}', expected 'path' or 'title'."
+        indexes = self.select_archives(archive)
+        if not indexes:
+            error = f"ZIM archive '{archive}' not found." if archive else "No ZIM archives are open."
+            return False, None, None, None, error
+
+        candidates = [key]
+        if by == "path" and " " in key:
+            candidates.append(key.replace(" ", "_"))
+
+        for archive_index in indexes:
+            if not self._may_contain_title(archive_index, key):
+                continue
+            zim_archive = self.zim_archives[archive_index]
+            for candidate in candidates:
+                try:
+                    if by == "path":
+                        entry = zim_archive.get_entry_by_path(candidate)
+                    else:
+                        entry = zim_archive.get_entry_by_title(candidate)
+                    entry, redirected = self._resolve_redirects(entry)
+                except KeyError:
+                    continue
+                except Exception as e:
+                    print(f"Entry lookup failed in '{self.current_zim_paths[archive_index]}': {e}")
+                    continue
+                if entry is None:
+                    continue
+                return True, self.archive_uuids[archive_index], entry.path, "redirect" if redirected else by, None
+
+        return False, None, None, None, f"Entry with {by} '{key}' not found."
+
+    @_archive_session
+    def locate(self, search_term: str, result_index: int = 0, deadline: Optional[Deadline] = None,
+               archives: Optional[Sequence[str]] = None) -> Tuple[bool, Optional[str], Optional[str], Optional[str], Optional[str]]:
+        """
+        搜索并定位全局排名第 result_index 的条目，不读取其内容。
+
+        当 result_index 为 0 时先尝试标题/路径精确查找 (lookup_title)，未命中再进行全文搜索。
+        result_index 大于 0 时总是使用全文搜索的排名。
+
+        Args:
+            search_term (str): 要搜索的关键词。
+            result_index (int): 要定位的搜索结果的全局排名（默认第一个）。
+            deadline (Deadline, optional): 截止时间，超时未返回的档案不参与排名。
+            archives (list[str], optional): 只搜索这些档案 (UUID)，默认搜索全部档案。
+
+        Returns:
+            tuple: (成功标志 (bool), 档案 UUID (str 或 None), 条目路径 (str 或 None),
+                    命中方式 (str 或 None), 错误信息 (str 或 None))
+                   命中方式为 "title"、"path"、"redirect" 或 "fulltext"。
+        """
+        if not self._archive_indices(archives):
+            return False, None, None, None, "No ZIM archives are open."
+
+        if result_index == 0 and self.title_fast_path:
+            found = self.lookup_title(search_term, archives)
+            if found is not None:
+                archive_index, path, match = found
+                return True, self.archive_uuids[archive_index], path, match, None
+
+        try:
+            ranked = self.search_ranked(search_term, result_index + 1, deadline, archives)
+        except Exception as e:
+            return False, None, None, None, f"Error during search: {e}"
+
+        if not ranked:
+            return False, None, None, None, f"No matches found for term '{search_term}' in any of the added ZIM files."
+        if result_index >= len(ranked):
+            return False, None, None, None, f"Result index {result_index} out of range for term '{search_term}': only {len(ranked)} match(es) found in the added ZIM files."
+
+        archive_index, path = ranked[result_index]
+        return True, self.archive_uuids[archive_index], path, "fulltext", None
+
+    @_archive_session
+    def get_html(self, archive_uuid: str, path: str) -> Tuple[bool, str, Optional[str], Optional[str]]:
+        """
+        读取指定档案中某个条目的 HTML 内容。
+
+        Args:
+            archive_uuid (str): 档案的 UUID（由 locate 返回）。
+            path (str): 条目路径。
+
+        Returns:
+            tuple: (成功标志 (bool), 标题 (str), HTML 内容 (str 或 None), 错误信息 (str 或 None))
+        """
+        if archive_uuid not in self.archive_uuids:
+            return False, "", None, f"ZIM archive with UUID '{archive_uuid}' is not open."
+        try:
+            return self._get_entry_html(self.archive_uuids.index(archive_uuid), path)
+        except Exception as e:
+            return False, "", None, f"Error during content retrieval: {e}"
+
+    @_archive_session
+    def get_content(self, archive_uuid: str, path: str) -> Tuple[bool, str, Optional[memoryview], Optional[str], Optional[str]]:
+        """
+        读取指定档案中某个条目的原始内容（memoryview），不复制、不解码。
+
+        Args:
+            archive_uuid (str): 档案的 UUID（由 locate 返回）。
+            path (str): 条目路径。
+
+        Returns:
+            tuple: (成功标志 (bool), 标题 (str), 内容 (memoryview 或 None), MIME 类型 (str 或 None), 错误信息 (str 或 None))
+        """
+        if archive_uuid not in self.archive_uuids:
+            return False, "", None, None, f"ZIM archive with UUID '{archive_uuid}' is not open."
+        try:
+            return self._get_entry_content(self.archive_uuids.index(archive_uuid), path)
+        except Exception as e:
+            return False, "", None, None, f"Error during content retrieval: {e}"
+
+    def get_article(self, archive_uuid: str, path: str) -> Tuple[bool, Optional[ArticleContent], Optional[str]]:
+        """
+        读取指定档案中某个条目的内容，返回不复制、不解码的 ArticleContent（见 get_content）。
+
+        Args:
+            archive_uuid (str): 档案的 UUID（由 locate 返回）。
+            path (str): 条目路径。
+
+        Returns:
+            tuple: (成功标志 (bool), 文章内容 (ArticleContent 或 None), 错误信息 (str 或 None))
+        """
+        success, title, content, mimetype, error = self.get_content(archive_uuid, path)
+        if not success:
+            return False, None, error
+        return True, ArticleContent(archive_uuid, path, title, mimetype, content), None
+
+    def search_and_get_html(self, search_term: str, result_index: int = 0) -> Tuple[bool, str, Optional[str], Optional[str]]:
+        """
+        根据搜索词在所有已添加的 ZIM 文件中并行搜索，并获取全局排名第 result_index 的条目的 HTML 内容。
+
+        Args:
+            search_term (str): 要搜索的关键词。
+            result_index (int): 要获取的搜索结果的全局排名（默认第一个）。
+                           所有档案的结果先合并为一个排名列表，再按此索引取值。
+
+        Returns:
+            tuple: (成功标志 (bool), 标题 (str), HTML 内容 (str 或 None), 错误信息 (str 或 None))
+                   - 如果成功：(True, title, html_content_str, None)
+                   - 如果失败：(False, "", None, error_message)
+        """
+        success, archive_uuid, path, _, error = self.locate(search_term, result_index)
+        if not success:
+            return False, "", None, error
+        return self.get_html(archive_uuid, path)
+
+    @_archive_session
+    def suggest(self, prefix: str, limit: int = 10, archives: Optional[Sequence[str]] = None) -> List[Dict]:
+        """
+        根据标题前缀在所有已添加的 ZIM 文件中查找标题建议，并合并为一个列表。
+
+        启用前缀索引 (WIKI_PREFIX_INDEX) 时使用 TitlePrefixIndex，结果按规范化标题排序，
+        索引尚未构建完成的档案暂用 SuggestionSearcher 的前 limit 个结果参与排序；
+        否则使用 libzim 的 SuggestionSearcher，各档案结果按排名交错合并。
+        同一标题只保留最先出现的档案中的条目。
+
+        Args:
+            prefix (str): 标题前缀。
+            limit (int): 最多返回的建议数量。
+            archives (list[str], optional): 只在这些档案 (UUID) 中查找，默认查找全部档案。
+
+        Returns:
+            list[dict]: 每个建议包含 title, path, archive。
+        """
+        archive_indices = self._archive_indices(archives)
+        if not archive_indices or limit <= 0 or not prefix.strip():
+            return []
+
+        per_archive = []
+        for archive_index in archive_indices:
+            try:
+                per_archive.append(self._suggest_archive(archive_index, prefix, limit))
+            except Exception as e:
+                print(f"Suggestion failed in '{self.current_zim_paths[archive_index]}': {e}")
+
+        suggestions = []
+        seen = set()
+        for sort_key, archive_index, title, path in heapq.merge(*per_archive):
+            if sort_key[1] in seen:
+                continue
+            seen.add(sort_key[1])
+            suggestions.append({
+                "title": title,
+                "path": path,
+                "archive": os.path.basename(self.current_zim_paths[archive_index]),
+            })
+            if len(suggestions) >= limit:
+                break
+        return suggestions
+
+    def _suggest_archive(self, archive_index: int, prefix: str, limit: int) -> List[Tuple[Tuple, int, str, str]]:
+        """单个档案的标题建议，返回 ((排序键, 规范化标题), 档案下标, 标题, 路径) 组成的有序列表。"""
+        archive_uuid = self.archive_uuids[archive_index]
+
+        if self.use_prefix_index:
+            # 已加载的前缀索引不依赖打开的档案
+            index = self._prefix_indexes.get(archive_uuid)
+            if index is not None:
+                return [((norm, norm), archive_index, title, path) for norm, title, path in index.search(prefix, limit)]
+            self._start_prefix_index(self.current_zim_paths[archive_index], archive_uuid)
+
+        archive = self.zim_archives[archive_index]
+        with self._suggestion_pool(archive_index, archive).checkout() as (_, suggestion_searcher):
+            suggestion = suggestion_searcher.suggest(prefix)
+            paths = list(suggestion.getResults(0, limit))
+        results = []
+        for rank, path in enumerate(paths):
+            entry = archive.get_entry_by_path(path)
+            norm = normalize_title(entry.title)
+            # 与前缀索引的结果一起按规范化标题排序
+            sort_key = (norm, norm) if self.use_prefix_index else (rank, norm)
+            results.append((sort_key, archive_index, entry.title, path))
+        if self.use_prefix_index:
+            results.sort()
+        return results
+
+    def _suggestion_pool(self, archive_index: int, archive: Archive) -> SearcherPool:
+        """返回档案的 SuggestionSearcher 句柄池（共享 archive），不存在时创建。"""
+        archive_uuid = self.archive_uuids[archive_index]
+        with self._suggest_lock:
+            pool = self._suggestion_pools.get(archive_uuid)
+            if pool is None:
+                pool = SearcherPool(self.current_zim_paths[archive_index], self.searchers_per_archive,
+                                    archive=archive, opener=open_suggestion_handle)
+                self._suggestion_pools[archive_uuid] = pool
+            return pool
+
+    def build_prefix_indexes(self, wait: bool = False) -> int:
+        """
+        为所有缺少前缀索引的档案安排后台构建（已有 sidecar 时直接加载）。
+
+        Args:
+            wait (bool): 是否等待全部构建完成。
+
+        Returns:
+            int: 当前已加载的前缀索引数量。
+        """
+        if not self.use_prefix_index:
+            return 0
+        builds = [self._start_prefix_index(path, archive_uuid)
+                  for path, archive_uuid in zip(self.current_zim_paths.copy(), self.archive_uuids.copy())]
+        if wait:
+            for future in builds:
+                if future is not None and not future.cancelled():
+                    future.exception()
+        with self._suggest_lock:
+            return len(self._prefix_indexes)
+
+    def _start_prefix_index(self, zim_file_path: str, archive_uuid: str) -> Optional[Future]:
+        """在后台线程中构建档案的前缀索引，不阻塞当前请求；已加载或已安排构建时不重复构建。"""
+        with self._suggest_lock:
+            if archive_uuid in self._prefix_indexes:
+                return None
+            future = self._prefix_index_builds.get(archive_uuid)
+            if future is None:
+                if self._prefix_index_executor is None:
+                    self._prefix_index_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="zim-prefix-index")
+                future = self._prefix_index_executor.submit(self._build_prefix_index, zim_file_path, archive_uuid)
+                self._prefix_index_builds[archive_uuid] = future
+            return future
+
+    def _build_prefix_index(self, zim_file_path: str, archive_uuid: str) -> None:
+        try:
+            # 使用单独打开的 Archive，构建期间档案管理器可以照常淘汰该档案
+            archive = Archive(zim_file_path)
+            if str(archive.uuid) != archive_uuid:
+                print(f"ZIM file '{zim_file_path}' was replaced, skipping its title index.")
+                return
+            index = TitlePrefixIndex.load_or_build(archive, zim_file_path, config.WIKI_INDEX_DIR or None)
         except Exception as e:
-            error_msg = f"Error during search or content retrieval: {e}"
-            # import traceback
-            # traceback.print_exc() # 可选：打印堆栈
-            return False, "", None, error_msg
+            print(f"Failed to build title index for '{zim_file_path}': {e}")
+            return
+        with self._suggest_lock:
+            # 构建期间档案可能已被移除或搜索器已关闭
+            if archive_uuid in self.archive_uuids and archive_uuid not in self._prefix_indexes:
+                self._prefix_indexes[archive_uuid] = index
+                return
+        index.close()
+
+    def _stop_prefix_index_builds(self) -> None:
+        """取消尚未开始的前缀索引构建；正在进行的构建完成后发现档案已注销，会自行关闭结果。"""
+        with self._suggest_lock:
+            executor, self._prefix_index_executor = self._prefix_index_executor, None
+            self._prefix_index_builds.clear()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _drop_suggesters(self, archive_uuid: str) -> None:
+        # 档案被淘汰时也会调用：只丢弃句柄池的引用，正在借用句柄的查询可以继续使用；
+        # 前缀索引在档案仍登记时保留，只在移除档案时关闭
+        with self._suggest_lock:
+            self._suggestion_pools.pop(archive_uuid, None)
+            if archive_uuid in self.archive_uuids:
+                return
+            index = self._prefix_indexes.pop(archive_uuid, None)
+            self._prefix_index_builds.pop(archive_uuid, None)
+        if index is not None:
+            index.close()
+
+    def warmup(self, queries: List[str], readahead_bytes: int = 0) -> Dict:
+        """
+        预热已打开的档案：提示内核预读各 ZIM 文件的索引区域，读取主入口，
+        并对每个预热查询执行标题查找、标题建议和全文搜索，填充 libzim 的目录项/簇缓存和 Xapian 索引页。
+
+        Args:
+            queries (list[str]): 预热查询。
+            readahead_bytes (int): 每个文件头部和尾部各自预读的字节数，0 表示不预读。
+
+        Returns:
+            dict: 包含 'archives', 'queries', 'readahead_bytes', 'seconds' 的统计信息。
+        """
+        started = time.monotonic()
+        # 预热期间服务尚未就绪，等待缺少的标题过滤器和前缀索引构建完成
+        self.build_title_filters(wait=True)
+        self.build_prefix_indexes(wait=True)
+        advised = 0
+        # 懒加载时只预热最多 max_open 个档案，避免预热本身触发淘汰
+        count = len(self.archives)
+        if self.archives.lazy:
+            count = min(count, self.archives.max_open)
+        for archive_index in range(count):
+            zim_path = self.current_zim_paths[archive_index]
+            advised += advise_willneed(zim_path, readahead_bytes)
+            try:
+                archive = self.zim_archives[archive_index]
+                if archive.has_main_entry:
+                    archive.main_entry.get_item()
+            except Exception as e:
+                print(f"Failed to read main entry of '{zim_path}' during warmup: {e}")
+
+        for query in queries:
+            try:
+                self.lookup_title(query)
+                self.suggest(query[:2], 5)
+                self.search_ranked(query, self.RESULT_PREFETCH)
+            except Exception as e:
+                print(f"Warmup query '{query}' failed: {e}")
+
+        return {
+            "archives": count,
+            "queries": len(queries),
+            "readahead_bytes": advised,
+            "seconds": round(time.monotonic() - started, 3),
+        }
 
     def close_all(self) -> None:
         """关闭所有 ZIM 档案。"""
-        if self.zim_archives:
-            count = len(self.zim_archives)
-            self.zim_archives.clear()
-            self.searchers.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._stop_title_filter_builds()
+        self._stop_prefix_index_builds()
+        if self.archives:
+            count = len(self.archives)
             closed_paths = self.current_zim_paths.copy()
-            self.current_zim_paths.clear()
+            archive_uuids = self.archive_uuids.copy()
+            self.archives.clear()
+            for archive_uuid in archive_uuids:
+                self._drop_suggesters(archive_uuid)
+                with self._title_filter_lock:
+                    title_filter = self._title_filters.pop(archive_uuid, None)
+                if title_filter is not None:
+                    title_filter.close()
+            self._archive_traits.clear()
+            self._archive_info.clear()
+            self.query_cache.clear()
             print(f"Closed {count} ZIM archive(s): {closed_paths}")
 
+    def archive_metadata(self) -> List[Dict]:
+        """
+        返回所有已加载档案的元数据（见 archive_info），不读取 ZIM 文件。
+        懒加载模式下尚未打开过的档案只包含路径、文件名、UUID 和文件大小，以及 'opened': False。
+
+        Returns:
+            list[dict]: 按加载顺序排列的元数据字典。
+        """
+        metadata_list = []
+        for zim_path, archive_uuid in zip(self.current_zim_paths.copy(), self.archive_uuids.copy()):
+            info = self._archive_info.get(archive_uuid)
+            if info is not None:
+                metadata_list.append(dict(info))
+                continue
+            try:
+                file_size = os.path.getsize(zim_path)
+            except OSError:
+                file_size = None
+            metadata_list.append({
+                "path": zim_path,
+                "filename": os.path.basename(zim_path),
+                "uuid": archive_uuid,
+                "file_size": file_size,
+                "opened": False,
+            })
+        return metadata_list
+
+    def release(self, successor: Optional["ZIMSearcher"] = None) -> None:
+        """
+        释放已被 successor 取代的搜索器：关闭线程池，以及 successor 中不存在的档案、前缀索引和标题过滤器。
+        与 successor 共享的档案和查询缓存保持不变。调用前应确保已没有查询在使用本搜索器。
+
+        Args:
+            successor (ZIMSearcher, optional): 取代本搜索器的新搜索器，为 None 时关闭全部档案（但不清空查询缓存）。
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._stop_title_filter_builds()
+        self._stop_prefix_index_builds()
+        keep = set(successor.archive_uuids) if successor is not None else set()
+        released = [path for path, archive_uuid in zip(self.current_zim_paths, self.archive_uuids) if archive_uuid not in keep]
+        archive_uuids = self.archive_uuids.copy()
+        self.archives.clear(keep=keep)
+        for archive_uuid in archive_uuids:
+            with self._suggest_lock:
+                self._suggestion_pools.pop(archive_uuid, None)
+                prefix_index = self._prefix_indexes.pop(archive_uuid, None)
+            if prefix_index is not None and archive_uuid not in keep:
+                prefix_index.close()
+            with self._title_filter_lock:
+                title_filter = self._title_filters.pop(archive_uuid, None)
+            if title_filter is not None and archive_uuid not in keep:
+                title_filter.close()
+        self._archive_traits.clear()
+        self._archive_info.clear()
+        if released:
+            print(f"Released {len(released)} ZIM archive(s): {released}")
+
     def list_open_zims(self) -> List[str]:
         """列出当前打开的所有 ZIM 文件路径。"""
         return self.current_zim_paths.copy()
 
+def charset_from_mimetype(mimetype: Optional[str]) -> Optional[str]:
+    """从 MIME 类型中解析 charset 参数，例如 'text/html; charset=utf-8' -> 'utf-8'。"""
+    if not mimetype:
+        return None
+    for param in mimetype.split(";")[1:]:
+        key, _, value = param.partition("=")
+        if key.strip().lower() == "charset" and value.strip():
+            return value.strip().strip('"').lower()
+    return None
+
+
+def decode_content(content, mimetype: Optional[str] = None) -> Optional[str]:
+    """
+    把条目内容解码为字符串：优先使用 MIME 类型中的 charset，否则依次尝试 utf-8 和 latin-1。
+
+    Returns:
+        str or None: 解码后的字符串，所有编码都失败时返回 None。
+    """
+    charset = charset_from_mimetype(mimetype)
+    encodings = [charset] if charset else []
+    encodings += [encoding for encoding in ['utf-8', 'latin-1'] if encoding != charset] # 尝试常用编码
+    for encoding in encodings:
+        try:
+            return str(content, encoding)
+        except (UnicodeDecodeError, LookupError):
+            continue
+    return None
+
+
+# 档案版本的图片丰富程度，用于 "pic" 优先规则
+FLAVOUR_PICTURE_RANK = {"maxi": 2, "nopic": 1, "mini": 0}
+
+
+def read_metadata(archive: Optional[Archive], name: str) -> str:
+    """读取 ZIM 元数据 (M/ 命名空间) 中的文本值，不存在或无法读取时返回空字符串。"""
+    try:
+        return bytes(archive.get_metadata(name)).decode("utf-8").strip()
+    except Exception:
+        return ""
+
+
+def archive_info(archive: Archive, zim_file_path: str) -> Dict:
+    """
+    收集档案的元数据，在档案打开时调用一次，之后由 ZIMSearcher 缓存。
+
+    Returns:
+        dict: 包含 'path', 'filename', 'uuid', 'file_size', 'article_count', 'entry_count', 'main_path',
+              'title', 'language', 'date', 'counter', 'has_fulltext_index', 'has_title_index' 键的字典。
+              counter 为 MIME 类型 -> 条目数（来自元数据 Counter，例如 "text/html=4;image/png=2"）。
+    """
+    main_path = None
+    try:
+        if archive.has_main_entry:
+            main_path = archive.main_entry.get_item().path
+    except Exception:
+        pass
+
+    counter = {}
+    for part in read_metadata(archive, "Counter").split(";"):
+        mimetype, _, count = part.partition("=")
+        if mimetype.strip() and count.strip().isdigit():
+            counter[mimetype.strip()] = int(count)
+
+    return {
+        "path": zim_file_path,
+        "filename": os.path.basename(zim_file_path),
+        "uuid": str(archive.uuid),
+        "file_size": archive.filesize,
+        "article_count": archive.article_count,
+        "entry_count": archive.entry_count,
+        "main_path": main_path,
+        "title": read_metadata(archive, "Title"),
+        "language": read_metadata(archive, "Language"),
+        "date": read_metadata(archive, "Date"),
+        "counter": counter,
+        "has_fulltext_index": archive.has_fulltext_index,
+        "has_title_index": archive.has_title_index,
+    }
+
+
+def archive_traits(archive: Archive, zim_file_path: str) -> Tuple[str, str]:
+    """
+    读取档案的日期和版本 (maxi/nopic/mini)。
+    优先使用 ZIM 元数据 (Date, Flavour)，缺失时从文件名 (如 wikipedia_zh_all_nopic_2025-07.zim) 推断。
+
+    Returns:
+        tuple: (日期字符串, 版本)，无法确定时为空字符串。
+    """
+    filename = os.path.basename(zim_file_path)
+    date = read_metadata(archive, "Date")
+    if not date:
+        match = re.search(r"(\d{4}-\d{2})", filename)
+        date = match.group(1) if match else ""
+
+    flavour = read_metadata(archive, "Flavour").lower()
+    if not flavour:
+        tokens = re.split(r"[_.]", filename.lower())
+        flavour = next((token for token in tokens if token in FLAVOUR_PICTURE_RANK), "")
+
+    return date, flavour
+
+
 # --- 便捷函数 ---
 def search_wiki_html(search_term: str, result_index: int = 0, zim_paths: Optional[List[str]] = None) -> Tuple[bool, str, Optional[str], Optional[str]]:
     """
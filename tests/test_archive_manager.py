@@ -0,0 +1,163 @@
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from wikisearch.zim.archive_manager import ArchiveManager, ArchiveView, ZIM_HEADER, ZIM_MAGIC, read_zim_uuid
+
+
+def _zim_paths():
+    """ZIM_FILE_PATH 所在目录中的全部 ZIM 文件。"""
+    zim_path = os.getenv("ZIM_FILE_PATH", "")
+    if not zim_path or not os.path.isfile(zim_path):
+        return []
+    directory = os.path.dirname(zim_path)
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".zim"))
+
+
+def test_read_zim_uuid_from_header(tmp_path) -> None:
+    expected = uuid.uuid4()
+    path = tmp_path / "fake.zim"
+    path.write_bytes(ZIM_HEADER.pack(ZIM_MAGIC, 6, 1, expected.bytes) + b"\0" * 64)
+    assert read_zim_uuid(str(path)) == str(expected)
+
+    bad = tmp_path / "bad.zim"
+    bad.write_bytes(ZIM_HEADER.pack(0, 6, 1, expected.bytes))
+    with pytest.raises(ValueError):
+        read_zim_uuid(str(bad))
+
+    short = tmp_path / "short.zim"
+    short.write_bytes(b"ZIM")
+    with pytest.raises(ValueError):
+        read_zim_uuid(str(short))
+
+
+def test_archive_manager_lru_eviction() -> None:
+    paths = _zim_paths()
+    if len(paths) < 2:
+        pytest.skip("Need at least two ZIM files next to ZIM_FILE_PATH")
+
+    opened, closed = [], []
+    manager = ArchiveManager(max_open=1, on_open=lambda path, u, archive: opened.append(u), on_close=closed.append)
+    uuids = [manager.add(path) for path in paths[:2]]
+    assert manager.stats()["open"] == 0
+    assert opened == []
+
+    archives = ArchiveView(manager, 0)
+    assert len(archives) == 2
+    assert str(archives[0].uuid) == uuids[0]
+    assert str(archives[1].uuid) == uuids[1]
+    assert closed == [uuids[0]]
+    assert not manager.is_open(uuids[0]) and manager.is_open(uuids[1])
+
+    stats = manager.stats()
+    assert stats["archives"] == 2
+    assert stats["open"] == 1
+    assert stats["opens"] == 2
+    assert stats["evictions"] == 1
+
+    with pytest.raises(ValueError):
+        manager.add(paths[0])
+
+    manager.clear()
+    assert len(manager) == 0
+    assert manager.open_pools() == []
+
+
+def test_archive_metadata_is_collected_at_open_time(monkeypatch) -> None:
+    paths = _zim_paths()
+    if not paths:
+        pytest.skip("ZIM_FILE_PATH not set")
+
+    from wikisearch.zim import zim_searcher
+    from wikisearch.zim.zim_searcher import ZIMSearcher
+
+    searcher = ZIMSearcher(paths)
+    try:
+        metadata = searcher.archive_metadata()
+        assert [info["path"] for info in metadata] == paths
+        for info in metadata:
+            assert info["uuid"] in searcher.archive_uuids
+            assert info["file_size"] == os.path.getsize(info["path"])
+            assert info["article_count"] <= info["entry_count"]
+            assert isinstance(info["has_fulltext_index"], bool)
+            assert isinstance(info["counter"], dict)
+
+        # 之后的调用只读取缓存，不再读取档案
+        monkeypatch.setattr(zim_searcher, "archive_info", lambda archive, path: pytest.fail("metadata re-read"))
+        assert searcher.archive_metadata() == metadata
+    finally:
+        searcher.close_all()
+
+
+def test_request_holds_each_archive_once(monkeypatch) -> None:
+    paths = _zim_paths()
+    if len(paths) < 2:
+        pytest.skip("Need at least two ZIM files next to ZIM_FILE_PATH")
+
+    from wikisearch.config import config
+    from wikisearch.zim.zim_searcher import ZIMSearcher
+
+    monkeypatch.setattr(config, "WIKI_MAX_OPEN_ARCHIVES", 1)
+    searcher = ZIMSearcher(paths[:2])
+    try:
+        opened = []
+        searcher.archives._on_open = lambda path, archive_uuid, archive: opened.append(archive_uuid)
+        searcher.search_hits("Python", limit=5)
+        # 请求中两个档案各打开一次，请求结束后才淘汰到 max_open
+        assert sorted(opened) == sorted(searcher.archive_uuids)
+        stats = searcher.archives.stats()
+        assert stats["open"] == 1 and stats["in_use"] == 0
+
+        with searcher.archives.acquire(0) as (archive, _):
+            searcher.archives.get(1)
+            # 使用中的档案不会被淘汰
+            assert searcher.archives.is_open(searcher.archive_uuids[0])
+        assert searcher.archives.stats()["open"] == 1
+    finally:
+        searcher.close_all()
+
+
+def test_slow_open_does_not_block_other_archives(tmp_path, monkeypatch) -> None:
+    import threading
+    import time
+
+    from wikisearch.zim import archive_manager as module
+
+    paths = []
+    for name in ("fast", "slow"):
+        path = tmp_path / f"{name}.zim"
+        path.write_bytes(ZIM_HEADER.pack(ZIM_MAGIC, 6, 1, uuid.uuid4().bytes) + b"\0" * 64)
+        paths.append(str(path))
+
+    release_slow = threading.Event()
+    opened = []
+
+    class _SlowArchive:
+        def __init__(self, path):
+            opened.append(path)
+            if path.endswith("slow.zim"):
+                # 模拟冷存储上缓慢的打开
+                release_slow.wait(5)
+
+    monkeypatch.setattr(module, "Archive", _SlowArchive)
+    manager = ArchiveManager(max_open=2)
+    for path in paths:
+        manager.add(path)
+    manager.get(0)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        slow = [executor.submit(manager.get, 1) for _ in range(2)]
+        time.sleep(0.05)
+        # 打开 slow 期间，已打开的档案照常返回
+        started = time.monotonic()
+        with manager.acquire(0):
+            pass
+        assert time.monotonic() - started < 1.0
+        release_slow.set()
+        first, second = (future.result(timeout=5) for future in slow)
+    # 同一档案并发访问时只打开一次
+    assert first is second
+    assert opened.count(paths[1]) == 1
+    assert manager.stats()["opens"] == 2
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def searcher():
+    zim_path = os.getenv("ZIM_FILE_PATH", "")
+    if not zim_path or not os.path.isfile(zim_path):
+        pytest.skip("ZIM_FILE_PATH not set")
+
+    from wikisearch.zim.zim_searcher import ZIMSearcher
+
+    searcher = ZIMSearcher([zim_path])
+    yield searcher
+    searcher.close_all()
+
+
+def test_find_entry_by_path_and_title(searcher) -> None:
+    archive = searcher.zim_archives[0]
+    entry = archive.main_entry.get_redirect_entry() if archive.main_entry.is_redirect else archive.main_entry
+    archive_uuid = searcher.archive_uuids[0]
+
+    assert searcher.find_entry(entry.path) == (True, archive_uuid, entry.path, "path", None)
+    assert searcher.find_entry(entry.title, by="title")[:3] == (True, archive_uuid, entry.path)
+
+    filename = os.path.basename(searcher.current_zim_paths[0])
+    assert searcher.find_entry(entry.path, archive=filename)[0]
+    assert searcher.find_entry(entry.path, archive=archive_uuid)[0]
+
+    success, _, _, _, error = searcher.find_entry(entry.path, archive="no-such-archive")
+    assert not success and "not found" in error
+    success, _, _, _, error = searcher.find_entry("No_such_entry_xyz")
+    assert not success and "not found" in error
+    assert not searcher.find_entry(entry.path, by="uuid")[0]
+
+
+def test_find_entry_follows_redirects(searcher) -> None:
+    archive = searcher.zim_archives[0]
+    redirects = []
+    for entry_id in range(archive.entry_count):
+        entry = archive._get_entry_by_id(entry_id)
+        if entry.is_redirect:
+            redirects.append(entry)
+    if not redirects:
+        pytest.skip("ZIM file has no redirects")
+
+    redirect = redirects[0]
+    success, _, path, match, _ = searcher.find_entry(redirect.path)
+    assert success and match == "redirect"
+    assert path == redirect.get_redirect_entry().path
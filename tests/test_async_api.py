@@ -0,0 +1,126 @@
+import os
+import asyncio
+import threading
+import time
+
+import pytest
+
+from wikisearch.async_api import AsyncWikiSearchAPI
+
+
+class _FakeAPI:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_blocking_work_does_not_stall_the_event_loop() -> None:
+    wiki = AsyncWikiSearchAPI(_FakeAPI(), search_workers=1, io_workers=1, cpu_workers=1)
+    release = threading.Event()
+
+    async def main():
+        # search 线程池被占满时，io 线程池和事件循环仍然可用
+        blocked = asyncio.ensure_future(wiki.run_search(release.wait, 5))
+        await asyncio.sleep(0.05)
+        assert wiki.stats()["search"]["pending"] == 1
+        started = time.monotonic()
+        assert await wiki.run_io(lambda: "io") == "io"
+        await asyncio.sleep(0.01)
+        assert time.monotonic() - started < 1
+        release.set()
+        assert await blocked is True
+
+    asyncio.run(main())
+    assert wiki.stats()["search"] == {"workers": 1, "pending": 0, "completed": 1}
+    wiki.close()
+    assert wiki.api.closed
+
+
+def test_iterate_advances_in_the_pool() -> None:
+    wiki = AsyncWikiSearchAPI(_FakeAPI(), cpu_workers=1)
+    threads = []
+
+    def produce():
+        for i in range(3):
+            threads.append(threading.current_thread().name)
+            yield i
+
+    async def main():
+        return [item async for item in wiki.iterate(produce())]
+
+    assert asyncio.run(main()) == [0, 1, 2]
+    assert all(name.startswith("wiki-cpu") for name in threads)
+    wiki.close()
+
+
+def test_async_results_match_sync_api() -> None:
+    zim_path = os.getenv("ZIM_FILE_PATH", "")
+    if not zim_path or not os.path.isfile(zim_path):
+        pytest.skip("ZIM_FILE_PATH not set")
+
+    from wikisearch.api import WikiSearchAPI
+    from wikisearch.tools.tools import search_markdown_content
+
+    wiki = AsyncWikiSearchAPI(WikiSearchAPI([zim_path]))
+    try:
+        async def main():
+            return await asyncio.gather(wiki.run_search(wiki.api.locate, "AI"), wiki.search_html("AI"),
+                                        wiki.search_markdown("AI"), wiki.search_markdown("AI"))
+
+        located, html, markdown, coalesced = asyncio.run(main())
+        assert located == wiki.api.locate("AI")
+        assert (html.archive_uuid, html.path) == located[1:3]
+        assert markdown.text == search_markdown_content(wiki.api, "AI").text
+        assert coalesced is markdown
+        assert wiki.markdown_flights.stats()["coalesced"] == 1
+    finally:
+        wiki.close()
+
+
+def test_markdown_stages_run_in_their_own_pools(monkeypatch) -> None:
+    from wikisearch import async_api
+
+    threads = {}
+
+    def stage(name, result):
+        def run(*args):
+            threads[name] = threading.current_thread().name
+            return result
+        return run
+
+    monkeypatch.setattr(async_api, "locate_article", stage("locate", ("uuid", "A/Wiki", "title")))
+    monkeypatch.setattr(async_api, "cached_markdown", stage("cached", None))
+    monkeypatch.setattr(async_api, "read_article", stage("read", "html"))
+    monkeypatch.setattr(async_api, "convert_markdown", stage("convert", "markdown"))
+    wiki = AsyncWikiSearchAPI(_FakeAPI(), search_workers=1, io_workers=1, cpu_workers=1)
+
+    assert asyncio.run(wiki.search_markdown("wiki")) == "markdown"
+    assert threads["locate"].startswith("wiki-search")
+    assert threads["cached"].startswith("wiki-io") and threads["read"].startswith("wiki-io")
+    assert threads["convert"].startswith("wiki-cpu")
+    wiki.close()
+
+
+def test_coalesced_markdown_waits_on_the_event_loop(monkeypatch) -> None:
+    from wikisearch import async_api
+
+    release = threading.Event()
+    monkeypatch.setattr(async_api, "locate_article", lambda *args: ("uuid", "A/Wiki", "title"))
+    monkeypatch.setattr(async_api, "cached_markdown", lambda *args: None)
+    monkeypatch.setattr(async_api, "read_article", lambda *args: "html")
+    monkeypatch.setattr(async_api, "convert_markdown", lambda *args: release.wait(5) and "markdown")
+    wiki = AsyncWikiSearchAPI(_FakeAPI(), cpu_workers=1)
+
+    async def main():
+        requests = [asyncio.ensure_future(wiki.search_markdown("wiki")) for _ in range(4)]
+        await asyncio.sleep(0.1)
+        # 只有一个转换占用 cpu 线程，其余请求在事件循环中等待
+        assert wiki.stats()["cpu"]["pending"] == 1
+        release.set()
+        return await asyncio.gather(*requests)
+
+    assert asyncio.run(main()) == ["markdown"] * 4
+    assert wiki.markdown_flights.stats() == {"executions": 1, "coalesced": 3, "errors": 0, "in_flight": 0}
+    wiki.close()
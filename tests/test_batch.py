@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+from wikisearch.tools.tools import SearchError, iter_batch_results, search_batch_content, search_hits_content
+
+
+class _FakeAPI:
+    """按查询词返回固定条目的 WikiSearchAPI 替身，记录 locate 调用次数。"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+        self.deadlines = []
+        self._lock = threading.Lock()
+
+    def locate(self, query, result_index=0, deadline=None, zim=None, lang=None):
+        with self._lock:
+            self.calls.append((query, result_index))
+        time.sleep(self.delay)
+        if query == "missing":
+            return False, None, None, None, "Search term 'missing' not found."
+        return True, "batch-test-archive", f"{query}-{result_index}-{time.monotonic_ns()}", "fulltext", None
+
+    def get_markdown(self, archive_uuid, path, deadline=None):
+        with self._lock:
+            self.deadlines.append(deadline)
+        return True, path, f"# {path}", False, None
+
+
+def test_batch_dedups_and_keeps_order() -> None:
+    api = _FakeAPI()
+    items = [
+        {"query": "a"},
+        {"query": "b", "index": 1},
+        {"query": "a"},
+        {"query": "missing"},
+        {"query": "a", "format": "markdown", "index": 0},
+    ]
+    results = search_batch_content(api, items)["results"]
+
+    assert [r["item"] for r in results] == list(range(len(items)))
+    assert sorted(api.calls) == [("a", 0), ("b", 1), ("missing", 0)]
+    assert results[0]["result"] == results[2]["result"] == results[4]["result"]
+    assert results[1]["status"] == "success"
+    assert results[3]["status"] == "not found" and results[3]["status_code"] == 404
+
+
+def test_batch_runs_items_in_parallel() -> None:
+    api = _FakeAPI(delay=0.2)
+    items = [{"query": f"q{i}"} for i in range(8)]
+    started = time.monotonic()
+    streamed = list(iter_batch_results(api, items))
+    assert time.monotonic() - started < 0.2 * 4
+    assert sorted(r["item"] for r in streamed) == list(range(8))
+
+
+@pytest.mark.parametrize("items", [
+    [], [{"query": ""}], [{"query": "a", "format": "pdf"}], [{"query": "a", "index": -1}],
+    [{"query": "a", "index": True}], [{"query": "a", "format": "hits", "limit": True}],
+    [{"query": "a", "format": "hits", "limit": 101}],
+])
+def test_batch_rejects_invalid_items(items) -> None:
+    with pytest.raises(SearchError) as excinfo:
+        iter_batch_results(_FakeAPI(), items)
+    assert excinfo.value.status_code == 400
+
+
+def test_batch_without_timeout_has_no_deadline() -> None:
+    api = _FakeAPI()
+    search_batch_content(api, [{"query": "a"}, {"query": "b"}])
+    assert api.deadlines == [None, None]
+
+
+@pytest.mark.parametrize("offset, limit", [(0, 0), (0, 101), (-1, 10), (0, True)])
+def test_hits_reject_invalid_limits(offset, limit) -> None:
+    # MCP 的 search_wiki_hits 没有 FastAPI 的参数校验，由 search_hits_content 限制
+    with pytest.raises(SearchError) as excinfo:
+        search_hits_content(_FakeAPI(), "a", offset, limit)
+    assert excinfo.value.status_code == 400
+
+
+@pytest.mark.parametrize("limit", [0, 101, True])
+def test_suggestions_reject_invalid_limits(limit) -> None:
+    from wikisearch.tools.tools import suggest_titles_content
+
+    with pytest.raises(SearchError) as excinfo:
+        suggest_titles_content(_FakeAPI(), "a", limit)
+    assert excinfo.value.status_code == 400
@@ -0,0 +1,96 @@
+from wikisearch.tools.content_cache import ContentCache
+
+
+def test_content_cache_compresses_cold_entries() -> None:
+    cache = ContentCache(max_bytes=40_000, compression="zlib", hot_fraction=0.25)
+    for i in range(4):
+        cache.put("uuid", f"A/{i}", "html", f"title {i}", f"<p>{i}</p>" * 1000, "text/html")
+
+    stats = cache.stats()
+    assert stats["cold_entries"] > 0
+    assert stats["bytes"] < 4 * 8000
+
+    # 冷区条目读取时解压并回到热区
+    assert cache.get("uuid", "A/0", "html") == ("title 0", b"<p>0</p>" * 1000, "text/html")
+    assert cache.get("uuid", "A/0", "markdown") is None
+    assert cache.stats()["hits"] == 1
+
+
+def test_content_cache_byte_budget_and_invalidation() -> None:
+    cache = ContentCache(max_bytes=2_500, compression="none")
+    cache.put("u1", "A/a", "html", "a", "x" * 1000, "text/html")
+    cache.put("u2", "A/b", "html", "b", b"y" * 1000, "text/html")
+    cache.put("u2", "A/c", "html", "c", memoryview(b"z" * 1000), "text/html")
+
+    assert cache.get("u1", "A/a", "html") is None
+    assert cache.stats()["evictions"] == 1
+
+    assert cache.invalidate_archive("u2") == 2
+    assert cache.stats()["bytes"] == 0
+
+
+def test_disk_cache_survives_restart(tmp_path) -> None:
+    from wikisearch.tools.content_cache import DiskContentCache
+
+    path = str(tmp_path / "content.sqlite3")
+    disk = DiskContentCache(path, formats=("markdown",))
+    cache = ContentCache(max_bytes=10_000, disk=disk)
+    cache.put("uuid", "A/x", "markdown", "x", "# x\n" * 100, "text/markdown; charset=utf-8")
+    cache.put("uuid", "A/x", "html", "x", "<p>x</p>", "text/html")
+    disk.close()
+
+    # 新的实例（如重启后的进程）从数据库读取，并放入内存
+    restarted = ContentCache(max_bytes=10_000, disk=DiskContentCache(path, formats=("markdown",)))
+    assert restarted.get("uuid", "A/x", "markdown") == ("x", b"# x\n" * 100, "text/markdown; charset=utf-8")
+    assert restarted.get("uuid", "A/x", "html") is None
+    stats = restarted.stats()
+    assert stats["hot_entries"] == 1 and stats["disk"]["hits"] == 1 and stats["disk"]["entries"] == 1
+    assert stats["disk"]["bytes"] < 400
+    restarted.disk.close()
+
+
+def test_disk_cache_keys_and_eviction(tmp_path, monkeypatch) -> None:
+    from wikisearch.tools import content_cache as module
+
+    path = str(tmp_path / "content.sqlite3")
+    disk = module.DiskContentCache(path, max_bytes=3_000, compression="none")
+    for i in range(5):
+        disk.put("uuid", f"A/{i}", "markdown", str(i), bytes([i]) * 1000, "text/markdown")
+    stats = disk.stats()
+    assert stats["bytes"] <= 3_000 and stats["evictions"] >= 2
+    assert disk.get("uuid", "A/0", "markdown") is None
+    assert disk.get("uuid", "A/4", "markdown")[1] == b"\x04" * 1000
+    assert disk.get("other-uuid", "A/4", "markdown") is None
+    disk.close()
+
+    # 转换器版本变化后旧的 Markdown 不再命中
+    monkeypatch.setitem(module.FORMAT_VERSIONS, "markdown", "next")
+    upgraded = module.DiskContentCache(path, max_bytes=3_000, compression="none")
+    assert upgraded.get("uuid", "A/4", "markdown") is None
+    upgraded.close()
+
+
+def test_disk_cache_hit_does_not_wait_for_the_write_lock(tmp_path) -> None:
+    import sqlite3
+    import time
+
+    from wikisearch.tools.content_cache import DiskContentCache
+
+    path = str(tmp_path / "content.sqlite3")
+    disk = DiskContentCache(path, compression="none", touch_interval=0, timeout=5.0)
+    disk.put("uuid", "A/x", "markdown", "x", b"# x", "text/markdown")
+
+    # 另一个进程正在写入时，命中仍立即返回，只是不更新访问时间
+    writer = sqlite3.connect(path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        time.sleep(0.01)
+        started = time.monotonic()
+        assert disk.get("uuid", "A/x", "markdown") == ("x", b"# x", "text/markdown")
+        assert time.monotonic() - started < 1.0
+    finally:
+        writer.execute("ROLLBACK")
+        writer.close()
+    # 之后的写入仍按配置的超时等待
+    assert disk._connection().execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+    disk.close()
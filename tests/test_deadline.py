@@ -0,0 +1,63 @@
+from wikisearch.deadline import Deadline, expired, remaining
+from wikisearch.tools.convert_html import iter_html_to_markdown
+
+
+def _collect(chunks):
+    parts = []
+    while True:
+        try:
+            parts.append(next(chunks))
+        except StopIteration as stop:
+            return parts, stop.value
+
+
+def test_deadline_from_timeout_ms() -> None:
+    assert Deadline.from_timeout_ms(None) is None
+    assert Deadline.from_timeout_ms(0) is None
+    assert not expired(None) and remaining(None) is None
+
+    deadline = Deadline.from_timeout_ms(60_000)
+    assert not deadline.expired()
+    assert 0 < deadline.remaining() <= 60
+    assert Deadline(0).expired()
+
+
+def test_markdown_conversion_stops_at_deadline() -> None:
+    html = b"<html><body><p>Intro</p>" + b"".join(
+        b"<h2>Section %d</h2><p>%s</p>" % (i, b"text " * 2000) for i in range(4)
+    ) + b"</body></html>"
+
+    parts, stopped = _collect(iter_html_to_markdown(html, min_chunk_bytes=1, deadline=Deadline(0)))
+    assert stopped is True
+    assert len(parts) == 1 and "Intro" in parts[0]
+
+    parts, stopped = _collect(iter_html_to_markdown(html, min_chunk_bytes=1, deadline=Deadline(60)))
+    assert stopped is False
+    assert len(parts) == 5
+
+
+class _HtmlSearcher:
+    """只提供 get_content 的搜索器，返回固定的 HTML。"""
+
+    def __init__(self, html: bytes):
+        self.html = html
+
+    def get_content(self, archive_uuid, path):
+        return True, "Title", memoryview(self.html), "text/html; charset=utf-8", None
+
+
+def test_markdown_is_the_same_with_and_without_deadline() -> None:
+    from wikisearch.tools.convert_html import entry_to_markdown
+
+    # 章节切分点落在嵌套的元素和列表中间，分段转换与是否设置截止时间无关
+    html = b"<html><head><title>T</title></head><body><div><p>Intro <b>bold</b></p><ol><li>one</li>" + b"".join(
+        b"<h2>Section %d</h2><li>item %d</li><p>%s</p>" % (i, i, b"text " * 10000) for i in range(3)
+    ) + b"</ol></div></body></html>"
+    searcher = _HtmlSearcher(html)
+
+    without = entry_to_markdown(searcher, "uuid", "A/T")
+    with_deadline = entry_to_markdown(searcher, "uuid", "A/T", Deadline(60))
+    assert without[0] and with_deadline[0]
+    assert without[3] is False and with_deadline[3] is False
+    assert without[2] == with_deadline[2]
+    assert "Section 2" in without[2]
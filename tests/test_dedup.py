@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from wikisearch.zim.zim_searcher import ZIMSearcher, archive_traits
+
+
+class _NoMetadataArchive:
+    def get_metadata(self, name):
+        raise RuntimeError(name)
+
+
+def test_archive_traits_from_filename() -> None:
+    archive = _NoMetadataArchive()
+    assert archive_traits(archive, "/zim/wikipedia_en_all_nopic_2025-07.zim") == ("2025-07", "nopic")
+    assert archive_traits(archive, "/zim/wikipedia_en_all_maxi_2024-01.zim") == ("2024-01", "maxi")
+    assert archive_traits(archive, "/zim/custom.zim") == ("", "")
+
+
+def test_archive_preference_order() -> None:
+    searcher = ZIMSearcher(zim_file_path=[])
+    searcher.archive_uuids = ["old-pic", "new-nopic", "new-pic"]
+    searcher._archive_traits = {
+        "old-pic": ("2024-01", "maxi"),
+        "new-nopic": ("2025-07", "nopic"),
+        "new-pic": ("2025-07", "maxi"),
+    }
+
+    searcher.archive_preference = ["newest", "pic"]
+    assert min(range(3), key=searcher._preference_key) == 2
+
+    searcher.archive_preference = ["pic"]
+    assert min(range(3), key=searcher._preference_key) == 0
+
+
+def _zim_paths():
+    """ZIM_FILE_PATH 所在目录中的全部 ZIM 文件。"""
+    zim_path = os.getenv("ZIM_FILE_PATH", "")
+    if not zim_path or not os.path.isfile(zim_path):
+        return []
+    directory = os.path.dirname(zim_path)
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".zim"))
+
+
+def test_title_lookup_prefers_the_same_archive_as_dedup() -> None:
+    paths = _zim_paths()
+    if len(paths) < 2:
+        pytest.skip("Need at least two ZIM files next to ZIM_FILE_PATH")
+
+    title = "Python (programming language)"
+    searcher = ZIMSearcher(zim_file_path=paths)
+    try:
+        holders = {}
+        for archive_index, archive in enumerate(searcher.zim_archives):
+            try:
+                holders[archive_index] = archive.get_entry_by_title(title).path
+            except KeyError:
+                continue
+        if len(holders) < 2:
+            pytest.skip(f"'{title}' is not in two of the ZIM files")
+
+        # 让加载顺序靠后的档案更优先，标题查找不能按加载顺序返回第一个档案
+        searcher.archive_preference = ["newest"]
+        first, preferred = min(holders), max(holders)
+        searcher._archive_traits[searcher.archive_uuids[first]] = ("2000-01", "")
+        searcher._archive_traits[searcher.archive_uuids[preferred]] = ("2099-01", "")
+
+        found = searcher.lookup_title(title)
+        assert found is not None and found[0] == preferred
+        ok, archive_uuid, _, match, _ = searcher.find_entry(title, by="title")
+        assert ok and archive_uuid == searcher.archive_uuids[preferred] and match == "title"
+        deduped, _ = searcher._dedup_ranked(iter([(0, first, holders[first]), (0, preferred, holders[preferred])]), limit=5)
+        assert [archive_index for archive_index, _ in deduped] == [preferred]
+    finally:
+        searcher.close_all()
@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+from wikisearch.zim.language import detect_script, language_from_filename, matches_script, normalize_language, parse_languages
+
+
+def test_detect_script() -> None:
+    assert detect_script("Python") == "latin"
+    assert detect_script("Café") == "latin"
+    assert detect_script("维基百科") == "han"
+    assert detect_script("Python 编程") == "han"
+    assert detect_script("東京タワー") == "kana"
+    assert detect_script("Москва") == "cyrillic"
+    assert detect_script("서울") == "hangul"
+    assert detect_script("2024 !?") is None
+
+
+def test_language_codes() -> None:
+    assert normalize_language("en") == "eng"
+    assert normalize_language("zh-Hans") == "zho"
+    assert normalize_language("ENG") == "eng"
+    assert parse_languages("eng,fra") == {"eng", "fra"}
+    assert parse_languages("") == frozenset()
+    assert language_from_filename("/data/wikipedia_zh_all_maxi_2025-07.zim") == "zho"
+    assert language_from_filename("/data/test.zim") == ""
+
+
+def test_matches_script() -> None:
+    assert matches_script(frozenset({"zho"}), "han")
+    assert not matches_script(frozenset({"eng"}), "han")
+    assert matches_script(frozenset({"jpn"}), "han")
+    assert not matches_script(frozenset({"zho"}), "kana")
+    # 语言未知的档案总是参与搜索
+    assert matches_script(frozenset(), "cyrillic")
+    assert matches_script(frozenset({"xyz"}), "han")
+
+
+@pytest.fixture(scope="module")
+def api():
+    zim_path = os.getenv("ZIM_FILE_PATH", "")
+    if not zim_path or not os.path.isfile(zim_path):
+        pytest.skip("ZIM_FILE_PATH not set")
+
+    from wikisearch.api import WikiSearchAPI
+
+    api = WikiSearchAPI([zim_path])
+    yield api
+    api.close()
+
+
+def test_explicit_selectors(api) -> None:
+    searcher = api._searcher
+    archive_uuid = searcher.archive_uuids[0]
+    filename = os.path.basename(searcher.current_zim_paths[0])
+    languages = searcher.archive_languages(0)
+
+    assert api.route("anything", zim=filename) == [archive_uuid]
+    assert api.route("anything", zim=f"no-such-archive,{archive_uuid}") == [archive_uuid]
+    if languages:
+        assert api.route("anything", lang=",".join(sorted(languages))) == [archive_uuid]
+    with pytest.raises(ValueError, match="not found"):
+        api.route("anything", zim="no-such-archive")
+
+    success, _, _, _, error = api.locate("wiki", zim="no-such-archive")
+    assert not success and "not found" in error
+    with pytest.raises(ValueError):
+        api.suggest("w", 5, lang="xyz")
+
+
+def test_routing_keeps_results(api) -> None:
+    # 单个档案时自动路由不限制档案，显式选择该档案得到相同的结果
+    filename = os.path.basename(api._searcher.current_zim_paths[0])
+    assert api.route("wiki") is None
+    assert api.locate("wiki") == api.locate("wiki", zim=filename)
+
+    page = api.search_hits("wiki", limit=2, zim=filename)
+    assert page["hits"] == api.search_hits("wiki", limit=2)["hits"]
+    if page["next_cursor"]:
+        # cursor 沿用第一页选择的档案
+        assert api.search_hits("wiki", limit=2, cursor=page["next_cursor"])["offset"] == 2
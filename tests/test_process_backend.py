@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from wikisearch.api import WikiSearchAPI
+
+
+def test_process_backend_matches_thread_backend() -> None:
+    zim_path = os.getenv("ZIM_FILE_PATH", "")
+    if not zim_path or not os.path.isfile(zim_path):
+        pytest.skip("ZIM_FILE_PATH not set")
+
+    thread_api = WikiSearchAPI(zim_path, backend="thread")
+    process_api = WikiSearchAPI(zim_path, backend="process", process_workers=1)
+    try:
+        assert process_api.search_hits("wiki", limit=3)["hits"] == thread_api.search_hits("wiki", limit=3)["hits"]
+        assert process_api.locate("wiki") == thread_api.locate("wiki")
+        assert process_api.suggest("w", 3) == thread_api.suggest("w", 3)
+    finally:
+        process_api.close()
+        thread_api.close()
+
+
+def test_unknown_backend_is_rejected() -> None:
+    zim_path = os.getenv("ZIM_FILE_PATH", "")
+    if not zim_path or not os.path.isfile(zim_path):
+        pytest.skip("ZIM_FILE_PATH not set")
+
+    with pytest.raises(ValueError):
+        WikiSearchAPI(zim_path, backend="gpu")
+
+
+def test_process_backend_searches_several_archives() -> None:
+    zim_path = os.getenv("ZIM_FILE_PATH", "")
+    if not zim_path or not os.path.isfile(zim_path):
+        pytest.skip("ZIM_FILE_PATH not set")
+    directory = os.path.dirname(zim_path)
+    paths = sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".zim"))
+    if len(paths) < 2:
+        pytest.skip("Need at least two ZIM files next to ZIM_FILE_PATH")
+
+    from wikisearch.process_backend import ProcessBackend
+    from wikisearch.zim.zim_searcher import ZIMSearcher
+
+    # 工作进程内并行搜索各档案，归并结果与服务进程中的搜索一致
+    searcher = ZIMSearcher(paths)
+    backend = ProcessBackend(paths, max_workers=1, search_workers=2)
+    try:
+        hits, _, partial = backend.search_hits("Python", 0, 10)
+        assert not partial
+        assert len({hit.archive_uuid for hit in hits}) == 2
+        assert hits == searcher.search_hits("Python", 0, 10)[0]
+    finally:
+        backend.shutdown()
+        searcher.close_all()
+
+
+def test_warmup_starts_and_warms_every_worker() -> None:
+    zim_path = os.getenv("ZIM_FILE_PATH", "")
+    if not zim_path or not os.path.isfile(zim_path):
+        pytest.skip("ZIM_FILE_PATH not set")
+
+    from wikisearch.process_backend import ProcessBackend
+
+    # 每个进程在初始化时预热，屏障保证两个任务分别由两个进程执行
+    backend = ProcessBackend([zim_path], max_workers=2)
+    try:
+        assert backend.warmup(["AI"]) == 2
+        assert backend.warmup_queries == ["AI"]
+        assert backend.locate("AI")[0]
+    finally:
+        backend.shutdown()
@@ -0,0 +1,71 @@
+import time
+
+from wikisearch.zim.query_cache import QueryCache
+
+
+def test_query_cache_hit_miss_and_limit() -> None:
+    cache = QueryCache(max_entries=8)
+    assert cache.get("a.zim", "python", 5) is None
+
+    cache.put("a.zim", "python", ["p1", "p2", "p3"], exhausted=False)
+    assert cache.get("a.zim", "python", 2) == ["p1", "p2"]
+    # 缓存的结果不足且未取完时视为未命中
+    assert cache.get("a.zim", "python", 5) is None
+
+    cache.put("a.zim", "rare", ["r1"], exhausted=True)
+    assert cache.get("a.zim", "rare", 10) == ["r1"]
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 2
+
+
+def test_query_cache_lru_eviction_and_invalidation() -> None:
+    cache = QueryCache(max_entries=2)
+    cache.put("a.zim", "q1", ["x"], exhausted=True)
+    cache.put("b.zim", "q1", ["y"], exhausted=True)
+    assert cache.get("a.zim", "q1", 1) == ["x"]
+
+    cache.put("b.zim", "q2", ["z"], exhausted=True)
+    assert cache.get("b.zim", "q1", 1) is None
+    assert cache.stats()["evictions"] == 1
+
+    assert cache.invalidate_archive("a.zim") == 1
+    assert cache.get("a.zim", "q1", 1) is None
+    assert cache.get("b.zim", "q2", 1) == ["z"]
+
+
+def test_query_cache_ttl_expiry() -> None:
+    cache = QueryCache(max_entries=2, ttl_seconds=0.01)
+    cache.put("a.zim", "q", ["x"], exhausted=True)
+    time.sleep(0.02)
+    assert cache.get("a.zim", "q", 1) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_single_archive_pages_use_the_query_cache() -> None:
+    import os
+
+    import pytest
+
+    zim_path = os.getenv("ZIM_FILE_PATH", "")
+    if not zim_path or not os.path.isfile(zim_path):
+        pytest.skip("ZIM_FILE_PATH not set")
+
+    from wikisearch.deadline import Deadline
+    from wikisearch.zim.zim_searcher import ZIMSearcher
+
+    searcher = ZIMSearcher([zim_path])
+    try:
+        # 第二页（offset > 0）同样写入查询缓存，结果与第一页的排名连续
+        page, _, partial = searcher.search_hits("Python", offset=2, limit=2)
+        assert not partial
+        assert searcher.query_cache.get(zim_path, "Python", 5) is not None
+        first, _, _ = searcher.search_hits("Python", offset=0, limit=4)
+        assert [hit.path for hit in page] == [hit.path for hit in first[2:]]
+
+        # 已经过期的截止时间返回空的部分结果
+        hits, has_more, partial = searcher.search_hits("Python", offset=2, limit=2, deadline=Deadline(0))
+        assert hits == [] and has_more and partial
+    finally:
+        searcher.close_all()
@@ -0,0 +1,60 @@
+import os
+import pickle
+
+import pytest
+
+from wikisearch.zim.records import ArticleContent, SearchHit
+
+
+def test_search_hit_round_trip() -> None:
+    hit = SearchHit(3, "wiki.zim", "uuid-1", "A/Python", "Python", 1024, "text/html")
+    assert not hasattr(hit, "__dict__")
+    assert hit.to_dict() == {"rank": 3, "archive": "wiki.zim", "path": "A/Python", "title": "Python",
+                             "size": 1024, "mimetype": "text/html"}
+    hit.snippet = "<b>Python</b> is"
+    assert hit.to_dict()["snippet"] == "<b>Python</b> is"
+    # 工作进程通过 pickle 传回命中
+    assert pickle.loads(pickle.dumps(hit)) == hit
+
+
+def test_article_content_materializes_lazily() -> None:
+    raw = "<p>café</p>".encode("latin-1")
+    article = ArticleContent("uuid-1", "A/Cafe", "Café", "text/html; charset=iso-8859-1", memoryview(raw), "title")
+    assert article.size == len(raw)
+    assert article._text is None
+    assert b"".join(article.chunks(4)) == raw
+    assert article._text is None
+    assert article.text == "<p>café</p>"
+    assert article.to_dict() == {"title": "Café", "archive": "uuid-1", "path": "A/Cafe", "content": "<p>café</p>",
+                                 "match": "title", "partial": False}
+
+    markdown = ArticleContent("uuid-1", "A/Cafe", "Café", "text/markdown; charset=utf-8", "# Café", partial=True)
+    assert markdown.body == "# Café".encode("utf-8") and markdown.size == 7
+    assert markdown.to_dict("markdown")["markdown"] == "# Café"
+
+
+@pytest.fixture(scope="module")
+def api():
+    zim_path = os.getenv("ZIM_FILE_PATH", "")
+    if not zim_path or not os.path.isfile(zim_path):
+        pytest.skip("ZIM_FILE_PATH not set")
+
+    from wikisearch.api import WikiSearchAPI
+
+    api = WikiSearchAPI([zim_path])
+    yield api
+    api.close()
+
+
+def test_records_from_searcher(api) -> None:
+    from wikisearch.tools.tools import search_html_content
+
+    page = api.search_hits("Python", limit=2)
+    assert page["hits"] and all(isinstance(hit, SearchHit) for hit in page["hits"])
+    hit = page["hits"][0]
+    assert hit.archive_uuid == api._searcher.archive_uuids[0]
+
+    success, article, error = api.get_article(hit.archive_uuid, hit.path)
+    assert success and error is None
+    assert article.title == hit.title and article.size == hit.size
+    assert isinstance(search_html_content(api, "Python"), ArticleContent)
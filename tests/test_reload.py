@@ -0,0 +1,82 @@
+import os
+import shutil
+
+import pytest
+
+from wikisearch.watcher import ZimDirectoryWatcher
+
+
+def _zim_paths():
+    """ZIM_FILE_PATH 所在目录中的全部 ZIM 文件。"""
+    zim_path = os.getenv("ZIM_FILE_PATH", "")
+    if not zim_path or not os.path.isfile(zim_path):
+        return []
+    directory = os.path.dirname(zim_path)
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".zim"))
+
+
+def test_watcher_waits_until_files_are_stable(tmp_path) -> None:
+    calls = []
+    watcher = ZimDirectoryWatcher(str(tmp_path), lambda: calls.append(1), interval=60)
+    assert not watcher.poll()
+
+    new_file = tmp_path / "wikipedia_en_all_2025-09.zim"
+    new_file.write_bytes(b"x" * 10)
+    # 第一次看到变化时等待，下一次轮询状态不变才通知
+    assert not watcher.poll()
+    new_file.write_bytes(b"x" * 20)
+    assert not watcher.poll()
+    assert watcher.poll()
+    assert calls == [1]
+    assert not watcher.poll()
+
+    new_file.unlink()
+    assert not watcher.poll()
+    assert watcher.poll()
+    assert calls == [1, 1]
+
+
+def test_reload_swaps_archive_set_and_drains_old_readers(tmp_path) -> None:
+    paths = _zim_paths()
+    if len(paths) < 2:
+        pytest.skip("Need at least two ZIM files next to ZIM_FILE_PATH")
+
+    from wikisearch.api import WikiSearchAPI
+
+    first = shutil.copy(paths[0], tmp_path)
+    api = WikiSearchAPI(str(tmp_path), backend="thread")
+    try:
+        with api._use_searcher() as old:
+            shared_uuid = old.archive_uuids[0]
+            shared_archive = old.archives.peek(shared_uuid)[0]
+            second = shutil.copy(paths[1], tmp_path)
+
+            report = api.reload(warm=False)
+            assert report["changed"]
+            assert report["added"] == [second]
+            assert api.list_zim_files() == sorted([first, second])
+
+            # 进行中的请求仍在旧集合上完成
+            assert old.list_open_zims() == [first]
+            assert old.search_hits("Python", 0, 5)[0]
+
+        # 最后一个读者结束后旧集合被释放，共享的档案由新集合继续使用
+        assert old.list_open_zims() == []
+        new = api._searcher
+        assert new.archives.peek(shared_uuid)[0] is shared_archive
+        assert api.search_hits("Python", 0, 10)["hits"]
+
+        # 被移除档案的内容缓存条目随旧集合一起释放，其他档案的条目保留
+        from wikisearch.tools.content_cache import content_cache
+        second_uuid = next(u for u in new.archive_uuids if u != shared_uuid)
+        content_cache.put(shared_uuid, "A/Removed", "html", "Removed", b"<p>removed</p>", "text/html")
+        content_cache.put(second_uuid, "A/Kept", "html", "Kept", b"<p>kept</p>", "text/html")
+        os.remove(first)
+        report = api.reload(warm=False)
+        assert report["removed"] == [first]
+        assert content_cache.invalidate_archive(shared_uuid) == 0
+        assert content_cache.invalidate_archive(second_uuid) == 1
+        assert api.list_zim_files() == [second]
+        assert not api.reload()["changed"]
+    finally:
+        api.close()
@@ -0,0 +1,103 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from wikisearch.zim.searcher_pool import SearcherPool
+
+
+class _FakeSearcher:
+    """记录是否被多个线程同时使用。"""
+
+    def __init__(self):
+        self._busy = threading.Lock()
+        self.overlaps = 0
+        self.uses = 0
+
+    def use(self) -> None:
+        if not self._busy.acquire(blocking=False):
+            self.overlaps += 1
+            return
+        try:
+            self.uses += 1
+        finally:
+            self._busy.release()
+
+
+def test_searcher_pool_stress_exclusive_checkout() -> None:
+    created = []
+    archives = []
+    pool_archives = []
+
+    def opener(path, archive):
+        searcher = _FakeSearcher()
+        created.append(searcher)
+        archives.append(archive)
+        archive = archive or object()
+        pool_archives.append(archive)
+        return archive, searcher
+
+    pool = SearcherPool("fake.zim", size=4, opener=opener)
+
+    def worker(_):
+        for _ in range(200):
+            with pool.checkout() as (_, searcher):
+                searcher.use()
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(worker, range(16)))
+
+    assert 1 <= len(created) <= 4
+    # 只有第一个句柄打开档案，其余句柄共享它
+    assert archives.count(None) == 1 and len(set(map(id, pool_archives))) == 1
+    assert sum(s.overlaps for s in created) == 0
+    assert sum(s.uses for s in created) == 16 * 200
+
+    stats = pool.stats()
+    assert stats["checkouts"] == 16 * 200
+    assert stats["idle"] == stats["open"] == len(created)
+
+
+def test_searcher_pool_timeout_and_close() -> None:
+    pool = SearcherPool("fake.zim", size=1, opener=lambda path, archive: (object(), _FakeSearcher()))
+    handle = pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.01)
+    pool.release(handle)
+    assert pool.acquire(timeout=0.01) is handle
+
+    pool.close()
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+
+
+def test_searcher_pool_concurrent_zim_queries() -> None:
+    zim_path = os.getenv("ZIM_FILE_PATH", "")
+    if not zim_path or not os.path.isfile(zim_path):
+        pytest.skip("ZIM_FILE_PATH not set")
+
+    from libzim.search import Query
+
+    pool = SearcherPool(zim_path, size=4)
+
+    def query(term):
+        with pool.checkout() as (_, searcher):
+            search = searcher.search(Query().set_query(term))
+            return list(search.getResults(0, 5))
+
+    def archive_of_handle(_):
+        with pool.checkout() as (archive, _):
+            barrier.wait()
+            return archive
+
+    expected = query("wiki")
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(query, ["wiki"] * 64))
+        # 同时借出全部句柄：它们共享同一个 Archive
+        barrier = threading.Barrier(4)
+        handle_archives = list(executor.map(archive_of_handle, range(4)))
+    assert all(result == expected for result in results)
+    assert pool.stats()["open"] == 4
+    assert all(archive is handle_archives[0] for archive in handle_archives)
+    pool.close()
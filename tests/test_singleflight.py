@@ -0,0 +1,85 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from wikisearch.singleflight import SingleFlight
+from wikisearch.tools.tools import search_markdown_content
+
+
+def _run_concurrently(flights: SingleFlight, fn, n: int = 8):
+    barrier = threading.Barrier(n)
+
+    def call(_):
+        barrier.wait()
+        return flights.do("key", fn)
+
+    with ThreadPoolExecutor(max_workers=n) as executor:
+        return [executor.submit(call, i) for i in range(n)]
+
+
+def test_single_flight_shares_one_execution() -> None:
+    flights = SingleFlight()
+    executions = []
+
+    def slow():
+        executions.append(1)
+        time.sleep(0.1)
+        return {"value": 42}
+
+    futures = _run_concurrently(flights, slow)
+    results = [future.result() for future in futures]
+    assert len(executions) == 1
+    assert all(result is results[0] for result in results)
+    stats = flights.stats()
+    assert stats["executions"] == 1 and stats["coalesced"] == 7 and stats["in_flight"] == 0
+
+    # 完成后不再合并
+    assert flights.do("key", lambda: 1) == 1
+    assert flights.stats()["executions"] == 2
+
+
+def test_single_flight_shares_errors_and_can_be_disabled() -> None:
+    flights = SingleFlight()
+
+    def fail():
+        time.sleep(0.1)
+        raise ValueError("boom")
+
+    for future in _run_concurrently(flights, fail):
+        with pytest.raises(ValueError):
+            future.result()
+    assert flights.stats()["errors"] == 1
+
+    disabled = SingleFlight(enabled=False)
+    [future.result() for future in _run_concurrently(disabled, lambda: time.sleep(0.05))]
+    assert disabled.stats()["executions"] == 8 and disabled.stats()["coalesced"] == 0
+
+
+def test_markdown_requests_are_coalesced() -> None:
+    class _FakeAPI:
+        def __init__(self):
+            self.conversions = 0
+
+        def locate(self, query, result_index=0, deadline=None, zim=None, lang=None):
+            return True, "single-flight-test", f"{query}-{time.monotonic_ns()}", "title", None
+
+        def get_markdown(self, archive_uuid, path, deadline=None):
+            self.conversions += 1
+            time.sleep(0.1)
+            return True, path, f"# {path}", False, None
+
+    api = _FakeAPI()
+    barrier = threading.Barrier(6)
+
+    def request(_):
+        barrier.wait()
+        return search_markdown_content(api, "trending", 0, None)
+
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        results = list(executor.map(request, range(6)))
+    assert api.conversions == 1
+    # 合并的请求共享同一个只读的 ArticleContent
+    assert all(result is results[0] for result in results[1:])
+    assert results[0].text.startswith("# trending-") and results[0].match == "title"
@@ -0,0 +1,29 @@
+from wikisearch.zim.snippet import make_snippet
+
+
+def test_snippet_highlights_terms_in_context() -> None:
+    html = (
+        "<html><head><title>T</title><style>p {}</style></head><body><h1>Python</h1>"
+        + "<p>filler text</p>" * 50
+        + "<p>Guido released <b>Python</b> &amp; friends in 1991.</p></body></html>"
+    ).encode("utf-8")
+
+    snippet = make_snippet(memoryview(html), "python 1991", width=80)
+    assert "**Python** & friends in **1991**." in snippet
+    assert snippet.startswith("...")
+    assert "p {}" not in snippet
+
+
+def test_snippet_falls_back_to_start_of_body() -> None:
+    html = "<body><p>人工智能是机器的智能。</p></body>".encode("utf-8")
+    assert make_snippet(html, "机器学习") == "人工智能是机器的智能。"
+    assert make_snippet(html, "智能") == "人工**智能**是机器的**智能**。"
+
+
+def test_snippet_uses_the_charset_of_the_mimetype() -> None:
+    html = "<body><p>人工智能是机器的智能。</p></body>".encode("gbk")
+    assert make_snippet(html, "智能", charset="gbk") == "人工**智能**是机器的**智能**。"
+    latin = "<body><p>Café crème</p></body>".encode("latin-1")
+    assert make_snippet(latin, "crème", charset="iso-8859-1") == "Café **crème**"
+    # 无法识别的 charset 按 UTF-8 解码
+    assert make_snippet("<body>naïve</body>".encode("utf-8"), "x", charset="no-such-charset") == "naïve"
@@ -0,0 +1,59 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def zim_path():
+    zim_path = os.getenv("ZIM_FILE_PATH", "")
+    if not zim_path or not os.path.isfile(zim_path):
+        pytest.skip("ZIM_FILE_PATH not set")
+    return zim_path
+
+
+def test_concurrent_suggestions_check_out_searchers(zim_path, monkeypatch) -> None:
+    from wikisearch.config import config
+    from wikisearch.zim.zim_searcher import ZIMSearcher
+
+    monkeypatch.setattr(config, "WIKI_PREFIX_INDEX", False)
+    searcher = ZIMSearcher([zim_path])
+    try:
+        expected = searcher.suggest("Py", 5)
+        assert expected
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: searcher.suggest("Py", 5), range(64)))
+        assert all(result == expected for result in results)
+        # 每个 SuggestionSearcher 同一时刻只被一个线程借出
+        stats = searcher._suggestion_pools[searcher.archive_uuids[0]].stats()
+        assert 1 <= stats["open"] <= searcher.searchers_per_archive
+        assert stats["idle"] == stats["open"]
+    finally:
+        searcher.close_all()
+
+
+def test_prefix_index_is_built_in_the_background(zim_path, tmp_path, monkeypatch) -> None:
+    from wikisearch.config import config
+    from wikisearch.zim.prefix_index import TitlePrefixIndex
+    from wikisearch.zim.zim_searcher import ZIMSearcher
+
+    monkeypatch.setattr(config, "WIKI_PREFIX_INDEX", True)
+    monkeypatch.setattr(config, "WIKI_INDEX_DIR", str(tmp_path))
+    builds = []
+    load_or_build = TitlePrefixIndex.load_or_build
+
+    def counting_load_or_build(archive, path, *args):
+        builds.append(path)
+        return load_or_build(archive, path, *args)
+
+    monkeypatch.setattr(TitlePrefixIndex, "load_or_build", counting_load_or_build)
+    searcher = ZIMSearcher([zim_path])
+    try:
+        # 索引构建完成前用 SuggestionSearcher 回答
+        assert searcher.suggest("Py", 5)
+        assert searcher.build_prefix_indexes(wait=True) == 1
+        assert [s["title"] for s in searcher.suggest("Py", 5)]
+        searcher.suggest("Wi", 5)
+        assert builds == [zim_path]
+    finally:
+        searcher.close_all()
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def zim_path():
+    zim_path = os.getenv("ZIM_FILE_PATH", "")
+    if not zim_path or not os.path.isfile(zim_path):
+        pytest.skip("ZIM_FILE_PATH not set")
+    return zim_path
+
+
+def test_filter_contains_every_title_and_path(zim_path, tmp_path) -> None:
+    from libzim.reader import Archive
+    from wikisearch.zim.title_filter import TitleFilter
+
+    archive = Archive(zim_path)
+    title_filter = TitleFilter.load_or_build(archive, zim_path, str(tmp_path))
+    assert os.path.isfile(tmp_path / (os.path.basename(zim_path) + ".titles.bloom"))
+
+    for entry_id in range(archive.entry_count):
+        entry = archive._get_entry_by_id(entry_id)
+        assert entry.title in title_filter
+        assert entry.path.upper() in title_filter
+    missing = [f"No such article {i}" for i in range(200)]
+    assert sum(title in title_filter for title in missing) < 20
+
+    # 再次加载时直接使用 sidecar；UUID 不匹配时不使用
+    reloaded = TitleFilter.load(zim_path, archive.uuid.bytes, str(tmp_path))
+    assert reloaded is not None and len(reloaded) == len(title_filter)
+    assert TitleFilter.load(zim_path, bytes(16), str(tmp_path)) is None
+    reloaded.close()
+    title_filter.close()
+
+
+def test_lookup_skips_archives_without_the_title(zim_path, tmp_path, monkeypatch) -> None:
+    from wikisearch.config import config
+    from wikisearch.zim.title_filter import TitleFilter
+    from wikisearch.zim.zim_searcher import ZIMSearcher
+
+    monkeypatch.setattr(config, "WIKI_TITLE_FILTER", True)
+    monkeypatch.setattr(config, "WIKI_INDEX_DIR", str(tmp_path))
+    builds = []
+    load_or_build = TitleFilter.load_or_build
+
+    def counting_load_or_build(archive, path, *args):
+        builds.append(path)
+        return load_or_build(archive, path, *args)
+
+    monkeypatch.setattr(TitleFilter, "load_or_build", counting_load_or_build)
+    searcher = ZIMSearcher([zim_path])
+    try:
+        # 打开档案只安排后台构建，构建完成前查找不经过过滤器
+        archive = searcher.zim_archives[0]
+        entry = archive.main_entry.get_redirect_entry() if archive.main_entry.is_redirect else archive.main_entry
+        assert searcher.find_entry(entry.title, by="title")[0]
+        assert searcher.build_title_filters(wait=True) == 1
+        probes = searcher.title_filter_stats()["probes"]
+
+        assert searcher.find_entry(entry.title, by="title")[0]
+        assert searcher.lookup_title("No such article xyz") is None
+        stats = searcher.title_filter_stats()
+        assert stats["filters"] == 1 and stats["building"] == 0
+        assert stats["probes"] - probes == 2 and stats["skipped"] <= 1
+
+        # 档案被淘汰后重新打开不会再次构建
+        searcher._on_archive_open(zim_path, searcher.archive_uuids[0], archive)
+        assert searcher.build_title_filters(wait=True) == 1
+        assert builds == [zim_path]
+    finally:
+        searcher.close_all()
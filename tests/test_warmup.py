@@ -0,0 +1,20 @@
+import os
+
+import pytest
+
+from wikisearch.zim.warmup import advise_willneed
+
+
+@pytest.mark.skipif(not hasattr(os, "posix_fadvise"), reason="posix_fadvise not available")
+def test_advise_willneed_regions(tmp_path) -> None:
+    small = tmp_path / "small.zim"
+    small.write_bytes(b"\0" * 1000)
+    assert advise_willneed(str(small), 4096) == 1000
+
+    large = tmp_path / "large.zim"
+    large.write_bytes(b"\0" * 100_000)
+    # 只预读头部和尾部
+    assert advise_willneed(str(large), 4096) == 2 * 4096
+
+    assert advise_willneed(str(large), 0) == 0
+    assert advise_willneed(str(tmp_path / "missing.zim"), 4096) == 0
@@ -34,6 +34,43 @@ def test_fastapi_zim_files() -> None:
         pytest.skip(message)
 
 
+def _probe_fastapi_search_hits(query: str = "wiki") -> tuple[bool, str]:
+    base_url = os.getenv("WIKI_API_URL", "http://127.0.0.1:8080")
+    try:
+        response = requests.get(f"{base_url}/search/hits", params={"query": query, "limit": 2}, timeout=5)
+    except requests.RequestException as exc:
+        return False, f"FastAPI server not available: {exc}"
+
+    if response.status_code in (404, 503):
+        return False, f"No hits available: {response.status_code}"
+
+    if response.status_code != 200:
+        return False, f"Unexpected status: {response.status_code}"
+
+    data = response.json()
+    assert isinstance(data["hits"], list)
+    assert len(data["hits"]) <= 2
+    for hit in data["hits"]:
+        assert {"archive", "path", "title", "size", "mimetype"} <= hit.keys()
+
+    if data["next_cursor"]:
+        next_page = requests.get(
+            f"{base_url}/search/hits",
+            params={"query": query, "limit": 2, "cursor": data["next_cursor"]},
+            timeout=5,
+        )
+        assert next_page.status_code == 200
+        assert next_page.json()["offset"] == 2
+
+    return True, "ok"
+
+
+def test_fastapi_search_hits() -> None:
+    ok, message = _probe_fastapi_search_hits()
+    if not ok:
+        pytest.skip(message)
+
+
 if __name__ == "__main__":
     ok, message = _probe_fastapi_zim_files()
     if ok: